@@ -0,0 +1,245 @@
+"""
+SuperMittos Feature Builder
+Mantém estatisticas_historicas (média, forma recente, consistência) de forma
+incremental: cada rodada nova atualiza só os jogadores que jogaram nela
+
+Janelas acumuladas (temporada, casa, fora) usam a atualização de Welford a
+partir de (jogos, média, desvio) já gravados; as janelas móveis (últimos 5 e
+10 jogos) são recalculadas sobre um buffer limitado das últimas rodadas.
+Custo por rodada: O(jogadores), independente de quantas rodadas já passaram.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Janelas acumuladas: filtro de mando (None = todos os jogos)
+CUMULATIVE_WINDOWS = {"temporada": None, "casa": True, "fora": False}
+
+# Janelas móveis: quantidade de jogos
+ROLLING_WINDOWS = {"ultimos_5": 5, "ultimos_10": 10}
+
+# Rodadas lidas para montar as janelas móveis (jogadores que ficam muitas
+# rodadas sem jogar ficam com janelas mais curtas)
+ROLLING_LOOKBACK_ROUNDS = 20
+
+# Diferença entre as médias dos últimos 5 e 10 jogos para indicar tendência
+TREND_THRESHOLD = 0.5
+
+FEATURE_COLUMNS = ["jogos", "media_pontos", "media_preco", "consistencia", "forma_recente", "tendencia"]
+
+UPSERT = """
+INSERT INTO estatisticas_historicas
+    (jogador_id, periodo, temporada, jogos, media_pontos, media_preco, consistencia,
+     forma_recente, tendencia, ultima_rodada, updated_at)
+VALUES (:jogador_id, :periodo, :temporada, :jogos, :media_pontos, :media_preco, :consistencia,
+        :forma_recente, :tendencia, :ultima_rodada, CURRENT_TIMESTAMP)
+ON CONFLICT (jogador_id, periodo, temporada) DO UPDATE SET
+    jogos = EXCLUDED.jogos,
+    media_pontos = EXCLUDED.media_pontos,
+    media_preco = EXCLUDED.media_preco,
+    consistencia = EXCLUDED.consistencia,
+    forma_recente = EXCLUDED.forma_recente,
+    tendencia = EXCLUDED.tendencia,
+    ultima_rodada = EXCLUDED.ultima_rodada,
+    updated_at = EXCLUDED.updated_at
+"""
+
+def welford_update(count: np.ndarray,
+                   mean: np.ndarray,
+                   m2: np.ndarray,
+                   values: np.ndarray) -> tuple:
+    """Acrescenta um valor por linha ao estado (n, média, M2), vetorizado"""
+    count = count + 1
+    delta = values - mean
+    mean = mean + delta / count
+    m2 = m2 + delta * (values - mean)
+    return count, mean, m2
+
+def sample_std(count: np.ndarray, m2: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 1, np.sqrt(np.maximum(m2, 0) / (count - 1)), 0.0)
+
+class FeatureBuilder:
+    """Atualização incremental de estatisticas_historicas a partir de estatisticas_rodada (fonte cartola)"""
+
+    def __init__(self, engine, season: Optional[str] = None):
+        self.engine = engine
+        self.season = season or self._current_season()
+
+    def update(self, through_round: Optional[int] = None) -> Dict[int, int]:
+        """Aplica, em ordem, as rodadas ainda não incorporadas; retorna linhas gravadas por rodada"""
+        with self.engine.connect() as conn:
+            last_applied = conn.execute(text("""
+                SELECT COALESCE(MAX(ultima_rodada), 0) FROM estatisticas_historicas
+                WHERE periodo = 'temporada' AND temporada = :temporada
+            """), {"temporada": self.season}).scalar()
+            rounds = [row[0] for row in conn.execute(text("""
+                SELECT DISTINCT rodada FROM estatisticas_rodada
+                WHERE fonte = 'cartola' AND rodada > :last_applied
+                  AND (:through_round IS NULL OR rodada <= :through_round)
+                ORDER BY rodada
+            """), {"last_applied": last_applied, "through_round": through_round})]
+
+        # Rodada anterior à última aplicada também é conferida: jogadores sem
+        # linha na primeira execução daquela rodada entram agora
+        if last_applied:
+            rounds.insert(0, last_applied)
+
+        return {round_number: self.apply_round(round_number) for round_number in rounds}
+
+    def apply_round(self, round_number: int) -> int:
+        """Incorpora uma rodada para os jogadores que jogaram nela e ainda não a têm"""
+        with self.engine.connect() as conn:
+            played = pd.read_sql(text("""
+                SELECT jogador_id, pontos_cartola as pontos, preco, casa
+                FROM estatisticas_rodada
+                WHERE fonte = 'cartola' AND rodada = :rodada AND jogou = true
+            """), conn, params={"rodada": round_number})
+            current = pd.read_sql(text("""
+                SELECT jogador_id, periodo, jogos, media_pontos, media_preco, consistencia, ultima_rodada
+                FROM estatisticas_historicas
+                WHERE temporada = :temporada
+            """), conn, params={"temporada": self.season})
+
+        if played.empty:
+            return 0
+
+        played["jogador_id"] = played["jogador_id"].astype(str)
+        current["jogador_id"] = current["jogador_id"].astype(str)
+
+        # Jogadores que já incorporaram esta rodada ficam de fora (reexecução do ETL)
+        season_rows = current[current["periodo"] == "temporada"].set_index("jogador_id")
+        applied = season_rows["ultima_rodada"].reindex(played["jogador_id"]).fillna(0).to_numpy() >= round_number
+        played = played[~applied].reset_index(drop=True)
+        if played.empty:
+            return 0
+
+        frames = [self._cumulative(played, current, period, home) for period, home in CUMULATIVE_WINDOWS.items()]
+        rolling = self._rolling(played, round_number)
+        frames.extend(rolling.values())
+
+        features = pd.concat([frame for frame in frames if not frame.empty], ignore_index=True)
+        recent = rolling["ultimos_5"].set_index("jogador_id")
+        longer = rolling["ultimos_10"].set_index("jogador_id")
+        features["forma_recente"] = recent["media_pontos"].reindex(features["jogador_id"]).to_numpy()
+        features["tendencia"] = self._trend(
+            recent["media_pontos"].reindex(features["jogador_id"]).to_numpy(),
+            longer["media_pontos"].reindex(features["jogador_id"]).to_numpy()
+        )
+
+        rows = self._rows(features, round_number)
+        with self.engine.begin() as conn:
+            conn.execute(text(UPSERT), rows)
+
+        logger.info(f"Features da rodada {round_number}: {len(played)} jogadores, {len(rows)} linhas")
+        return len(rows)
+
+    def _cumulative(self,
+                    played: pd.DataFrame,
+                    current: pd.DataFrame,
+                    period: str,
+                    home: Optional[bool]) -> pd.DataFrame:
+        """Welford sobre o estado gravado da janela acumulada"""
+        subset = played if home is None else played[played["casa"].astype("boolean") == home]
+        if subset.empty:
+            return pd.DataFrame()
+
+        state = current[current["periodo"] == period].set_index("jogador_id").reindex(subset["jogador_id"])
+        count = state["jogos"].fillna(0).to_numpy(dtype=float)
+        mean = state["media_pontos"].fillna(0).to_numpy(dtype=float)
+        m2 = state["consistencia"].fillna(0).to_numpy(dtype=float) ** 2 * np.maximum(count - 1, 0)
+        price_mean = state["media_preco"].fillna(0).to_numpy(dtype=float)
+
+        points = subset["pontos"].fillna(0).to_numpy(dtype=float)
+        prices = subset["preco"].to_numpy(dtype=float)
+
+        count, mean, m2 = welford_update(count, mean, m2, points)
+        price_mean = np.where(np.isnan(prices), price_mean, price_mean + (np.nan_to_num(prices) - price_mean) / count)
+
+        return pd.DataFrame({
+            "jogador_id": subset["jogador_id"].to_numpy(),
+            "periodo": period,
+            "jogos": count.astype(int),
+            "media_pontos": mean,
+            "media_preco": price_mean,
+            "consistencia": sample_std(count, m2)
+        })
+
+    def _rolling(self, played: pd.DataFrame, round_number: int) -> Dict[str, pd.DataFrame]:
+        """Últimos N jogos de cada jogador, a partir de um buffer limitado de rodadas"""
+        with self.engine.connect() as conn:
+            history = pd.read_sql(text("""
+                SELECT jogador_id, rodada, pontos_cartola as pontos, preco
+                FROM estatisticas_rodada
+                WHERE fonte = 'cartola' AND jogou = true
+                  AND rodada > :rodada - :lookback AND rodada <= :rodada
+            """), conn, params={"rodada": round_number, "lookback": ROLLING_LOOKBACK_ROUNDS})
+
+        history["jogador_id"] = history["jogador_id"].astype(str)
+        history = history[history["jogador_id"].isin(played["jogador_id"])]
+        history = history.sort_values(["jogador_id", "rodada"], ascending=[True, False])
+        history["pontos"] = history["pontos"].fillna(0)
+
+        windows = {}
+        for period, size in ROLLING_WINDOWS.items():
+            grouped = history.groupby("jogador_id", sort=False).head(size).groupby("jogador_id")
+            aggregated = grouped.agg(
+                jogos=("pontos", "size"),
+                media_pontos=("pontos", "mean"),
+                media_preco=("preco", "mean"),
+                consistencia=("pontos", "std")
+            ).reset_index()
+            aggregated["consistencia"] = aggregated["consistencia"].fillna(0.0)
+            aggregated["periodo"] = period
+            windows[period] = aggregated
+
+        return windows
+
+    @staticmethod
+    def _trend(recent: np.ndarray, longer: np.ndarray) -> np.ndarray:
+        diff = recent - longer
+        return np.select(
+            [np.isnan(diff), diff > TREND_THRESHOLD, diff < -TREND_THRESHOLD],
+            [None, "crescente", "decrescente"],
+            default="estavel"
+        )
+
+    def _rows(self, features: pd.DataFrame, round_number: int) -> List[Dict]:
+        features = features.astype(object).where(features.notna(), None)
+        return [
+            {
+                "jogador_id": row["jogador_id"],
+                "periodo": row["periodo"],
+                "temporada": self.season,
+                "jogos": int(row["jogos"]),
+                "media_pontos": _float(row["media_pontos"]),
+                "media_preco": _float(row["media_preco"]),
+                "consistencia": _float(row["consistencia"]),
+                "forma_recente": _float(row["forma_recente"]),
+                "tendencia": row["tendencia"],
+                "ultima_rodada": round_number
+            }
+            for row in features[["jogador_id", "periodo"] + FEATURE_COLUMNS].to_dict("records")
+        ]
+
+    def _current_season(self) -> str:
+        """Temporada do último status de mercado (ano corrente se não houver)"""
+        try:
+            with self.engine.connect() as conn:
+                season = conn.execute(text(
+                    "SELECT temporada FROM mercado_status ORDER BY created_at DESC LIMIT 1"
+                )).scalar()
+        except Exception:
+            season = None
+        return str(season or datetime.now().year)
+
+def _float(value) -> Optional[float]:
+    # Sem arredondar: média e desvio gravados são o estado do Welford na próxima rodada
+    return None if value is None else float(value)
@@ -0,0 +1,216 @@
+"""
+SuperMittos ETL Fixtures
+Gravação e reprodução offline das respostas brutas das fontes do ETL
+Os payloads ficam comprimidos e endereçados por conteúdo (sha256), então
+respostas idênticas entre rodadas (clubes, status) são gravadas uma única vez
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_MODES = ("record", "replay")
+
+# Parâmetros que nunca vão para o disco (chaves de API)
+SECRET_PARAMS = {"key", "api_key", "token"}
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Identificador estável de uma requisição (sem parâmetros secretos)"""
+    query = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+    return f"{method.upper()} {url}" + (f"?{urlencode(query)}" if query else "")
+
+class FixtureStore:
+    """
+    Diretório com os blobs e as gravações
+
+    blobs/ab/abcdef....gz     corpo da resposta (gzip), nome = sha256 do corpo
+    recordings/<nome>.json    requisição -> blob, status e content-type
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.blobs_dir = os.path.join(root_dir, "blobs")
+        self.recordings_dir = os.path.join(root_dir, "recordings")
+
+    def put_blob(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(body, compresslevel=6))
+            os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def list_recordings(self) -> List[str]:
+        """Gravações da mais antiga para a mais recente"""
+        if not os.path.isdir(self.recordings_dir):
+            return []
+        names = [entry[:-5] for entry in os.listdir(self.recordings_dir) if entry.endswith(".json")]
+        return sorted(names, key=lambda name: os.path.getmtime(self._recording_path(name)))
+
+    def recording(self, name: Optional[str] = None, mode: str = "replay") -> "FixtureRecording":
+        """Abre uma gravação; sem nome, grava uma nova ou reproduz a mais recente"""
+        if mode not in FIXTURE_MODES:
+            raise ValueError(f"Modo inválido: {mode} (válidos: {', '.join(FIXTURE_MODES)})")
+
+        if not name:
+            if mode == "record":
+                name = f"etl-{datetime.now():%Y%m%d-%H%M%S}"
+            else:
+                recordings = self.list_recordings()
+                if not recordings:
+                    raise FileNotFoundError(f"Nenhuma gravação em {self.recordings_dir}")
+                name = recordings[-1]
+
+        return FixtureRecording(self, name, mode)
+
+    def load_manifest(self, name: str) -> Dict[str, Any]:
+        with open(self._recording_path(name)) as f:
+            return json.load(f)
+
+    def save_manifest(self, name: str, manifest: Dict[str, Any]):
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.recordings_dir)
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._recording_path(name))
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_dir, digest[:2], f"{digest}.gz")
+
+    def _recording_path(self, name: str) -> str:
+        return os.path.join(self.recordings_dir, f"{name}.json")
+
+class FixtureRecording:
+    """
+    Uma execução do ETL gravada (ou sendo gravada)
+
+    No modo record as entradas ficam em memória e o manifesto é escrito uma
+    única vez, em close() (ou ao sair do bloco with); os blobs já vão para o
+    disco em put().
+    """
+
+    def __init__(self, store: FixtureStore, name: str, mode: str):
+        self.store = store
+        self.name = name
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if mode == "replay":
+            self.manifest = store.load_manifest(name)
+        else:
+            self.manifest = {"name": name, "created_at": datetime.now().isoformat(), "entries": {}}
+
+    def __enter__(self) -> "FixtureRecording":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest["entries"]
+
+    def session(self) -> requests.Session:
+        """Sessão HTTP que grava ou reproduz as respostas desta gravação"""
+        return ReplaySession(self) if self.replaying else RecordingSession(self)
+
+    def put(self, key: str, body: bytes, status: int = 200, content_type: str = "application/json"):
+        digest = self.store.put_blob(body)
+        with self._lock:
+            self.entries[key] = {
+                "sha256": digest,
+                "status": status,
+                "content_type": content_type,
+                "size": len(body)
+            }
+            self._dirty = True
+
+    def close(self):
+        """Escreve o manifesto com as entradas gravadas desde a última escrita"""
+        with self._lock:
+            if self._dirty:
+                self.store.save_manifest(self.name, self.manifest)
+                self._dirty = False
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada da gravação com o corpo em "body", ou None se não foi gravada"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return {**entry, "body": self.store.get_blob(entry["sha256"])}
+
+    def save_payload(self, source: str, url: str, payload: Dict[str, Any]):
+        """Grava um resultado que não vem de requests (ex.: scraping com Playwright)"""
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        self.put(request_key(source, url), body)
+
+    def load_payload(self, source: str, url: str) -> Optional[Dict[str, Any]]:
+        entry = self.get(request_key(source, url))
+        return json.loads(entry["body"]) if entry else None
+
+class RecordingSession(requests.Session):
+    """requests.Session que grava cada resposta recebida"""
+
+    def __init__(self, recording: FixtureRecording):
+        super().__init__()
+        self.recording = recording
+
+    def request(self, method, url, params=None, **kwargs):
+        response = super().request(method, url, params=params, **kwargs)
+        try:
+            self.recording.put(
+                request_key(method, url, params),
+                response.content,
+                response.status_code,
+                response.headers.get("content-type", "")
+            )
+        except OSError as e:
+            logger.warning(f"Falha ao gravar fixture de {url}: {e}")
+        return response
+
+class ReplaySession(requests.Session):
+    """requests.Session que responde com os payloads gravados, sem acessar a rede"""
+
+    def __init__(self, recording: FixtureRecording):
+        super().__init__()
+        self.recording = recording
+
+    def request(self, method, url, params=None, **kwargs):
+        key = request_key(method, url, params)
+        entry = self.recording.get(key)
+        if entry is None:
+            # Mesmo erro de uma falha de rede: os clientes já tratam
+            raise requests.ConnectionError(f"Requisição não gravada em {self.recording.name}: {key}")
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = "Replayed"
+        response.url = url
+        response.headers = CaseInsensitiveDict({"content-type": entry["content_type"]})
+        response._content = entry["body"]
+        response.encoding = "utf-8"
+        return response
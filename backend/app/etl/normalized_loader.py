@@ -0,0 +1,354 @@
+"""
+SuperMittos Normalized Loader
+Distribui cada snapshot do merge nas tabelas normalizadas lidas pela API:
+jogadores, historico_precos, estatisticas_rodada, jogador_mapping e mercado_status
+
+Os chunks vão para tabelas de staging temporárias; no final, um INSERT ... SELECT
+... ON CONFLICT por tabela, tudo na mesma transação da escrita do merge
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Campos de estatística de cada fonte -> colunas de estatisticas_rodada
+SOURCE_STAT_FIELDS = {
+    "footystats": {
+        "gols": "goals_overall",
+        "assistencias": "assists_overall",
+        "minutos_jogados": "minutes_played_overall",
+        "cartoes_amarelos": "yellow_cards_overall",
+        "cartoes_vermelhos": "red_cards_overall"
+    },
+    "sofascore": {
+        "gols": "goals",
+        "assistencias": "assists",
+        "minutos_jogados": "minutesPlayed",
+        "cartoes_amarelos": "yellowCards",
+        "cartoes_vermelhos": "redCards",
+        "xg": "expectedGoals",
+        "xa": "expectedAssists",
+        "rating": "rating",
+        "touches": "touches"
+    }
+}
+STAT_COLUMNS = (
+    "gols", "assistencias", "minutos_jogados", "cartoes_amarelos", "cartoes_vermelhos", "xg", "xa", "rating", "touches"
+)
+
+# Status do mercado do Cartola (status_mercado)
+MARKET_OPEN = 1
+
+STAGING_DDL = [
+    """
+    CREATE TEMPORARY TABLE stg_cartola_atletas (
+        cartola_id BIGINT,
+        nome TEXT,
+        nome_normalizado TEXT,
+        apelido TEXT,
+        apelido_normalizado TEXT,
+        clube_id INTEGER,
+        posicao_id INTEGER,
+        preco REAL,
+        variacao REAL,
+        pontos REAL,
+        casa BOOLEAN,
+        scout JSONB
+    )
+    """,
+    """
+    CREATE TEMPORARY TABLE stg_fonte_stats (
+        cartola_id BIGINT,
+        fonte TEXT,
+        fonte_id TEXT,
+        fonte_nome TEXT,
+        confianca REAL,
+        gols INTEGER,
+        assistencias INTEGER,
+        minutos_jogados INTEGER,
+        cartoes_amarelos INTEGER,
+        cartoes_vermelhos INTEGER,
+        xg REAL,
+        xa REAL,
+        rating REAL,
+        touches INTEGER
+    )
+    """
+]
+
+# Um registro de fonte pode casar com mais de um jogador: fica o de maior confiança
+# (um mesmo INSERT ... ON CONFLICT não pode atualizar a mesma linha duas vezes)
+BEST_SOURCE_MATCHES = """
+    SELECT j.id as jogador_id, s.*,
+           ROW_NUMBER() OVER (PARTITION BY s.fonte, s.fonte_id ORDER BY s.confianca DESC, s.cartola_id) as ordem
+    FROM stg_fonte_stats s
+    JOIN jogadores j ON j.jogador_id = s.cartola_id
+"""
+
+# Upserts set-based a partir do staging (executados nesta ordem)
+MERGE_STATEMENTS = [
+    (
+        "jogadores",
+        """
+        INSERT INTO jogadores (jogador_id, nome, nome_normalizado, apelido, apelido_normalizado, clube_id, posicao_id,
+                               status_ativo)
+        SELECT cartola_id, nome, nome_normalizado, apelido, apelido_normalizado, clube_id, posicao_id, true
+        FROM stg_cartola_atletas
+        WHERE cartola_id IS NOT NULL AND posicao_id IS NOT NULL
+        ON CONFLICT (jogador_id) DO UPDATE SET
+            nome = EXCLUDED.nome,
+            nome_normalizado = EXCLUDED.nome_normalizado,
+            apelido = EXCLUDED.apelido,
+            apelido_normalizado = EXCLUDED.apelido_normalizado,
+            clube_id = EXCLUDED.clube_id,
+            posicao_id = EXCLUDED.posicao_id,
+            status_ativo = true
+        """
+    ),
+    (
+        "historico_precos",
+        """
+        INSERT INTO historico_precos (jogador_id, rodada, preco, variacao, variacao_percentual)
+        SELECT j.id, :market_round, s.preco, s.variacao,
+               CASE WHEN s.preco - s.variacao > 0 THEN s.variacao / (s.preco - s.variacao) * 100 END
+        FROM stg_cartola_atletas s
+        JOIN jogadores j ON j.jogador_id = s.cartola_id
+        WHERE s.preco IS NOT NULL
+        ON CONFLICT (jogador_id, rodada) DO UPDATE SET
+            preco = EXCLUDED.preco,
+            variacao = EXCLUDED.variacao,
+            variacao_percentual = EXCLUDED.variacao_percentual
+        """
+    ),
+    (
+        "estatisticas_rodada (cartola)",
+        # pontos_num é da última rodada disputada; o preço da rodada é o anterior à variação
+        """
+        INSERT INTO estatisticas_rodada
+            (jogador_id, rodada, pontos_cartola, preco, variacao_preco, jogou, casa, fonte, metadados)
+        SELECT j.id, :points_round, s.pontos, s.preco - COALESCE(s.variacao, 0), s.variacao,
+               COALESCE(s.pontos, 0) <> 0, s.casa, 'cartola', s.scout
+        FROM stg_cartola_atletas s
+        JOIN jogadores j ON j.jogador_id = s.cartola_id
+        WHERE s.pontos IS NOT NULL AND :points_round > 0
+        ON CONFLICT (jogador_id, rodada, fonte) DO UPDATE SET
+            pontos_cartola = EXCLUDED.pontos_cartola,
+            preco = EXCLUDED.preco,
+            variacao_preco = EXCLUDED.variacao_preco,
+            jogou = EXCLUDED.jogou,
+            casa = COALESCE(EXCLUDED.casa, estatisticas_rodada.casa),
+            metadados = EXCLUDED.metadados
+        """
+    ),
+    (
+        "jogador_mapping",
+        f"""
+        INSERT INTO jogador_mapping (jogador_id, fonte, fonte_id, fonte_nome, confianca)
+        SELECT jogador_id, fonte, fonte_id, fonte_nome, confianca
+        FROM ({BEST_SOURCE_MATCHES}) best
+        WHERE ordem = 1
+        ON CONFLICT (fonte, fonte_id) DO UPDATE SET
+            jogador_id = EXCLUDED.jogador_id,
+            fonte_nome = EXCLUDED.fonte_nome,
+            confianca = EXCLUDED.confianca
+        """
+    ),
+    (
+        "estatisticas_rodada (fontes)",
+        f"""
+        INSERT INTO estatisticas_rodada
+            (jogador_id, rodada, gols, assistencias, minutos_jogados, cartoes_amarelos, cartoes_vermelhos,
+             xg, xa, rating, touches, fonte)
+        SELECT jogador_id, :market_round, gols, assistencias, minutos_jogados, cartoes_amarelos,
+               cartoes_vermelhos, xg, xa, rating, touches, fonte
+        FROM ({BEST_SOURCE_MATCHES}) best
+        WHERE ordem = 1
+        ON CONFLICT (jogador_id, rodada, fonte) DO UPDATE SET
+            gols = EXCLUDED.gols,
+            assistencias = EXCLUDED.assistencias,
+            minutos_jogados = EXCLUDED.minutos_jogados,
+            cartoes_amarelos = EXCLUDED.cartoes_amarelos,
+            cartoes_vermelhos = EXCLUDED.cartoes_vermelhos,
+            xg = EXCLUDED.xg,
+            xa = EXCLUDED.xa,
+            rating = EXCLUDED.rating,
+            touches = EXCLUDED.touches
+        """
+    )
+]
+
+MARKET_STATUS_UPSERT = """
+INSERT INTO mercado_status (rodada_atual, mercado_aberto, data_fechamento, temporada, created_at)
+VALUES (:rodada_atual, :mercado_aberto, :data_fechamento, :temporada, CURRENT_TIMESTAMP)
+ON CONFLICT (temporada, rodada_atual) DO UPDATE SET
+    mercado_aberto = EXCLUDED.mercado_aberto,
+    data_fechamento = EXCLUDED.data_fechamento,
+    -- /market/status ordena por created_at: a linha atualizada volta a ser a mais recente
+    created_at = EXCLUDED.created_at
+"""
+
+class NormalizedLoader:
+    """
+    Carga das tabelas normalizadas a partir dos chunks do merge
+
+    Uso: begin(conn) → stage(conn, chunk) por chunk → finish(conn), sempre na
+    mesma conexão/transação; o commit fica com quem chamou.
+    """
+
+    def __init__(self,
+                 market_status: Optional[Dict[str, Any]],
+                 candidate_stats: Optional[Dict[str, Dict[Any, Dict[str, Any]]]] = None,
+                 club_home: Optional[Dict[int, bool]] = None):
+        self.market_status = market_status or {}
+        self.candidate_stats = candidate_stats or {}
+        self.club_home = club_home or {}
+        self.market_round = self.market_status.get("rodada_atual")
+        self.staged = {"atletas": 0, "fontes": 0}
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def points_round(self) -> int:
+        return points_round(self.market_status)
+
+    def begin(self, conn):
+        for table in ("stg_cartola_atletas", "stg_fonte_stats"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        for ddl in STAGING_DDL:
+            conn.execute(text(ddl))
+
+    def stage(self, conn, chunk: List[Dict[str, Any]]):
+        """Copia um chunk de jogadores do merge (e seus matches) para o staging"""
+        atletas = [self._atleta_row(player) for player in chunk if player.get("cartola_id") is not None]
+        fontes = [
+            self._fonte_row(player["cartola_id"], match)
+            for player in chunk if player.get("cartola_id") is not None
+            for match in player.get("matches", [])
+        ]
+
+        if atletas:
+            conn.execute(text("""
+                INSERT INTO stg_cartola_atletas
+                (cartola_id, nome, nome_normalizado, apelido, apelido_normalizado, clube_id, posicao_id,
+                 preco, variacao, pontos, casa, scout)
+                VALUES (:cartola_id, :nome, :nome_normalizado, :apelido, :apelido_normalizado, :clube_id, :posicao_id,
+                        :preco, :variacao, :pontos, :casa, :scout)
+            """), atletas)
+        if fontes:
+            conn.execute(text(f"""
+                INSERT INTO stg_fonte_stats
+                (cartola_id, fonte, fonte_id, fonte_nome, confianca, {", ".join(STAT_COLUMNS)})
+                VALUES (:cartola_id, :fonte, :fonte_id, :fonte_nome, :confianca,
+                        {", ".join(f":{column}" for column in STAT_COLUMNS)})
+            """), fontes)
+
+        self.staged["atletas"] += len(atletas)
+        self.staged["fontes"] += len(fontes)
+
+    def finish(self, conn) -> Dict[str, int]:
+        """Upserts set-based do staging para as tabelas normalizadas; retorna linhas por tabela"""
+        counts = {}
+        if self.market_round and self.staged["atletas"]:
+            params = {"market_round": self.market_round, "points_round": self.points_round}
+            for table, statement in MERGE_STATEMENTS:
+                counts[table] = conn.execute(text(statement), params).rowcount
+        elif self.staged["atletas"]:
+            logger.warning("Rodada atual desconhecida: tabelas normalizadas não foram atualizadas")
+
+        if self.market_round:
+            counts["mercado_status"] = self._upsert_market_status(conn)
+
+        for table in ("stg_cartola_atletas", "stg_fonte_stats"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+        self.counts = counts
+        logger.info(f"Tabelas normalizadas atualizadas: {counts}")
+        return counts
+
+    def _upsert_market_status(self, conn) -> int:
+        """
+        Upsert de mercado_status num savepoint: sem a UNIQUE (temporada,
+        rodada_atual) (migration 004) o ON CONFLICT falha, e a falha não pode
+        desfazer a escrita do merge na mesma transação
+        """
+        try:
+            with conn.begin_nested():
+                return conn.execute(text(MARKET_STATUS_UPSERT), self._market_status_row()).rowcount
+        except Exception as e:
+            logger.warning(f"mercado_status não atualizado (migration 004_mercado_status_unico aplicada?): {e}")
+            return 0
+
+    def _atleta_row(self, player: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "cartola_id": player["cartola_id"],
+            "nome": player.get("name") or player.get("nickname") or "",
+            "nome_normalizado": player.get("normalized_name") or "",
+            "apelido": player.get("nickname"),
+            "apelido_normalizado": player.get("normalized_nickname") or None,
+            "clube_id": player.get("club_id"),
+            "posicao_id": player.get("position"),
+            "preco": player.get("price"),
+            "variacao": player.get("price_variation"),
+            "pontos": player.get("points"),
+            "casa": self.club_home.get(player.get("club_id")),
+            "scout": json.dumps({"scout": player.get("scout") or {}, "jogos": player.get("games")})
+        }
+
+    def _fonte_row(self, cartola_id: int, match: Dict[str, Any]) -> Dict[str, Any]:
+        stats = self.candidate_stats.get(match["source"], {}).get(match["ref"], {})
+        return {
+            "cartola_id": cartola_id,
+            "fonte": match["source"],
+            "fonte_id": str(match["ref"]),
+            "fonte_nome": match.get("name"),
+            "confianca": match.get("confidence"),
+            **{column: stats.get(column) for column in STAT_COLUMNS}
+        }
+
+    def _market_status_row(self) -> Dict[str, Any]:
+        closing = self.market_status.get("fechamento") or {}
+        timestamp = closing.get("timestamp") if isinstance(closing, dict) else None
+        return {
+            "rodada_atual": self.market_round,
+            "mercado_aberto": self.market_status.get("status_mercado") == MARKET_OPEN,
+            "data_fechamento": _from_timestamp(timestamp),
+            "temporada": str(self.market_status.get("temporada") or datetime.now().year)
+        }
+
+def points_round(market_status: Optional[Dict[str, Any]]) -> int:
+    """Rodada a que se referem os pontos do mercado (a anterior, com o mercado aberto)"""
+    market_round = (market_status or {}).get("rodada_atual")
+    if not market_round:
+        return 0
+    return market_round - 1 if market_status.get("status_mercado") == MARKET_OPEN else market_round
+
+def club_home_map(matches: Optional[Dict[str, Any]]) -> Dict[int, bool]:
+    """Mando de cada clube nas partidas da rodada (/partidas): True mandante, False visitante"""
+    club_home = {}
+    for match in (matches or {}).get("partidas", []):
+        if not isinstance(match, dict):
+            continue
+        if match.get("clube_casa_id") is not None:
+            club_home[match["clube_casa_id"]] = True
+        if match.get("clube_visitante_id") is not None:
+            club_home[match["clube_visitante_id"]] = False
+    return club_home
+
+def extract_stats(source: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Estatísticas de um registro da fonte (também procuradas em record["statistics"])"""
+    fields = SOURCE_STAT_FIELDS.get(source)
+    if not fields:
+        return None
+
+    nested = record.get("statistics") if isinstance(record.get("statistics"), dict) else {}
+    stats = {column: record.get(field, nested.get(field)) for column, field in fields.items()}
+    return {column: value for column, value in stats.items() if isinstance(value, (int, float))} or None
+
+def _from_timestamp(timestamp: Any) -> Optional[str]:
+    if not isinstance(timestamp, (int, float)):
+        return None
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ")
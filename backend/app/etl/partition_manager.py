@@ -0,0 +1,191 @@
+"""
+SuperMittos Partition Manager
+Partições das tabelas que crescem a cada rodada e retenção por DETACH PARTITION
+
+- estatisticas_rodada, historico_precos, predicoes, sugestoes_times e
+  sugestoes_jogadores: RANGE (rodada), uma partição por rodada da temporada
+  corrente (<tabela>_<temporada>_rNN, criada pela função criar_particao_rodada
+  do schema.sql) só quando a rodada recebe dados. Sem partições vazias à
+  frente, o "último preço" de vw_jogadores_completo lê só a partição mais nova.
+- players_merged (snapshots do merge do ETL): RANGE (created_at), uma
+  partição por dia (players_merged_pAAAAMMDD).
+
+A retenção nunca apaga linha a linha: a partição expirada sai da tabela-mãe com
+DETACH PARTITION CONCURRENTLY (sem bloquear leituras e escritas) e depois é
+removida. Na virada de temporada as partições da temporada anterior saem das
+tabelas-mãe; estatísticas, preços e predições ficam como tabelas de arquivo.
+Criação e listagem das partições ficam em services/partitions.py, usadas
+também pela API ao gravar sugestões.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from etl.normalized_loader import points_round
+from services.partitions import (
+    SNAPSHOT_TABLE,
+    SUGGESTION_TABLES,
+    Partition,
+    current_season,
+    ensure_round_partitions,
+    list_partitions,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS players_merged (
+        id SERIAL,
+        cartola_id INTEGER,
+        name TEXT,
+        club_id INTEGER,
+        position INTEGER,
+        price REAL,
+        avg_score REAL,
+        status INTEGER,
+        matches_data JSONB,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_players_merged_created_at_brin ON players_merged USING BRIN (created_at)"
+]
+
+@dataclass
+class RetentionConfig:
+    """Quanto cada tipo de partição é mantido"""
+    suggestion_rounds: int = field(default_factory=lambda: int(os.getenv("PARTITION_SUGGESTION_ROUNDS", 5)))
+    snapshot_days: int = field(default_factory=lambda: int(os.getenv("PARTITION_SNAPSHOT_DAYS", 1)))
+    archive_seasons: int = field(default_factory=lambda: int(os.getenv("PARTITION_ARCHIVE_SEASONS", 1)))
+
+def ensure_snapshot_partitions(conn, days_ahead: int = 1) -> List[str]:
+    """players_merged particionada e as partições de hoje e dos próximos days_ahead dias"""
+    for ddl in SNAPSHOT_DDL:
+        conn.execute(text(ddl))
+
+    today = conn.execute(text("SELECT CURRENT_DATE")).scalar()
+    existing = {partition.day for partition in list_partitions(conn) if partition.table == SNAPSHOT_TABLE}
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        name = f"{SNAPSHOT_TABLE}_p{day:%Y%m%d}"
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {SNAPSHOT_TABLE} "
+            f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+        ))
+        created.append(name)
+    return created
+
+class PartitionManager:
+    """Partições das rodadas do mercado, virada de temporada e retenção"""
+
+    def __init__(self, engine, config: Optional[RetentionConfig] = None):
+        self.engine = engine
+        self.config = config or RetentionConfig()
+
+    def prepare(self, market_status: Dict[str, Any]) -> List[str]:
+        """
+        Antes da escrita do ETL: vira a temporada, se mudou, e cria as partições
+        da rodada do mercado e da rodada pontuada
+        """
+        season = market_status.get("temporada")
+        season = str(season) if season else None
+        if season:
+            self.rollover(season)
+
+        rounds = {r for r in (market_status.get("rodada_atual"), points_round(market_status)) if r}
+        with self.engine.begin() as conn:
+            created = ensure_round_partitions(conn, rounds, season)
+        if created:
+            logger.info(f"Partições criadas: {', '.join(created)}")
+        return created
+
+    def rollover(self, season: str) -> Dict[str, List[str]]:
+        """Tira das tabelas-mãe as partições de outras temporadas (sugestões são removidas)"""
+        with self._autocommit() as conn:
+            stale = [
+                partition for partition in list_partitions(conn)
+                if partition.attached and partition.season is not None and partition.season != season
+            ]
+            result = self._detach_all(conn, stale)
+        if stale:
+            logger.info(f"Virada para a temporada {season}: {len(stale)} partições desanexadas")
+        return result
+
+    def run_retention(self, market_status: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Job de retenção: snapshots com mais de snapshot_days dias, sugestões
+        anteriores às suggestion_rounds últimas rodadas e arquivos além das
+        archive_seasons temporadas mais recentes saem por DETACH + DROP
+        """
+        season = market_status.get("temporada")
+        season = str(season) if season else None
+        market_round = market_status.get("rodada_atual") or 0
+
+        result = self.rollover(season) if season else {"detached": [], "dropped": [], "errors": []}
+        with self._autocommit() as conn:
+            partitions = list_partitions(conn)
+            season = season or current_season(conn)
+            today = conn.execute(text("SELECT CURRENT_DATE")).scalar()
+
+            archived = sorted({p.season for p in partitions if not p.attached and p.season and p.season != season},
+                              reverse=True)
+            kept_archives = set(archived[:self.config.archive_seasons])
+            expired = [
+                partition for partition in partitions
+                if self._expired(partition, season, market_round, today, kept_archives)
+            ]
+            expired_result = self._detach_all(conn, expired, drop=True)
+
+        for key in result:
+            result[key] += expired_result[key]
+        result["success"] = not result["errors"]
+        if result["errors"]:
+            result["error"] = "; ".join(result["errors"])
+        logger.info(f"Retenção de partições: {len(result['dropped'])} removidas, "
+                    f"{len(result['detached'])} desanexadas, {len(result['errors'])} erros")
+        return result
+
+    def _expired(self, partition: Partition, season: str, market_round: int, today: date, kept_archives) -> bool:
+        config = self.config
+        if partition.day is not None:
+            return partition.day < today - timedelta(days=config.snapshot_days)
+        if partition.table in SUGGESTION_TABLES:
+            return (not partition.attached or partition.season != season
+                    or partition.round <= market_round - config.suggestion_rounds)
+        # Estatísticas, preços e predições: só arquivos de temporadas antigas
+        return not partition.attached and partition.season != season and partition.season not in kept_archives
+
+    def _detach_all(self, conn, partitions: List[Partition], drop: bool = False) -> Dict[str, List[str]]:
+        """DETACH CONCURRENTLY (ou FINALIZE) e, para sugestões ou com drop, DROP"""
+        result = {"detached": [], "dropped": [], "errors": []}
+        # sugestoes_jogadores antes de sugestoes_times (chave estrangeira)
+        for partition in sorted(partitions, key=lambda p: (p.table != "sugestoes_jogadores", p.name)):
+            try:
+                if partition.attached:
+                    mode = "FINALIZE" if partition.pending else "CONCURRENTLY"
+                    conn.execute(text(f"ALTER TABLE {partition.table} DETACH PARTITION {partition.name} {mode}"))
+                    result["detached"].append(partition.name)
+                if drop or partition.table in SUGGESTION_TABLES:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {partition.name}"))
+                    result["dropped"].append(partition.name)
+            except Exception as e:
+                logger.error(f"Erro ao desanexar/remover a partição {partition.name}: {e}")
+                result["errors"].append(f"{partition.name}: {e}")
+        return result
+
+    @contextmanager
+    def _autocommit(self):
+        # DETACH ... CONCURRENTLY não roda dentro de transação
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            yield conn
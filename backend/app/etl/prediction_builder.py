@@ -0,0 +1,291 @@
+"""
+SuperMittos Prediction Builder
+Inferência em lote dos pontos esperados: treina (ou reaproveita) o modelo
+registrado em modelos_predicao, pontua o mercado inteiro da rodada numa
+única passada vetorizada e grava o resultado em predicoes
+
+O otimizador lê as predições prontas; depois que a rodada fecha, valor_real e
+erro_absoluto são preenchidos para acompanhar a precisão do modelo.
+"""
+
+import json
+import logging
+import uuid
+from datetime import date
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "pontuacao_ridge"
+MODEL_TYPE = "pontuacao"
+
+# Mesmas entradas do PointsPredictor, como estão em vw_jogadores_completo
+FEATURES = ("media_pontos", "forma_recente", "consistencia", "prob_titular")
+
+RIDGE_ALPHA = 1.0
+
+# Quantis dos resíduos usados como intervalo da predição
+INTERVAL_QUANTILES = (0.1, 0.9)
+
+# Rodadas finais reservadas para as métricas do modelo (o ajuste final usa todas)
+HOLDOUT_ROUNDS = 3
+
+MIN_TRAINING_ROWS = 200
+
+# Janela da forma recente no treino (últimos jogos antes da rodada)
+FORM_WINDOW = 5
+
+PREDICTION_UPSERT = """
+INSERT INTO predicoes (modelo_id, jogador_id, rodada, valor_predito, confianca, intervalo_min, intervalo_max)
+VALUES (:modelo_id, :jogador_id, :rodada, :valor_predito, :confianca, :intervalo_min, :intervalo_max)
+ON CONFLICT (modelo_id, jogador_id, rodada) DO UPDATE SET
+    valor_predito = EXCLUDED.valor_predito,
+    confianca = EXCLUDED.confianca,
+    intervalo_min = EXCLUDED.intervalo_min,
+    intervalo_max = EXCLUDED.intervalo_max
+"""
+
+class PredictionBuilder:
+    """Treino, registro e inferência em lote do modelo de pontuação"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def run(self, market_round: Optional[int], points_round: int = 0) -> Dict[str, Any]:
+        """Fecha a rodada pontuada (erros) e prediz a rodada do mercado"""
+        stats: Dict[str, Any] = {"errors_backfilled": 0, "model": None, "predictions": 0}
+        if points_round:
+            stats["errors_backfilled"] = self.backfill_errors(points_round)
+
+        if not market_round:
+            logger.warning("Rodada do mercado desconhecida: predições não geradas")
+            return stats
+
+        model = self.load_model()
+        if model is None or model["parametros"].get("rodada_treino", 0) < points_round:
+            model = self.train(points_round) or model
+        if model is None:
+            logger.warning("Sem modelo de pontuação registrado e histórico insuficiente para treinar")
+            return stats
+
+        stats["model"] = model["versao"]
+        stats["predictions"] = self.predict_market(model, market_round)
+        return stats
+
+    def load_model(self) -> Optional[Dict[str, Any]]:
+        """Modelo de pontuação ativo mais recente"""
+        with self.engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT id, versao, parametros FROM modelos_predicao
+                WHERE tipo = :tipo AND ativo = true
+                ORDER BY created_at DESC
+                LIMIT 1
+            """), {"tipo": MODEL_TYPE}).mappings().first()
+
+        if row is None:
+            return None
+        parameters = row["parametros"]
+        return {
+            "id": str(row["id"]),
+            "versao": row["versao"],
+            "parametros": json.loads(parameters) if isinstance(parameters, str) else dict(parameters or {})
+        }
+
+    def train(self, through_round: int) -> Optional[Dict[str, Any]]:
+        """Ajusta uma regressão ridge no histórico e registra a nova versão como ativa"""
+        dataset = self.training_set(through_round)
+        if len(dataset) < MIN_TRAINING_ROWS:
+            logger.warning(f"Histórico insuficiente para treinar: {len(dataset)} linhas")
+            return None
+
+        X = dataset[list(FEATURES)].to_numpy(dtype=float)
+        y = dataset["pontos"].to_numpy(dtype=float)
+
+        # Métricas fora da amostra: últimas rodadas separadas para validação
+        holdout = dataset["rodada"].to_numpy() > dataset["rodada"].max() - HOLDOUT_ROUNDS
+        if holdout.all() or not holdout.any():
+            holdout = np.zeros(len(dataset), dtype=bool)
+            holdout[-max(len(dataset) // 5, 1):] = True
+        validation = _fit_ridge(X[~holdout], y[~holdout])
+        errors = y[holdout] - _predict(validation, X[holdout])
+        mse = float(np.mean(errors ** 2))
+        variance = float(np.var(y[holdout]))
+
+        parameters = _fit_ridge(X, y)
+        residuals = y - _predict(parameters, X)
+        parameters.update({
+            "intervalo": [float(np.quantile(residuals, q)) for q in INTERVAL_QUANTILES],
+            "alpha": RIDGE_ALPHA,
+            "rodada_treino": through_round
+        })
+
+        model = {"id": str(uuid.uuid4()), "versao": f"r{through_round}-{date.today().isoformat()}", "parametros": parameters}
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE modelos_predicao SET ativo = false WHERE tipo = :tipo AND ativo = true"),
+                         {"tipo": MODEL_TYPE})
+            model["id"] = str(conn.execute(text("""
+                INSERT INTO modelos_predicao
+                    (id, nome, versao, tipo, algoritmo, features, parametros, mae, mse, r2_score,
+                     data_treino, dataset_size, ativo)
+                VALUES (:id, :nome, :versao, :tipo, 'ridge_regression', :features, :parametros, :mae, :mse, :r2_score,
+                        :data_treino, :dataset_size, true)
+                ON CONFLICT (nome, versao) DO UPDATE SET
+                    parametros = EXCLUDED.parametros,
+                    mae = EXCLUDED.mae,
+                    mse = EXCLUDED.mse,
+                    r2_score = EXCLUDED.r2_score,
+                    dataset_size = EXCLUDED.dataset_size,
+                    ativo = true
+                RETURNING id
+            """), {
+                "id": model["id"],
+                "nome": MODEL_NAME,
+                "versao": model["versao"],
+                "tipo": MODEL_TYPE,
+                "features": json.dumps(list(FEATURES)),
+                "parametros": json.dumps(parameters),
+                "mae": float(np.mean(np.abs(errors))),
+                "mse": mse,
+                "r2_score": 1 - mse / variance if variance > 0 else None,
+                "data_treino": date.today(),
+                "dataset_size": len(dataset)
+            }).scalar())
+
+        logger.info(f"Modelo {MODEL_NAME} {model['versao']} treinado com {len(dataset)} linhas (MSE {mse:.2f})")
+        return model
+
+    def training_set(self, through_round: int) -> pd.DataFrame:
+        """
+        Uma linha por jogador e rodada disputada, com as features calculadas
+        só com os jogos anteriores (sem vazamento do próprio resultado)
+        """
+        with self.engine.connect() as conn:
+            history = pd.read_sql(text("""
+                SELECT jogador_id, rodada, pontos_cartola as pontos
+                FROM estatisticas_rodada
+                WHERE fonte = 'cartola' AND jogou = true AND rodada <= :rodada
+            """), conn, params={"rodada": through_round})
+            starters = pd.read_sql(text("""
+                SELECT jogador_id, rodada,
+                       SUM(probabilidade_titular * confiabilidade) / NULLIF(SUM(confiabilidade), 0) as prob_titular
+                FROM provaveis_escalacoes
+                WHERE rodada <= :rodada
+                GROUP BY jogador_id, rodada
+            """), conn, params={"rodada": through_round})
+
+        if history.empty:
+            return history
+
+        history["jogador_id"] = history["jogador_id"].astype(str)
+        history["pontos"] = history["pontos"].fillna(0).astype(float)
+        history = history.sort_values(["jogador_id", "rodada"]).reset_index(drop=True)
+
+        grouped = history.groupby("jogador_id")["pontos"]
+        games = grouped.cumcount().to_numpy(dtype=float)
+        total = grouped.cumsum().to_numpy() - history["pontos"].to_numpy()
+        squares = (history["pontos"] ** 2).groupby(history["jogador_id"]).cumsum().to_numpy() - history["pontos"].to_numpy() ** 2
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            history["media_pontos"] = total / games
+            variance = (squares - total ** 2 / games) / (games - 1)
+        history["consistencia"] = np.where(games > 1, np.sqrt(np.maximum(variance, 0)), 0.0)
+        history["forma_recente"] = (
+            grouped.shift()
+            .groupby(history["jogador_id"])
+            .rolling(FORM_WINDOW, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
+
+        starters["jogador_id"] = starters["jogador_id"].astype(str)
+        history = history.merge(starters, on=["jogador_id", "rodada"], how="left")
+        history["prob_titular"] = history["prob_titular"].fillna(50.0)
+
+        # Primeiro jogo de cada jogador não tem histórico para prever
+        return history[games > 0].reset_index(drop=True)
+
+    def predict_market(self, model: Dict[str, Any], round_number: int) -> int:
+        """Pontua todos os jogadores ativos numa passada e grava em predicoes"""
+        with self.engine.connect() as conn:
+            market = pd.read_sql(text(f"""
+                SELECT id, {", ".join(FEATURES)}
+                FROM vw_jogadores_completo
+                WHERE status_ativo = true
+            """), conn)
+
+        if market.empty:
+            return 0
+
+        parameters = model["parametros"]
+        fill = dict(zip(FEATURES, parameters["means"]))
+        X = market[list(FEATURES)].astype(float).fillna(fill).to_numpy()
+        predicted = _predict(parameters, X)
+        low, high = parameters["intervalo"]
+
+        rows = [
+            {
+                "modelo_id": model["id"],
+                "jogador_id": str(player_id),
+                "rodada": round_number,
+                "valor_predito": value,
+                "confianca": 1 - INTERVAL_QUANTILES[0] * 2,
+                "intervalo_min": value + low,
+                "intervalo_max": value + high
+            }
+            for player_id, value in zip(market["id"].tolist(), predicted.tolist())
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(text(PREDICTION_UPSERT), rows)
+
+        logger.info(f"Predições da rodada {round_number}: {len(rows)} jogadores (modelo {model['versao']})")
+        return len(rows)
+
+    def backfill_errors(self, round_number: int) -> int:
+        """Preenche valor_real e erro_absoluto das predições de uma rodada já pontuada"""
+        with self.engine.begin() as conn:
+            result = conn.execute(text("""
+                UPDATE predicoes SET
+                    valor_real = er.pontos_cartola,
+                    erro_absoluto = ABS(er.pontos_cartola - predicoes.valor_predito)
+                FROM estatisticas_rodada er
+                WHERE er.jogador_id = predicoes.jogador_id
+                  AND er.rodada = predicoes.rodada
+                  AND er.fonte = 'cartola'
+                  AND er.jogou = true
+                  AND predicoes.rodada = :rodada
+            """), {"rodada": round_number})
+        return result.rowcount
+
+    def accuracy(self, last_rounds: int = 10) -> pd.DataFrame:
+        """Erro médio absoluto por modelo e rodada, nas últimas rodadas com resultado"""
+        with self.engine.connect() as conn:
+            return pd.read_sql(text("""
+                SELECT m.versao, p.rodada, COUNT(*) as jogadores, AVG(p.erro_absoluto) as mae
+                FROM predicoes p
+                JOIN modelos_predicao m ON m.id = p.modelo_id
+                WHERE p.erro_absoluto IS NOT NULL
+                  AND p.rodada > (SELECT MAX(rodada) FROM predicoes WHERE erro_absoluto IS NOT NULL) - :last_rounds
+                GROUP BY m.versao, p.rodada
+                ORDER BY p.rodada, m.versao
+            """), conn, params={"last_rounds": last_rounds})
+
+def _fit_ridge(X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    """Ridge em features padronizadas (intercepto sem penalidade)"""
+    means = X.mean(axis=0)
+    scales = X.std(axis=0)
+    scales[scales == 0] = 1.0
+    Z = (X - means) / scales
+    coefficients = np.linalg.solve(Z.T @ Z + RIDGE_ALPHA * np.eye(Z.shape[1]), Z.T @ (y - y.mean()))
+    return {
+        "means": means.tolist(),
+        "scales": scales.tolist(),
+        "coef": coefficients.tolist(),
+        "intercept": float(y.mean())
+    }
+
+def _predict(parameters: Dict[str, Any], X: np.ndarray) -> np.ndarray:
+    Z = (X - np.asarray(parameters["means"])) / np.asarray(parameters["scales"])
+    return Z @ np.asarray(parameters["coef"]) + parameters["intercept"]
@@ -0,0 +1,250 @@
+"""
+SuperMittos Prováveis Parser
+Extração estruturada das páginas de prováveis escalações (HTML ou objeto JS)
+Roda em processos separados: não depende do restante do ETL, só devolve registros
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    # Parser em C, bem mais rápido que o BeautifulSoup para páginas grandes
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+# Seletores genéricos dos cards de jogador; SOURCE_SELECTORS ajusta por fonte
+DEFAULT_SELECTORS = {
+    "entry": "[data-atleta], [data-player], .jogador, .atleta, .player",
+    "name": "[data-nome], .nome, .jogador-nome, .player-name, .name",
+    "club": ".clube, .time, .team",
+    "status": "[data-status], .status, .situacao"
+}
+SOURCE_SELECTORS: Dict[str, Dict[str, str]] = {}
+
+# Confiabilidade de cada fonte (0-100), gravada em provaveis_escalacoes
+SOURCE_RELIABILITY = {
+    "ge_cartola": 80.0,
+    "provaveis_cartola": 70.0,
+    "parciais_cartola": 60.0
+}
+DEFAULT_RELIABILITY = 50.0
+
+def _words(*words: str) -> str:
+    """Alternativa de palavras inteiras (sem acento, espaços flexíveis)"""
+    return r"\b(?:" + "|".join(r"\s+".join(word.split()) for word in words) + r")\b"
+
+# Status positivos que, negados ("nao escalado", "nao e titular"), tiram o jogador
+NEGATABLE = ("relacionado", "escalado", "confirmado", "titular", "provavel", "joga", "vai jogar")
+
+# Padrões do status (sem acento), testados em ordem: situações específicas e
+# negações antes das palavras positivas que elas contêm. Valores:
+# (probabilidade de titular, probabilidade de banco, confirmado, lesionado, suspenso)
+STATUS_PATTERNS: List[Tuple[Pattern, Tuple[float, float, bool, bool, bool]]] = [
+    (re.compile(_words("lesionado", "lesao", "departamento medico", "contundido")), (0.0, 0.0, False, True, False)),
+    (re.compile(_words("suspenso", "suspensao", "pendurado cumprindo")), (0.0, 0.0, False, False, True)),
+    (re.compile(r"\bnao\s+(?:(?:e|esta|sera|foi|deve\s+ser)\s+)?" + _words(*NEGATABLE)
+                + "|" + _words("improvavel", "nulo", "vetado", "desfalque")
+                + r"|\bfora\b(?!\s+de\s+casa)"), (0.0, 0.0, False, False, False)),
+    (re.compile(_words("duvida", "incerto")), (50.0, 30.0, False, False, False)),
+    (re.compile(_words("confirmado", "escalado")), (100.0, 0.0, True, False, False)),
+    (re.compile(_words("provavel", "titular")), (80.0, 15.0, False, False, False)),
+    (re.compile(_words("reserva", "banco", "suplente")), (10.0, 80.0, False, False, False))
+]
+
+PERCENT_PATTERN = re.compile(r"(\d{1,3}(?:[.,]\d+)?)\s*%")
+
+# Chaves usadas nos objetos JS das páginas
+JS_NAME_KEYS = ("apelido", "nome", "name", "jogador", "player")
+JS_CLUB_KEYS = ("clube", "clube_nome", "time", "team")
+JS_STATUS_KEYS = ("status", "situacao", "condicao")
+JS_PROBABILITY_KEYS = ("probabilidade_titular", "probabilidade", "prob", "chance")
+
+def parse_page(source: str, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Registros de uma página coletada: nome, clube, probabilidades e situação"""
+    if not page or not page.get("success"):
+        return []
+
+    try:
+        if page.get("data") is not None:
+            entries = _js_entries(page["data"])
+        elif page.get("html"):
+            entries = _html_entries(page["html"], {**DEFAULT_SELECTORS, **SOURCE_SELECTORS.get(source, {})})
+        else:
+            return []
+
+        records = [_record(source, *entry) for entry in entries]
+    except Exception as e:
+        logger.error(f"Erro ao interpretar prováveis de {source}: {e}")
+        return []
+
+    return [record for record in records if record]
+
+def parse_pages(pages: Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]],
+                workers: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Interpreta as páginas de cada fonte em paralelo (um processo por página)
+
+    pages pode ser um iterável de (fonte, página): cada página vai para um
+    worker assim que chega e deixa de ser referenciada aqui, então só as
+    páginas ainda em processamento ficam em memória.
+    """
+    if isinstance(pages, dict):
+        workers = min(workers or os.cpu_count() or 1, len(pages))
+        pages = pages.items()
+    workers = workers or os.cpu_count() or 1
+    items = ((source, page) for source, page in pages if page and page.get("success"))
+
+    if workers <= 1:
+        return {source: parse_page(source, page) for source, page in items}
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    futures = {}
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    except Exception as e:
+        logger.warning(f"Pool de processos indisponível, interpretando em série: {e}")
+        return {source: parse_page(source, page) for source, page in items}
+
+    serial = False
+    with pool:
+        for source, page in items:
+            if not serial:
+                try:
+                    futures[source] = pool.submit(parse_page, source, page)
+                    continue
+                except Exception as e:
+                    # Ambientes sem fork/semáforos: mesmo resultado, em série
+                    logger.warning(f"Pool de processos indisponível, interpretando em série: {e}")
+                    serial = True
+            results[source] = parse_page(source, page)
+
+        for source, future in futures.items():
+            try:
+                results[source] = future.result()
+            except Exception as e:
+                logger.error(f"Erro ao interpretar prováveis de {source}: {e}")
+                results[source] = []
+
+    return results
+
+def _record(source: str,
+            name: Optional[str],
+            club: Optional[str],
+            status: Optional[str],
+            probability: Optional[float]) -> Optional[Dict[str, Any]]:
+    name = (name or "").strip()
+    if not name:
+        return None
+
+    status = (status or "").strip()
+    folded = _fold(status)
+    titular, banco, confirmado, lesionado, suspenso = 0.0, 0.0, False, False, False
+    recognized = False
+
+    for pattern, values in STATUS_PATTERNS:
+        if pattern.search(folded):
+            titular, banco, confirmado, lesionado, suspenso = values
+            recognized = True
+            break
+
+    # Percentual explícito prevalece sobre a palavra-chave
+    if probability is None:
+        percent = PERCENT_PATTERN.search(status)
+        probability = float(percent.group(1).replace(",", ".")) if percent else None
+    if probability is not None:
+        titular = probability * 100 if 0 < probability <= 1 else probability
+        recognized = True
+
+    if not recognized:
+        return None
+
+    return {
+        "fonte": source,
+        "name": name,
+        "club": (club or "").strip() or None,
+        "probabilidade_titular": round(min(max(titular, 0.0), 100.0), 2),
+        "probabilidade_banco": banco,
+        "confirmado": confirmado,
+        "lesionado": lesionado,
+        "suspenso": suspenso,
+        "observacoes": status[:200] or None,
+        "confiabilidade": SOURCE_RELIABILITY.get(source, DEFAULT_RELIABILITY)
+    }
+
+def _html_entries(html: str, selectors: Dict[str, str]) -> Iterator[Tuple]:
+    """(nome, clube, status, probabilidade) de cada card de jogador"""
+    if HTMLParser is not None:
+        for node in HTMLParser(html).css(selectors["entry"]):
+            attrs = node.attributes
+            name = attrs.get("data-nome") or attrs.get("data-name") or _css_text(node, selectors["name"])
+            status = attrs.get("data-status") or _css_text(node, selectors["status"]) or node.text(separator=" ")
+            yield (
+                name,
+                attrs.get("data-clube") or _css_text(node, selectors["club"]),
+                status,
+                _number(attrs.get("data-probabilidade"))
+            )
+        return
+
+    for element in BeautifulSoup(html, "html.parser").select(selectors["entry"]):
+        name = element.get("data-nome") or element.get("data-name") or _soup_text(element, selectors["name"])
+        status = element.get("data-status") or _soup_text(element, selectors["status"]) or element.get_text(" ")
+        yield (
+            name,
+            element.get("data-clube") or _soup_text(element, selectors["club"]),
+            status,
+            _number(element.get("data-probabilidade"))
+        )
+
+def _css_text(node, selector: str) -> Optional[str]:
+    found = node.css_first(selector)
+    if found is None:
+        return None
+    return found.attributes.get("data-nome") or found.text(separator=" ", strip=True)
+
+def _soup_text(element, selector: str) -> Optional[str]:
+    found = element.select_one(selector)
+    if found is None:
+        return None
+    return found.get("data-nome") or found.get_text(" ", strip=True)
+
+def _js_entries(data: Any) -> Iterator[Tuple]:
+    """Percorre o objeto JS procurando registros de jogador"""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            name = next((item[k] for k in JS_NAME_KEYS if isinstance(item.get(k), str)), None)
+            if name:
+                club = next((item[k] for k in JS_CLUB_KEYS if item.get(k) is not None), None)
+                if isinstance(club, dict):
+                    club = club.get("nome") or club.get("name")
+                status = next((str(item[k]) for k in JS_STATUS_KEYS if item.get(k) is not None), None)
+                probability = next((_number(item[k]) for k in JS_PROBABILITY_KEYS if item.get(k) is not None), None)
+                yield name, club if isinstance(club, str) else None, status, probability
+            else:
+                stack.extend(reversed(list(item.values())))
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(str(value).replace("%", "").replace(",", ".").strip())
+    except ValueError:
+        return None
+
+def _fold(text: str) -> str:
+    """Minúsculas sem acento, para comparar com as palavras-chave"""
+    folded = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8")
+    return folded.lower()
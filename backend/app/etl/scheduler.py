@@ -0,0 +1,274 @@
+"""
+SuperMittos ETL Scheduler
+Agenda os sub-pipelines do ETL a partir do status do mercado do Cartola
+
+O status (/mercado/status) é barato e é a única coisa consultada a cada ciclo;
+ele decide o que vale rodar:
+- mercado aberto: preços (só Cartola) e prováveis, cada um no seu intervalo,
+  e a consolidação completa uma única vez quando uma rodada acaba de fechar
+- mercado fechado (jogos): parciais em intervalo curto
+- atualização/manutenção/fim de temporada: nada, só volta a consultar depois
+- em qualquer status: a retenção das partições, uma vez por intervalo
+
+Execuções nunca se sobrepõem (um lock compartilhado com o disparo manual) e
+cada job tem uma chave de deduplicação registrada em etl_execucoes, então uma
+janela já coberta não roda de novo, nem depois de reiniciar a API.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from etl.normalized_loader import MARKET_OPEN, points_round
+
+logger = logging.getLogger(__name__)
+
+# Demais valores de status_mercado do Cartola
+MARKET_CLOSED = 2
+MARKET_UPDATING = 3
+MARKET_MAINTENANCE = 4
+SEASON_OVER = 6
+
+# Sub-pipelines: nome -> chamada no SuperMittosETL ("completo" é o disparo manual)
+JOBS: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "completo": lambda etl: etl.run_full_etl(),
+    "consolidacao": lambda etl: etl.run_full_etl(),
+    "precos": lambda etl: etl.run_full_etl(sources=("cartola",)),
+    "provaveis": lambda etl: etl.run_provaveis(),
+    "parciais": lambda etl: etl.run_partials(),
+    "retencao": lambda etl: etl.run_retention()
+}
+
+@dataclass
+class SchedulerConfig:
+    """Intervalos (segundos) do agendador"""
+    poll_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_POLL", 300)))
+    idle_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_IDLE", 1800)))
+    precos_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_PRECOS", 1800)))
+    provaveis_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_PROVAVEIS", 3600)))
+    parciais_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_PARCIAIS", 60)))
+    retencao_interval: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_RETENCAO", 86400)))
+    max_backoff: float = field(default_factory=lambda: float(os.getenv("ETL_SCHEDULER_MAX_BACKOFF", 3600)))
+
+def plan_jobs(market_status: Dict[str, Any],
+              completed: Dict[str, str],
+              config: SchedulerConfig,
+              now: float) -> Tuple[List[Tuple[str, str, Dict[str, str]]], float]:
+    """
+    Jobs a rodar para o status do mercado e quanto esperar até a próxima consulta
+
+    Cada job vem como (job, chave de deduplicação, chaves que ele também
+    cobre). A chave dos jobs periódicos é a janela de tempo do intervalo; um
+    job cuja chave já está em completed não entra no plano.
+    """
+    status = market_status.get("status_mercado")
+    season = market_status.get("temporada")
+    market_round = market_status.get("rodada_atual")
+    planned: List[Tuple[str, str, Dict[str, str]]] = []
+
+    def periodic(interval: float) -> str:
+        return f"{season}:{market_round}:{int(now // interval)}"
+
+    if status == MARKET_OPEN and market_round:
+        # Rodada recém-encerrada: uma consolidação completa, que já cobre os preços
+        scored = points_round(market_status)
+        prices_key = periodic(config.precos_interval)
+        if scored and completed.get("consolidacao") != f"{season}:{scored}":
+            planned.append(("consolidacao", f"{season}:{scored}", {"precos": prices_key}))
+        else:
+            planned.append(("precos", prices_key, {}))
+        planned.append(("provaveis", periodic(config.provaveis_interval), {}))
+        delay = config.poll_interval
+    elif status == MARKET_CLOSED and market_round:
+        planned.append(("parciais", periodic(config.parciais_interval), {}))
+        delay = config.parciais_interval
+    else:
+        delay = config.idle_interval
+
+    # Retenção das partições (snapshots do merge, sugestões antigas, virada de temporada)
+    if season:
+        planned.append(("retencao", periodic(config.retencao_interval), {}))
+
+    return [entry for entry in planned if completed.get(entry[0]) != entry[1]], delay
+
+def succeeded(result: Dict[str, Any]) -> bool:
+    """Job concluído e, quando grava no banco, gravado de fato"""
+    return bool(result.get("success")) and result.get("database_saved", True) is not False
+
+class ETLScheduler:
+    """
+    Laço em thread própria: consulta o status, roda os jobs do plano em série
+    e dorme até o próximo ciclo, com backoff exponencial em caso de erro
+    """
+
+    def __init__(self,
+                 etl_factory: Callable[[], Any],
+                 config: Optional[SchedulerConfig] = None,
+                 on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.etl_factory = etl_factory
+        self.config = config or SchedulerConfig()
+        self.on_result = on_result
+        self.completed: Dict[str, str] = {}
+        self.running_job: Optional[str] = None
+        self.last_status: Dict[str, Any] = {}
+        self.last_poll: Optional[datetime] = None
+        self.next_poll: Optional[datetime] = None
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._etl = None
+        self._loaded = False
+
+    @property
+    def etl(self):
+        if self._etl is None:
+            self._etl = self.etl_factory()
+        return self._etl
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="etl-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Agendador do ETL iniciado")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run(self, job: str, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Roda um job agora, se nenhum outro estiver rodando (None se ocupado)
+
+        Usado pelo laço e pelo disparo manual; o resultado vai para on_result.
+        """
+        if not self._lock.acquire(blocking=False):
+            logger.info(f"Job {job} ignorado: outro job do ETL em execução ({self.running_job})")
+            return None
+
+        self.running_job = job
+        started = datetime.now()
+        try:
+            try:
+                result = JOBS[job](self.etl)
+            except Exception as e:
+                logger.error(f"Erro no job {job} do ETL: {e}")
+                result = {"success": False, "error": str(e)}
+
+            if succeeded(result) and key:
+                self.completed[job] = key
+            self._log_execution(job, key, started, result)
+        finally:
+            self.running_job = None
+            self._lock.release()
+
+        if self.on_result:
+            try:
+                self.on_result(job, result)
+            except Exception as e:
+                logger.warning(f"Erro ao publicar o resultado do job {job}: {e}")
+        return result
+
+    def tick(self) -> float:
+        """Um ciclo: status, plano e execução; retorna a espera até o próximo"""
+        if not self._loaded:
+            self._load_completed()
+
+        market_status = self.etl.cartola.get_market_status()
+        self.last_poll = datetime.now()
+        if not market_status:
+            return self._backoff("status do mercado indisponível")
+        self.last_status = market_status
+
+        planned, delay = plan_jobs(market_status, self.completed, self.config, time.time())
+        for job, key, covered in planned:
+            if self._stop.is_set():
+                break
+            result = self.run(job, key)
+            if result is not None and not succeeded(result):
+                return self._backoff(f"job {job} falhou")
+            if result is not None:
+                self.completed.update(covered)
+
+        self.failures = 0
+        return delay
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "running_job": self.running_job,
+            "market_status": self.last_status.get("status_mercado"),
+            "rodada_atual": self.last_status.get("rodada_atual"),
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+            "next_poll": self.next_poll.isoformat() if self.next_poll else None,
+            "consecutive_failures": self.failures,
+            "completed": dict(self.completed)
+        }
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.tick()
+            except Exception as e:
+                logger.error(f"Erro no agendador do ETL: {e}")
+                delay = self._backoff(str(e))
+            self.next_poll = datetime.fromtimestamp(time.time() + delay)
+            self._stop.wait(delay)
+
+    def _backoff(self, reason: str) -> float:
+        self.failures += 1
+        delay = min(self.config.poll_interval * 2 ** (self.failures - 1), self.config.max_backoff)
+        logger.warning(f"Agendador do ETL: {reason}; nova tentativa em {delay:.0f}s")
+        return delay
+
+    def _load_completed(self):
+        """Última chave concluída de cada job, registrada em etl_execucoes"""
+        self._loaded = True
+        try:
+            with self.etl.engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT tipo_execucao, metricas FROM etl_execucoes
+                    WHERE status = 'success' AND tipo_execucao IN :jobs
+                    ORDER BY inicio
+                """).bindparams(bindparam("jobs", expanding=True)), {"jobs": list(JOBS)})
+                for job, metrics in rows:
+                    metrics = json.loads(metrics) if isinstance(metrics, str) else (metrics or {})
+                    if metrics.get("chave"):
+                        self.completed[job] = metrics["chave"]
+        except Exception as e:
+            logger.warning(f"Histórico de execuções do ETL indisponível: {e}")
+
+    def _log_execution(self, job: str, key: Optional[str], started: datetime, result: Dict[str, Any]):
+        try:
+            with self.etl.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO etl_execucoes
+                        (tipo_execucao, inicio, fim, status, registros_processados, fontes_consultadas, erros, metricas)
+                    VALUES (:tipo, :inicio, :fim, :status, :processados, :fontes, :erros, :metricas)
+                """), {
+                    "tipo": job,
+                    "inicio": started,
+                    "fim": datetime.now(),
+                    "status": "success" if succeeded(result) else "error",
+                    "processados": result.get("players_processed") or result.get("players_scored") or 0,
+                    "fontes": json.dumps(result.get("sources_collected") or {}),
+                    "erros": json.dumps([result["error"]]) if result.get("error") else None,
+                    "metricas": json.dumps({"chave": key, "duracao": (datetime.now() - started).total_seconds()})
+                })
+        except Exception as e:
+            logger.warning(f"Erro ao registrar execução do job {job}: {e}")
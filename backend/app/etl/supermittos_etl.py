@@ -7,15 +7,32 @@ import requests
 import time
 import json
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from rapidfuzz import fuzz
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any
+from rapidfuzz import fuzz, process
 import unicodedata
 import re
 from sqlalchemy import create_engine, text
 from playwright.sync_api import sync_playwright
 import os
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
+
+if not __package__:
+    # Execução direta (python etl/supermittos_etl.py): backend/app no path dos imports absolutos
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl.fixture_store import FixtureRecording, FixtureStore
+from etl.feature_builder import FeatureBuilder
+from etl.normalized_loader import MARKET_OPEN, NormalizedLoader, club_home_map, extract_stats, points_round
+from etl.partition_manager import PartitionManager, ensure_snapshot_partitions
+from etl.prediction_builder import PredictionBuilder
+from etl.provaveis_parser import parse_pages
+
+# Fontes do pipeline; o Cartola é a base do merge e sempre é coletado
+ETL_SOURCES = ('footystats', 'sofascore', 'provaveis', 'cartola')
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -31,9 +48,19 @@ class ConfigETL:
     sofascore_api_base: str = "https://api.sofascore.com/api/v1"
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
+    # Gravação/reprodução offline das respostas das fontes ("record", "replay" ou vazio)
+    fixture_mode: str = os.getenv("ETL_FIXTURE_MODE", "")
+    fixture_dir: str = os.getenv(
+        "ETL_FIXTURE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks", "fixtures")
+    )
+    fixture_recording: str = os.getenv("ETL_FIXTURE_RECORDING", "")
+    
     # URLs dos sites de prováveis/parciais
     provaveis_urls: Dict[str, str] = None
     
+    # Processos usados para interpretar as páginas de prováveis (0 = um por página)
+    provaveis_workers: int = int(os.getenv("ETL_PROVAVEIS_WORKERS", "0"))
+
     def __post_init__(self):
         if self.provaveis_urls is None:
             self.provaveis_urls = {
@@ -89,12 +116,76 @@ class DataNormalizer:
         
         return best_match
 
+@dataclass
+class CandidateIndex:
+    """
+    Candidatos de uma fonte para o matching
+    
+    Guarda só a referência (id na fonte), o nome e o nome normalizado; o
+    registro completo é descartado junto com o payload após o parse.
+    """
+    source: str
+    refs: List[Any]
+    names: List[str]
+    normalized: List[str]
+    stats: Dict[Any, Dict] = field(default_factory=dict)  # ref -> estatísticas compactas (with_stats)
+    
+    @classmethod
+    def from_records(cls,
+                     source: str,
+                     records: Iterable[Dict],
+                     name_field: str = 'name',
+                     with_stats: bool = False) -> "CandidateIndex":
+        index = cls(source, [], [], [])
+        for position, record in enumerate(records):
+            if not isinstance(record, dict):
+                continue
+            name = record.get(name_field) or ''
+            normalized = DataNormalizer.normalize_name(name)
+            if normalized:  # Nome vazio nunca atinge o limiar
+                ref = record.get('id', position)
+                index.refs.append(ref)
+                index.names.append(name)
+                index.normalized.append(normalized)
+                
+                record_stats = extract_stats(source, record) if with_stats else None
+                if record_stats:
+                    index.stats[ref] = record_stats
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.refs)
+    
+    def match(self, name: str, threshold: float = 85.0) -> Optional[Dict]:
+        """Melhor candidato acima do limiar, como referência (mesmo critério de find_best_match)"""
+        normalized = DataNormalizer.normalize_name(name)
+        if not normalized or not self.normalized:
+            return None
+        
+        best = process.extractOne(
+            normalized, self.normalized, scorer=fuzz.token_sort_ratio, processor=None, score_cutoff=threshold
+        )
+        if best is None:
+            return None
+        
+        _, score, position = best
+        return {
+            'source': self.source,
+            'ref': self.refs[position],
+            'name': self.names[position],
+            'confidence': score
+        }
+
+def create_session(fixtures: Optional[FixtureRecording] = None) -> requests.Session:
+    """Sessão HTTP dos clientes (gravando ou reproduzindo fixtures, se configurado)"""
+    return fixtures.session() if fixtures else requests.Session()
+
 class CartolaETL:
     """ETL para dados do Cartola FC"""
     
-    def __init__(self, config: ConfigETL):
+    def __init__(self, config: ConfigETL, fixtures: Optional[FixtureRecording] = None):
         self.config = config
-        self.session = requests.Session()
+        self.session = create_session(fixtures)
         self.session.headers.update({'User-Agent': config.user_agent})
     
     def get_market_status(self) -> Dict:
@@ -144,13 +235,28 @@ class CartolaETL:
         except Exception as e:
             logger.error(f"Erro ao obter clubes do Cartola: {e}")
             return {}
+    
+    def get_matches(self, round_id: int = None) -> Dict:
+        """Obtém as partidas da rodada (mandante/visitante de cada clube)"""
+        try:
+            if round_id:
+                url = f"{self.config.cartola_api_base}/partidas/{round_id}"
+            else:
+                url = f"{self.config.cartola_api_base}/partidas"
+            
+            response = self.session.get(url, timeout=15)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"Erro ao obter partidas do Cartola: {e}")
+            return {}
 
 class FootyStatsETL:
     """ETL para dados do FootyStats"""
     
-    def __init__(self, config: ConfigETL):
+    def __init__(self, config: ConfigETL, fixtures: Optional[FixtureRecording] = None):
         self.config = config
-        self.session = requests.Session()
+        self.session = create_session(fixtures)
     
     def get_league_players(self, league_id: int = 71) -> Dict:  # 71 = Brasileirão
         """Obtém dados dos jogadores de uma liga"""
@@ -194,9 +300,9 @@ class FootyStatsETL:
 class SofaScoreETL:
     """ETL para dados do SofaScore (não-oficial)"""
     
-    def __init__(self, config: ConfigETL):
+    def __init__(self, config: ConfigETL, fixtures: Optional[FixtureRecording] = None):
         self.config = config
-        self.session = requests.Session()
+        self.session = create_session(fixtures)
         self.session.headers.update({
             'User-Agent': config.user_agent,
             'Accept': 'application/json',
@@ -222,10 +328,22 @@ class SofaScoreETL:
 class ProvaveisETL:
     """ETL para sites de prováveis escalações usando Playwright"""
     
-    def __init__(self, config: ConfigETL):
+    def __init__(self, config: ConfigETL, fixtures: Optional[FixtureRecording] = None):
         self.config = config
+        self.fixtures = fixtures
     
     def scrape_provaveis_with_playwright(self, url: str) -> Dict:
+        """Faz scraping de prováveis escalações (ou reproduz o resultado gravado)"""
+        if self.fixtures and self.fixtures.replaying:
+            payload = self.fixtures.load_payload("playwright", url)
+            return payload if payload is not None else {'success': False, 'error': f'Página não gravada: {url}'}
+        
+        result = self._scrape_with_playwright(url)
+        if self.fixtures:
+            self.fixtures.save_payload("playwright", url, result)
+        return result
+    
+    def _scrape_with_playwright(self, url: str) -> Dict:
         """Faz scraping de prováveis escalações usando Playwright"""
         try:
             with sync_playwright() as p:
@@ -280,16 +398,17 @@ class ProvaveisETL:
             logger.error(f"Erro no scraping com Playwright: {e}")
             return {'success': False, 'error': str(e)}
     
-    def get_all_provaveis(self) -> Dict:
-        """Obtém prováveis de todas as fontes configuradas"""
-        results = {}
-        
+    def iter_provaveis(self) -> Iterator[tuple]:
+        """Prováveis de cada fonte configurada, uma página por vez"""
         for source, url in self.config.provaveis_urls.items():
             logger.info(f"Coletando prováveis de {source}")
-            results[source] = self.scrape_provaveis_with_playwright(url)
-            time.sleep(2)  # Rate limiting
-        
-        return results
+            yield source, self.scrape_provaveis_with_playwright(url)
+            if not (self.fixtures and self.fixtures.replaying):
+                time.sleep(2)  # Rate limiting
+    
+    def get_all_provaveis(self) -> Dict:
+        """Obtém prováveis de todas as fontes configuradas"""
+        return dict(self.iter_provaveis())
 
 class SuperMittosETL:
     """Classe principal do ETL que orquestra todas as coletas"""
@@ -298,17 +417,31 @@ class SuperMittosETL:
         self.config = config or ConfigETL()
         self.engine = create_engine(self.config.database_url, echo=False)
         
+        # Fixtures offline: todas as fontes gravam/reproduzem na mesma gravação
+        self.fixtures = None
+        if self.config.fixture_mode:
+            self.fixtures = FixtureStore(self.config.fixture_dir).recording(
+                self.config.fixture_recording or None, self.config.fixture_mode
+            )
+            logger.info(f"Fixtures do ETL: modo {self.fixtures.mode}, gravação {self.fixtures.name}")
+        
         # Inicializa ETLs específicos
-        self.cartola = CartolaETL(self.config)
-        self.footystats = FootyStatsETL(self.config)
-        self.sofascore = SofaScoreETL(self.config)
-        self.provaveis = ProvaveisETL(self.config)
+        self.cartola = CartolaETL(self.config, self.fixtures)
+        self.footystats = FootyStatsETL(self.config, self.fixtures)
+        self.sofascore = SofaScoreETL(self.config, self.fixtures)
+        self.provaveis = ProvaveisETL(self.config, self.fixtures)
         
         # Normalizer para matching
         self.normalizer = DataNormalizer()
+        
+        # Partições por rodada/dia e retenção (run_retention)
+        self.partitions = PartitionManager(self.engine)
+        
+        # Últimas parciais coletadas (run_partials)
+        self.latest_partials: Optional[Dict[str, Any]] = None
     
     def collect_all_data(self) -> Dict[str, Any]:
-        """Coleta dados de todas as fontes"""
+        """Coleta dados de todas as fontes (payloads completos; o ETL usa run_pipeline)"""
         logger.info("Iniciando coleta de dados de todas as fontes")
         
         results = {
@@ -346,137 +479,440 @@ class SuperMittosETL:
         
         return results
     
-    def merge_player_data(self, collected_data: Dict) -> List[Dict]:
-        """Faz merge dos dados dos jogadores de todas as fontes"""
-        logger.info("Iniciando merge dos dados dos jogadores")
+    def run_pipeline(self,
+                     write: bool = True,
+                     chunk_size: int = 500,
+                     sources: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        ETL em estágios com memória limitada: fetch → parse → match → write
         
-        merged_players = []
+        Cada payload bruto é liberado logo após o parse: as fontes de matching
+        viram CandidateIndex e os jogadores do Cartola passam pelo matching e
+        pela escrita em chunks de chunk_size, sem montar a lista completa.
+        sources limita as fontes coletadas (padrão: ETL_SOURCES).
+        """
+        selected = set(sources or ETL_SOURCES)
+        stats = {
+            'players_processed': 0,
+            'database_saved': False,
+            'provaveis_saved': 0,
+            'normalized_tables': {},
+            'features_updated': {},
+            'predictions': {},
+            'sources_collected': {},
+            'stages': {'fetch': 0.0, 'parse': 0.0, 'match': 0.0, 'write': 0.0}
+        }
+        stages = stats['stages']
+        sources = stats['sources_collected']
+        
+        # Fontes de matching: só referência e nome sobrevivem ao parse
+        logger.info("Coletando candidatos do FootyStats e do SofaScore")
+        candidates = []
+        for source, fetch, list_key in (
+            ('footystats', self.footystats.get_league_players, 'data'),
+            ('sofascore', self.sofascore.get_tournament_players, 'players')
+        ):
+            if source not in selected:
+                continue
+            with self._stage(stages, 'fetch'):
+                payload = fetch()
+            with self._stage(stages, 'parse'):
+                candidates.append(CandidateIndex.from_records(source, payload.get(list_key, []), with_stats=write))
+            sources[source] = bool(payload)
+            del payload
+        
+        # Cartola FC: o status define a rodada das prováveis
+        logger.info("Coletando dados do Cartola FC")
+        with self._stage(stages, 'fetch'):
+            market_status = self.cartola.get_market_status()
+            # Parciais só existem com o mercado fechado
+            partials = self.cartola.get_partial_scores() if market_status.get('status_mercado') != MARKET_OPEN else {}
+            status = [market_status, partials, self.cartola.get_clubs()]
+            # Mando de campo da rodada pontuada, para as janelas casa/fora
+            matches = self.cartola.get_matches(points_round(market_status)) if write else {}
+        sources['cartola'] = any(status)
+        del status
+        
+        if 'provaveis' in selected:
+            self._collect_provaveis(market_status, stats, write)
+        
+        # Cartola FC: base do merge, consumida em chunks
+        with self._stage(stages, 'fetch'):
+            payload = self.cartola.get_players()
+        sources['cartola'] = sources['cartola'] or bool(payload)
         
-        # Base: jogadores do Cartola
-        cartola_players = collected_data['cartola'].get('players', {}).get('atletas', [])
-        if not cartola_players:
+        chunks = self._match_chunks(self.iter_cartola_players(payload), candidates, chunk_size, stats)
+        del payload
+        
+        if write:
+            # Partições da rodada antes da transação de escrita (virada de temporada fora dela)
+            try:
+                with self._stage(stages, 'write'):
+                    self.partitions.prepare(market_status)
+            except Exception as e:
+                logger.error(f"Erro ao preparar as partições da rodada: {e}")
+            
+            # Fan-out para as tabelas normalizadas na mesma transação do players_merged
+            loader = NormalizedLoader(
+                market_status,
+                {index.source: index.stats for index in candidates},
+                club_home_map(matches)
+            )
+            try:
+                self._write_chunks(chunks, stages, loader)
+                stats['database_saved'] = True
+                stats['normalized_tables'] = loader.counts
+            except Exception as e:
+                logger.error(f"Erro ao salvar no banco: {e}")
+            
+            # Features históricas: só as rodadas novas, só os jogadores que jogaram
+            if stats['database_saved']:
+                try:
+                    with self._stage(stages, 'write'):
+                        stats['features_updated'] = FeatureBuilder(self.engine).update()
+                except Exception as e:
+                    logger.error(f"Erro ao atualizar features históricas: {e}")
+                
+                # Predições em lote da rodada do mercado (lidas pelo otimizador)
+                try:
+                    with self._stage(stages, 'write'):
+                        stats['predictions'] = PredictionBuilder(self.engine).run(
+                            market_status.get('rodada_atual'), points_round(market_status)
+                        )
+                except Exception as e:
+                    logger.error(f"Erro ao gerar predições: {e}")
+        else:
+            for _ in chunks:
+                pass
+        
+        if not stats['players_processed']:
             logger.warning("Nenhum jogador encontrado no Cartola")
-            return merged_players
+        logger.info(f"Pipeline concluído: {stats['players_processed']} jogadores processados")
+        return stats
+    
+    def run_provaveis(self, write: bool = True) -> Dict[str, Any]:
+        """Só as prováveis escalações da rodada do mercado (sem o merge dos jogadores)"""
+        stats = {'provaveis_saved': 0, 'sources_collected': {}, 'stages': {'fetch': 0.0, 'parse': 0.0, 'write': 0.0}}
+        with self._stage(stats['stages'], 'fetch'):
+            market_status = self.cartola.get_market_status()
+        stats['sources_collected']['cartola'] = bool(market_status)
+        
+        self._collect_provaveis(market_status, stats, write)
+        stats['success'] = stats['sources_collected']['provaveis']
+        return stats
+    
+    def run_partials(self, round_id: int = None) -> Dict[str, Any]:
+        """
+        Coleta as parciais da rodada em andamento e guarda em latest_partials
+        
+        Sem parciais (jogos ainda não começaram) não é falha. changed indica se
+        a pontuação mudou desde a última coleta, para quem consome as parciais
+        não republicar dados repetidos.
+        """
+        payload = self.cartola.get_partial_scores(round_id)
+        scores = {
+            str(player_id): athlete.get('pontuacao')
+            for player_id, athlete in (payload.get('atletas') or {}).items()
+            if isinstance(athlete, dict)
+        }
+        previous = self.latest_partials or {}
+        changed = bool(scores) and (scores != previous.get('scores') or payload.get('rodada') != previous.get('rodada'))
         
-        # FootyStats players
-        footystats_players = collected_data['footystats'].get('players', {}).get('data', [])
+        if scores:
+            self.latest_partials = {
+                'rodada': payload.get('rodada'),
+                'scores': scores,
+                'payload': payload,
+                'fetched_at': datetime.now().isoformat()
+            }
         
-        # SofaScore players  
-        sofascore_players = collected_data['sofascore'].get('players', {}).get('players', [])
+        return {'success': True, 'rodada': payload.get('rodada'), 'players_scored': len(scores), 'changed': changed}
+    
+    def run_retention(self) -> Dict[str, Any]:
+        """Retenção por partição: snapshots, sugestões antigas e arquivos de temporadas passadas"""
+        market_status = self.cartola.get_market_status()
+        if not market_status:
+            return {'success': False, 'error': 'status do mercado indisponível'}
+        return self.partitions.run_retention(market_status)
+    
+    def _collect_provaveis(self, market_status: Dict, stats: Dict[str, Any], write: bool):
+        """Prováveis: páginas interpretadas em paralelo e descartadas em seguida"""
+        stages = stats['stages']
+        logger.info("Coletando prováveis escalações")
+        collected = False
         
-        for cartola_player in cartola_players:
+        def fetched_pages() -> Iterator[tuple]:
+            nonlocal collected
+            pages = self.provaveis.iter_provaveis()
+            while True:
+                with self._stage(stages, 'fetch'):
+                    item = next(pages, None)
+                if item is None:
+                    return
+                collected = collected or bool(item[1] and item[1].get('success'))
+                yield item
+        
+        # Cada página vai para o parser assim que chega; a coleta das próximas
+        # roda enquanto as anteriores são interpretadas
+        workers = min(self.config.provaveis_workers or os.cpu_count() or 1, len(self.config.provaveis_urls))
+        fetch_before, start = stages['fetch'], time.perf_counter()
+        parsed = parse_pages(fetched_pages(), workers)
+        stages['parse'] += time.perf_counter() - start - (stages['fetch'] - fetch_before)
+        stats['sources_collected']['provaveis'] = collected
+        
+        if write:
+            try:
+                stats['provaveis_saved'] = self.save_provaveis(parsed, market_status.get('rodada_atual'), stages)
+            except Exception as e:
+                logger.error(f"Erro ao salvar prováveis: {e}")
+    
+    @staticmethod
+    def iter_cartola_players(players_payload: Dict) -> Iterator[Dict]:
+        """Parse dos atletas do mercado do Cartola, um registro por vez"""
+        for cartola_player in (players_payload or {}).get('atletas', []):
             if not isinstance(cartola_player, dict):
                 continue
-                
-            player_data = {
+            
+            name = cartola_player.get('nome', cartola_player.get('apelido', ''))
+            yield {
                 'source_id': 'cartola',
                 'cartola_id': cartola_player.get('atleta_id'),
-                'name': cartola_player.get('nome', cartola_player.get('apelido', '')),
+                'name': name,
+                'normalized_name': DataNormalizer.normalize_name(name),
+                'nickname': cartola_player.get('apelido'),
+                'normalized_nickname': DataNormalizer.normalize_name(cartola_player.get('apelido')),
                 'club_id': cartola_player.get('clube_id'),
                 'position': cartola_player.get('posicao_id'),
                 'price': cartola_player.get('preco_num'),
+                'price_variation': cartola_player.get('variacao_num'),
+                'points': cartola_player.get('pontos_num'),
                 'avg_score': cartola_player.get('media_num'),
+                'games': cartola_player.get('jogos_num'),
+                'scout': cartola_player.get('scout'),
                 'status': cartola_player.get('status_id'),
-                'matches': []  # Para armazenar matches de outras fontes
+                'matches': []  # Referências aos candidatos das outras fontes
             }
+    
+    def _match_chunks(self,
+                      players: Iterator[Dict],
+                      candidates: List[CandidateIndex],
+                      chunk_size: int,
+                      stats: Dict[str, Any]) -> Iterator[List[Dict]]:
+        """Matching dos jogadores contra cada fonte, chunk a chunk"""
+        stages = stats['stages']
+        while True:
+            with self._stage(stages, 'parse'):
+                chunk = list(islice(players, chunk_size))
+            if not chunk:
+                return
             
-            # Busca match no FootyStats
-            if footystats_players:
-                footystats_match = self.normalizer.find_best_match(
-                    player_data['name'], 
-                    footystats_players,
-                    'name'
-                )
-                if footystats_match:
-                    player_data['matches'].append({
-                        'source': 'footystats',
-                        'data': footystats_match,
-                        'confidence': footystats_match.get('_match_score', 0)
-                    })
-            
-            # Busca match no SofaScore
-            if sofascore_players:
-                sofascore_match = self.normalizer.find_best_match(
-                    player_data['name'],
-                    sofascore_players,
-                    'name'
-                )
-                if sofascore_match:
-                    player_data['matches'].append({
-                        'source': 'sofascore', 
-                        'data': sofascore_match,
-                        'confidence': sofascore_match.get('_match_score', 0)
-                    })
+            with self._stage(stages, 'match'):
+                for player in chunk:
+                    for index in candidates:
+                        match = index.match(player['name'])
+                        if match:
+                            player['matches'].append(match)
             
-            merged_players.append(player_data)
+            stats['players_processed'] += len(chunk)
+            yield chunk
+    
+    def merge_player_data(self, collected_data: Dict) -> List[Dict]:
+        """Faz merge dos dados dos jogadores de todas as fontes (payloads já coletados)"""
+        logger.info("Iniciando merge dos dados dos jogadores")
+        
+        candidates = [
+            CandidateIndex.from_records('footystats', collected_data['footystats'].get('players', {}).get('data', [])),
+            CandidateIndex.from_records('sofascore', collected_data['sofascore'].get('players', {}).get('players', []))
+        ]
+        players = self.iter_cartola_players(collected_data['cartola'].get('players', {}))
+        stats = {'players_processed': 0, 'stages': {'parse': 0.0, 'match': 0.0}}
         
+        merged_players = [
+            player
+            for chunk in self._match_chunks(players, candidates, 500, stats)
+            for player in chunk
+        ]
+        
+        if not merged_players:
+            logger.warning("Nenhum jogador encontrado no Cartola")
         logger.info(f"Merge concluído: {len(merged_players)} jogadores processados")
         return merged_players
     
     def save_to_database(self, merged_data: List[Dict]) -> bool:
         """Salva os dados mergidos no banco de dados"""
         try:
+            self._write_chunks([merged_data], {'write': 0.0})
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar no banco: {e}")
+            return False
+    
+    def save_provaveis(self,
+                       parsed: Dict[str, List[Dict]],
+                       round_number: Optional[int],
+                       stages: Dict[str, float]) -> int:
+        """
+        Associa as prováveis interpretadas aos jogadores e grava em provaveis_escalacoes
+        
+        Os nomes passam pelo mesmo matcher do merge (apelido, depois nome
+        completo); cada (jogador_id, rodada, fonte) é inserido ou atualizado.
+        """
+        if not round_number:
+            logger.warning("Rodada atual desconhecida: prováveis não foram gravadas")
+            return 0
+        if not any(parsed.values()):
+            return 0
+        
+        with self._stage(stages, 'match'):
             with self.engine.connect() as conn:
-                # Cria tabela se não existir
+                players = [
+                    dict(row._mapping) for row in
+                    conn.execute(text("SELECT id, nome, apelido FROM jogadores WHERE status_ativo = true"))
+                ]
+            indexes = [
+                CandidateIndex.from_records('jogadores', players, 'apelido'),
+                CandidateIndex.from_records('jogadores', players, 'nome')
+            ]
+            del players
+            
+            rows = {}
+            unmatched = 0
+            for fonte, records in parsed.items():
+                for record in records:
+                    matches = [m for m in (index.match(record['name']) for index in indexes) if m]
+                    if not matches:
+                        unmatched += 1
+                        continue
+                    
+                    jogador_id = max(matches, key=lambda m: m['confidence'])['ref']
+                    rows[(jogador_id, fonte)] = {
+                        'jogador_id': str(jogador_id),
+                        'rodada': round_number,
+                        'probabilidade_titular': record['probabilidade_titular'],
+                        'probabilidade_banco': record['probabilidade_banco'],
+                        'confirmado': record['confirmado'],
+                        'lesionado': record['lesionado'],
+                        'suspenso': record['suspenso'],
+                        'observacoes': record['observacoes'],
+                        'fonte': fonte,
+                        'confiabilidade': record['confiabilidade']
+                    }
+        
+        if unmatched:
+            logger.info(f"Prováveis sem jogador correspondente: {unmatched}")
+        if not rows:
+            return 0
+        
+        with self._stage(stages, 'write'):
+            with self.engine.begin() as conn:
                 conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS players_merged (
-                        id SERIAL PRIMARY KEY,
-                        cartola_id INTEGER,
-                        name TEXT,
-                        club_id INTEGER,
-                        position INTEGER,
-                        price REAL,
-                        avg_score REAL,
-                        status INTEGER,
-                        matches_data JSONB,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                
-                # Limpa dados antigos (opcional)
-                conn.execute(text("DELETE FROM players_merged WHERE created_at < NOW() - INTERVAL '1 day'"))
-                
-                # Insere novos dados
-                for player in merged_data:
-                    conn.execute(text("""
-                        INSERT INTO players_merged 
-                        (cartola_id, name, club_id, position, price, avg_score, status, matches_data)
-                        VALUES (:cartola_id, :name, :club_id, :position, :price, :avg_score, :status, :matches_data)
-                    """), {
-                        'cartola_id': player.get('cartola_id'),
-                        'name': player.get('name'),
-                        'club_id': player.get('club_id'),
-                        'position': player.get('position'),
-                        'price': player.get('price'),
-                        'avg_score': player.get('avg_score'),
-                        'status': player.get('status'),
-                        'matches_data': json.dumps(player.get('matches', []))
-                    })
+                    INSERT INTO provaveis_escalacoes
+                    (jogador_id, rodada, probabilidade_titular, probabilidade_banco, confirmado,
+                     lesionado, suspenso, observacoes, fonte, confiabilidade, data_atualizacao)
+                    VALUES (:jogador_id, :rodada, :probabilidade_titular, :probabilidade_banco, :confirmado,
+                            :lesionado, :suspenso, :observacoes, :fonte, :confiabilidade, CURRENT_TIMESTAMP)
+                    ON CONFLICT (jogador_id, rodada, fonte) DO UPDATE SET
+                        probabilidade_titular = EXCLUDED.probabilidade_titular,
+                        probabilidade_banco = EXCLUDED.probabilidade_banco,
+                        confirmado = EXCLUDED.confirmado,
+                        lesionado = EXCLUDED.lesionado,
+                        suspenso = EXCLUDED.suspenso,
+                        observacoes = EXCLUDED.observacoes,
+                        confiabilidade = EXCLUDED.confiabilidade,
+                        data_atualizacao = EXCLUDED.data_atualizacao
+                """), list(rows.values()))
+        
+        logger.info(f"Prováveis salvas: {len(rows)} registros da rodada {round_number}")
+        return len(rows)
+    
+    def _write_chunks(self,
+                      chunks: Iterable[List[Dict]],
+                      stages: Dict[str, float],
+                      loader: Optional[NormalizedLoader] = None) -> int:
+        """
+        Grava os chunks em players_merged numa única transação (um executemany por chunk)
+        
+        Com loader, cada chunk também vai para o staging das tabelas normalizadas,
+        que são atualizadas antes do commit.
+        """
+        written = 0
+        
+        with self.engine.connect() as conn:
+            with self._stage(stages, 'write'):
+                # Tabela particionada por dia; snapshots antigos saem no job de retenção
+                ensure_snapshot_partitions(conn)
                 
+                if loader:
+                    loader.begin(conn)
+            
+            insert = text("""
+                INSERT INTO players_merged
+                (cartola_id, name, club_id, position, price, avg_score, status, matches_data)
+                VALUES (:cartola_id, :name, :club_id, :position, :price, :avg_score, :status, :matches_data)
+            """)
+            
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                with self._stage(stages, 'write'):
+                    conn.execute(insert, [
+                        {
+                            'cartola_id': player.get('cartola_id'),
+                            'name': player.get('name'),
+                            'club_id': player.get('club_id'),
+                            'position': player.get('position'),
+                            'price': player.get('price'),
+                            'avg_score': player.get('avg_score'),
+                            'status': player.get('status'),
+                            'matches_data': json.dumps(player.get('matches', []))
+                        }
+                        for player in chunk
+                    ])
+                    if loader:
+                        loader.stage(conn, chunk)
+                written += len(chunk)
+            
+            with self._stage(stages, 'write'):
+                if loader:
+                    loader.finish(conn)
                 conn.commit()
-                logger.info(f"Dados salvos no banco: {len(merged_data)} jogadores")
-                return True
-                
+        
+        logger.info(f"Dados salvos no banco: {written} jogadores")
+        return written
+    
+    @staticmethod
+    @contextmanager
+    def _stage(stages: Dict[str, float], name: str):
+        """Acumula o tempo gasto em um estágio do pipeline"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages[name] += time.perf_counter() - start
+
+    def publish_market_snapshot(self) -> Optional[str]:
+        """Publica o snapshot colunar do mercado lido pelos workers do otimizador"""
+        try:
+            # Import tardio: o ETL continua utilizável sem as dependências do otimizador
+            from services.team_optimizer import SuperMittosOptimizationEngine
+            return SuperMittosOptimizationEngine(engine=self.engine).publish_snapshot()
         except Exception as e:
-            logger.error(f"Erro ao salvar no banco: {e}")
-            return False
+            logger.error(f"Erro ao publicar snapshot do mercado: {e}")
+            return None
     
-    def run_full_etl(self) -> Dict[str, Any]:
-        """Executa o ETL completo"""
+    def run_full_etl(self, sources: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Executa o ETL completo (ou só as fontes em sources)"""
         logger.info("=== INICIANDO ETL COMPLETO DO SUPERMITTOS ===")
         
         start_time = datetime.now()
         
         try:
-            # 1. Coleta dados
-            collected_data = self.collect_all_data()
-            
-            # 2. Merge dos dados
-            merged_players = self.merge_player_data(collected_data)
+            # 1-3. Coleta, merge e gravação em estágios (fetch → parse → match → write)
+            pipeline = self.run_pipeline(sources=sources)
+            saved_successfully = pipeline['database_saved']
             
-            # 3. Salva no banco
-            saved_successfully = self.save_to_database(merged_players)
+            # 4. Publica o snapshot do mercado para o otimizador
+            snapshot_path = self.publish_market_snapshot() if saved_successfully else None
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -486,14 +922,16 @@ class SuperMittosETL:
                 'start_time': start_time.isoformat(),
                 'end_time': end_time.isoformat(),
                 'duration_seconds': duration,
-                'players_processed': len(merged_players),
+                'players_processed': pipeline['players_processed'],
                 'database_saved': saved_successfully,
-                'sources_collected': {
-                    'cartola': bool(collected_data['cartola']),
-                    'footystats': bool(collected_data['footystats']),
-                    'sofascore': bool(collected_data['sofascore']),
-                    'provaveis': bool(collected_data['provaveis'])
-                }
+                'provaveis_saved': pipeline['provaveis_saved'],
+                'normalized_tables': pipeline['normalized_tables'],
+                'features_updated': pipeline['features_updated'],
+                'predictions': pipeline['predictions'],
+                'market_snapshot': snapshot_path,
+                'fixture_recording': self.fixtures.name if self.fixtures else None,
+                'sources_collected': pipeline['sources_collected'],
+                'stage_seconds': {stage: round(seconds, 3) for stage, seconds in pipeline['stages'].items()}
             }
             
             logger.info(f"ETL concluído com sucesso em {duration:.2f}s")
@@ -506,6 +944,10 @@ class SuperMittosETL:
                 'error': str(e),
                 'timestamp': datetime.now().isoformat()
             }
+        finally:
+            # Gravação de fixtures: manifesto escrito uma vez por execução
+            if self.fixtures:
+                self.fixtures.close()
 
 def main():
     """Função principal para execução standalone"""
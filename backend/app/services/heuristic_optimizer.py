@@ -0,0 +1,307 @@
+"""
+SuperMittos Heuristic Optimizer
+Construção gulosa + busca local para montagem de times com latência de milissegundos
+Respeita as mesmas regras do ILP (formação, limite por clube, orçamento, travas)
+"""
+
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+@dataclass
+class LineupProblem:
+    """Problema de escalação em forma vetorizada (um elemento por candidato)"""
+    points: np.ndarray     # Pontos ajustados (coeficientes do objetivo)
+    prices: np.ndarray
+    positions: np.ndarray  # Código inteiro da posição
+    clubs: np.ndarray      # Código inteiro do clube (0..n_clubs-1)
+    locked: np.ndarray     # Máscara de jogadores travados
+    position_limits: Dict[int, Tuple[int, int]]  # (min, max) por código de posição
+    budget: float
+    max_per_club: int
+    squad_size: int = 11
+
+    @property
+    def n_clubs(self) -> int:
+        return int(self.clubs.max()) + 1 if len(self.clubs) else 0
+
+@dataclass
+class HeuristicResult:
+    """Time encontrado pela heurística e a qualidade em relação ao limite superior"""
+    selected: np.ndarray  # Índices dos candidatos escolhidos
+    objective: float
+    upper_bound: float
+    elapsed_ms: float
+    moves: int
+
+    @property
+    def gap(self) -> float:
+        """Gap relativo ao limite superior (0 = ótimo comprovado)"""
+        if self.upper_bound <= 0:
+            return 0.0
+        return max(0.0, (self.upper_bound - self.objective) / self.upper_bound)
+
+def formation_count_vectors(problem: LineupProblem) -> List[Dict[int, int]]:
+    """Enumera as quantidades por posição que respeitam os limites e somam o tamanho do time"""
+    codes = sorted(problem.position_limits)
+    ranges = [range(problem.position_limits[c][0], problem.position_limits[c][1] + 1) for c in codes]
+
+    return [
+        dict(zip(codes, counts))
+        for counts in itertools.product(*ranges)
+        if sum(counts) == problem.squad_size
+    ]
+
+def lagrangian_upper_bound(problem: LineupProblem, iterations: int = 40) -> float:
+    """
+    Limite superior pela relaxação lagrangiana do orçamento
+
+    Relaxa o orçamento com multiplicador λ e o limite por clube; para λ fixo o
+    melhor time é escolher os maiores (pontos - λ·preço) de cada posição.
+    Como esse subproblema tem a propriedade de integralidade, o mínimo em λ
+    coincide com a relaxação linear do ILP sem o limite por clube, que
+    portanto é um limite superior válido (e barato) para o ILP completo.
+    """
+    count_vectors = formation_count_vectors(problem)
+    if not count_vectors:
+        return 0.0
+
+    by_position = {
+        code: np.flatnonzero(problem.positions == code) for code in problem.position_limits
+    }
+    locked_by_position = {code: idx[problem.locked[idx]] for code, idx in by_position.items()}
+    free_by_position = {code: idx[~problem.locked[idx]] for code, idx in by_position.items()}
+
+    def dual_value(lam: float) -> float:
+        reduced = problem.points - lam * problem.prices
+        best = -np.inf
+
+        for counts in count_vectors:
+            total = 0.0
+            for code, count in counts.items():
+                locked_idx = locked_by_position[code]
+                remaining = count - len(locked_idx)
+                free = reduced[free_by_position[code]]
+                if remaining < 0 or remaining > len(free):
+                    total = -np.inf
+                    break
+                total += reduced[locked_idx].sum()
+                if remaining:
+                    total += np.partition(free, len(free) - remaining)[-remaining:].sum()
+            best = max(best, total)
+
+        return lam * problem.budget + best
+
+    # Função convexa e linear por partes em λ: busca ternária
+    low = 0.0
+    high = float(np.max(problem.points / problem.prices)) + 1.0 if len(problem.points) else 1.0
+    for _ in range(iterations):
+        m1 = low + (high - low) / 3
+        m2 = high - (high - low) / 3
+        if dual_value(m1) <= dual_value(m2):
+            high = m2
+        else:
+            low = m1
+
+    return float(min(dual_value(low), dual_value(0.0)))
+
+def _greedy_construct(problem: LineupProblem, counts: Dict[int, int]) -> Optional[np.ndarray]:
+    """Monta um time viável escolhendo pela razão pontos/preço e reservando orçamento para as vagas restantes"""
+    need = dict(counts)
+    club_count = np.zeros(problem.n_clubs, dtype=int)
+    selected = []
+    cost = 0.0
+
+    for idx in np.flatnonzero(problem.locked):
+        code = problem.positions[idx]
+        if need.get(code, 0) <= 0 or club_count[problem.clubs[idx]] >= problem.max_per_club:
+            return None
+        need[code] -= 1
+        club_count[problem.clubs[idx]] += 1
+        selected.append(idx)
+        cost += problem.prices[idx]
+
+    taken = np.zeros(len(problem.points), dtype=bool)
+    taken[selected] = True
+
+    # Preços mais baratos por posição, para reservar o custo mínimo das vagas restantes
+    cheapest = {
+        code: np.sort(problem.prices[(problem.positions == code) & ~taken]) for code in counts
+    }
+
+    def reserve(needs: Dict[int, int]) -> float:
+        return sum(cheapest[code][:n].sum() for code, n in needs.items() if n > 0)
+
+    order = np.argsort(-(problem.points / problem.prices), kind="stable")
+
+    for fill_by_price in (False, True):
+        candidates = np.argsort(problem.prices, kind="stable") if fill_by_price else order
+
+        for idx in candidates:
+            code = problem.positions[idx]
+            if taken[idx] or need.get(code, 0) <= 0 or club_count[problem.clubs[idx]] >= problem.max_per_club:
+                continue
+
+            need[code] -= 1
+            if not fill_by_price and cost + problem.prices[idx] + reserve(need) > problem.budget:
+                need[code] += 1
+                continue
+            if fill_by_price and cost + problem.prices[idx] > problem.budget:
+                need[code] += 1
+                continue
+
+            taken[idx] = True
+            club_count[problem.clubs[idx]] += 1
+            selected.append(idx)
+            cost += problem.prices[idx]
+
+        if all(n == 0 for n in need.values()):
+            return np.array(selected, dtype=int)
+
+    return None
+
+def _best_single_swap(problem: LineupProblem, selected: np.ndarray, taken: np.ndarray,
+                      club_count: np.ndarray, slack: float) -> Optional[Tuple[int, int, float]]:
+    """Melhor troca 1x1 na mesma posição que melhora o objetivo"""
+    best = None
+    best_gain = 1e-9
+
+    for slot, out in enumerate(selected):
+        if problem.locked[out]:
+            continue
+        candidates = np.flatnonzero((problem.positions == problem.positions[out]) & ~taken)
+        if not len(candidates):
+            continue
+
+        gain = problem.points[candidates] - problem.points[out]
+        extra = problem.prices[candidates] - problem.prices[out]
+        club_ok = ((club_count[problem.clubs[candidates]] < problem.max_per_club) |
+                   (problem.clubs[candidates] == problem.clubs[out]))
+        feasible = (extra <= slack + 1e-9) & club_ok & (gain > best_gain)
+
+        if feasible.any():
+            pick = np.argmax(np.where(feasible, gain, -np.inf))
+            best_gain = gain[pick]
+            best = (slot, int(candidates[pick]), float(best_gain))
+
+    return best
+
+def _best_double_swap(problem: LineupProblem, selected: np.ndarray, taken: np.ndarray,
+                      club_count: np.ndarray, slack: float,
+                      deadline: float) -> Optional[Tuple[int, int, int, int, float]]:
+    """Melhor troca 2x2 (reforça uma vaga liberando orçamento em outra)"""
+    best = None
+    best_gain = 1e-9
+    candidates_by_position = {
+        code: np.flatnonzero((problem.positions == code) & ~taken) for code in problem.position_limits
+    }
+
+    for up_slot, down_slot in itertools.permutations(range(len(selected)), 2):
+        if time.perf_counter() > deadline:
+            break
+
+        up, down = selected[up_slot], selected[down_slot]
+        if problem.locked[up] or problem.locked[down]:
+            continue
+
+        cand_up = candidates_by_position[problem.positions[up]]
+        cand_down = candidates_by_position[problem.positions[down]]
+        if not len(cand_up) or not len(cand_down):
+            continue
+
+        gain = ((problem.points[cand_up] - problem.points[up])[:, None] +
+                (problem.points[cand_down] - problem.points[down])[None, :])
+        extra = ((problem.prices[cand_up] - problem.prices[up])[:, None] +
+                 (problem.prices[cand_down] - problem.prices[down])[None, :])
+
+        base = club_count.copy()
+        base[problem.clubs[up]] -= 1
+        base[problem.clubs[down]] -= 1
+        clubs_up = problem.clubs[cand_up]
+        clubs_down = problem.clubs[cand_down]
+        same_club = clubs_up[:, None] == clubs_down[None, :]
+        club_ok = ((base[clubs_up] < problem.max_per_club)[:, None] &
+                   (base[clubs_down] < problem.max_per_club)[None, :] &
+                   ~(same_club & (base[clubs_up] + 2 > problem.max_per_club)[:, None]))
+
+        feasible = (extra <= slack + 1e-9) & club_ok & (gain > best_gain)
+        feasible &= cand_up[:, None] != cand_down[None, :]
+
+        if feasible.any():
+            flat = np.argmax(np.where(feasible, gain, -np.inf))
+            i, j = np.unravel_index(flat, gain.shape)
+            best_gain = gain[i, j]
+            best = (up_slot, int(cand_up[i]), down_slot, int(cand_down[j]), float(best_gain))
+
+    return best
+
+def solve_heuristic(problem: LineupProblem,
+                    time_budget_ms: float = 50.0,
+                    started_at: Optional[float] = None) -> Optional[HeuristicResult]:
+    """
+    Resolve o problema de escalação dentro do orçamento de tempo
+
+    Sempre retorna a melhor construção gulosa viável (ou None se nenhuma
+    formação admitir time viável); o tempo restante, já descontados a
+    construção e o limite superior, é usado em busca local com trocas 1x1 e
+    2x2 na mesma posição. started_at (time.perf_counter() de quem chamou)
+    inclui no orçamento o preparo feito antes, como o filtro de candidatos.
+    """
+    start = time.perf_counter() if started_at is None else started_at
+    deadline = start + time_budget_ms / 1000
+
+    best_selected = None
+    for counts in formation_count_vectors(problem):
+        selected = _greedy_construct(problem, counts)
+        if selected is not None and (
+            best_selected is None or problem.points[selected].sum() > problem.points[best_selected].sum()
+        ):
+            best_selected = selected
+
+    if best_selected is None:
+        return None
+
+    upper_bound = lagrangian_upper_bound(problem)
+
+    selected = best_selected.copy()
+    taken = np.zeros(len(problem.points), dtype=bool)
+    taken[selected] = True
+    club_count = np.bincount(problem.clubs[selected], minlength=problem.n_clubs)
+    moves = 0
+
+    while time.perf_counter() < deadline:
+        if problem.points[selected].sum() >= upper_bound - 1e-9:
+            break  # Ótimo comprovado pelo limite
+
+        slack = problem.budget - problem.prices[selected].sum()
+
+        move = _best_single_swap(problem, selected, taken, club_count, slack)
+        if move:
+            slot, incoming, _ = move
+            swaps = [(slot, incoming)]
+        else:
+            move = _best_double_swap(problem, selected, taken, club_count, slack, deadline)
+            if not move:
+                break
+            up_slot, up_in, down_slot, down_in, _ = move
+            swaps = [(up_slot, up_in), (down_slot, down_in)]
+
+        for slot, incoming in swaps:
+            outgoing = selected[slot]
+            taken[outgoing] = False
+            taken[incoming] = True
+            club_count[problem.clubs[outgoing]] -= 1
+            club_count[problem.clubs[incoming]] += 1
+            selected[slot] = incoming
+        moves += 1
+
+    return HeuristicResult(
+        selected=selected,
+        objective=float(problem.points[selected].sum()),
+        upper_bound=upper_bound,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        moves=moves
+    )
@@ -0,0 +1,248 @@
+"""
+SuperMittos HTTP Cache
+ETag forte, 304 Not Modified e compressão (gzip/brotli) das respostas da API
+
+Rotas servidas do snapshot do mercado têm a ETag derivada da geração do
+snapshot publicado pelo ETL, do caminho, da query string e do formato pedido
+no Accept: um If-None-Match igual é respondido com 304 antes de chamar o
+endpoint. As demais respostas GET recebem a ETag do hash do corpo (o endpoint
+roda, mas o corpo só trafega se mudou). A ETag é a da representação sem
+compressão; a comprimida leva o sufixo da codificação (-gzip, -br). Os corpos
+comprimidos ficam num LRU por (ETag, codificação): a mesma listagem pedida de
+novo sem If-None-Match não é comprimida outra vez. Respostas em stream (sem
+Content-Length: SSE, NDJSON dos jobs) passam direto, sem ETag nem compressão.
+Sem o pacote brotli instalado, só gzip é oferecido.
+"""
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from services.serialization import wants_msgpack
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+# Preferência entre as codificações aceitas pelo cliente
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "application/x-msgpack", "text/")
+
+# Streams (SSE, NDJSON dos jobs) passam direto: não são bufferizados nem
+# comprimidos. Respostas sem Content-Length (StreamingResponse) também
+STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+
+@dataclass
+class HTTPCacheConfig:
+    """Limite e níveis da compressão"""
+    min_bytes: int = field(default_factory=lambda: int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", 1024)))
+    gzip_level: int = field(default_factory=lambda: int(os.getenv("HTTP_GZIP_LEVEL", 6)))
+    brotli_quality: int = field(default_factory=lambda: int(os.getenv("HTTP_BROTLI_QUALITY", 5)))
+    compressed_entries: int = field(default_factory=lambda: int(os.getenv("HTTP_COMPRESSED_CACHE_ENTRIES", 64)))
+
+class ResourceVersion(NamedTuple):
+    """Versão dos dados de uma rota (geração do snapshot) e quando foi publicada"""
+    tag: str
+    modified: Optional[datetime] = None
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def version_etag(version: ResourceVersion, path: str, query_string: str, msgpack: bool) -> str:
+    """ETag da versão + requisição (parâmetros em qualquer ordem dão a mesma ETag)"""
+    query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    key = f"{version.tag}|{path}|{query}|{'msgpack' if msgpack else 'json'}"
+    return f'"v-{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match, ignorando o sufixo da codificação"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate[2:] if candidate.startswith("W/") else candidate
+        for encoding in ("br", "gzip"):
+            candidate = candidate.replace(f'-{encoding}"', '"')
+        if candidate == etag:
+            return True
+    return False
+
+def not_modified_since(if_modified_since: Optional[str], modified: Optional[datetime]) -> bool:
+    if not if_modified_since or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(_utc(modified).timestamp()) <= int(since.timestamp())
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Codificação preferida entre as aceitas (q > 0) pelo cliente"""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str, config: HTTPCacheConfig) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.brotli_quality)
+    return gzip.compress(body, compresslevel=config.gzip_level, mtime=0)
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value), usegmt=True)
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.astimezone().astimezone(timezone.utc)
+
+def _add_vary(headers: MutableHeaders, value: str):
+    vary = [part.strip() for part in headers.get("vary", "").split(",") if part.strip()]
+    if value.lower() not in (part.lower() for part in vary):
+        headers["Vary"] = ", ".join(vary + [value])
+
+class HTTPCacheMiddleware:
+    """
+    Middleware ASGI: ETag e 304 nas respostas GET 200 e compressão das respostas
+    acima de config.min_bytes
+
+    versions(path) devolve a versão dos dados da rota (ou None): com ela, a ETag
+    é calculada antes do endpoint e o 304 não custa consulta nem serialização.
+    """
+
+    def __init__(self,
+                 app,
+                 versions: Optional[Callable[[str], Optional[ResourceVersion]]] = None,
+                 config: Optional[HTTPCacheConfig] = None):
+        self.app = app
+        self.versions = versions
+        self.config = config or HTTPCacheConfig()
+        self._compressed: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        conditional = scope["method"] == "GET"
+        version = self.versions(scope["path"]) if conditional and self.versions else None
+        etag = None
+        if version is not None:
+            etag = version_etag(version, scope["path"], scope.get("query_string", b"").decode("latin-1"),
+                                wants_msgpack(request_headers.get("accept")))
+            if self._is_fresh(request_headers, etag, version):
+                await self._send_not_modified(send, etag, version)
+                return
+
+        start: Dict = {}
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_cached(message):
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (headers.get("content-encoding") or "content-length" not in headers
+                        or content_type.startswith(STREAMING_TYPES)):
+                    passthrough = True
+                    await send(message)
+                    return
+                start.update(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._finish(send, start, b"".join(chunks), request_headers,
+                               etag if conditional else None, version, conditional)
+
+        await self.app(scope, receive, send_cached)
+
+    def _is_fresh(self, request_headers: Headers, etag: str, version: Optional[ResourceVersion]) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        return version is not None and not_modified_since(request_headers.get("if-modified-since"), version.modified)
+
+    async def _send_not_modified(self, send, etag: str, version: Optional[ResourceVersion], headers=None):
+        response_headers = MutableHeaders(raw=list(headers or []))
+        for name in ("content-length", "content-type", "content-encoding"):
+            if name in response_headers:
+                del response_headers[name]
+        response_headers["ETag"] = etag
+        if version is not None and version.modified is not None:
+            response_headers["Last-Modified"] = http_date(version.modified)
+        response_headers.setdefault("Cache-Control", "no-cache")
+        _add_vary(response_headers, "Accept")
+        _add_vary(response_headers, "Accept-Encoding")
+        await send({"type": "http.response.start", "status": 304, "headers": response_headers.raw})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _finish(self, send, start, body: bytes, request_headers: Headers,
+                      etag: Optional[str], version: Optional[ResourceVersion], conditional: bool):
+        headers = MutableHeaders(raw=list(start["headers"]))
+
+        if conditional and start["status"] == 200:
+            etag = etag or body_etag(body)
+            if self._is_fresh(request_headers, etag, version):
+                await self._send_not_modified(send, etag, version, headers.raw)
+                return
+            headers["ETag"] = etag
+            if version is not None and version.modified is not None:
+                headers["Last-Modified"] = http_date(version.modified)
+            headers.setdefault("Cache-Control", "no-cache")
+
+        content_type = headers.get("content-type", "")
+        if len(body) >= self.config.min_bytes and content_type.startswith(COMPRESSIBLE_TYPES):
+            encoding = choose_encoding(request_headers.get("accept-encoding"))
+            _add_vary(headers, "Accept-Encoding")
+            if encoding:
+                body = self._compress(body, encoding, headers.get("etag"))
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    headers["ETag"] = headers["etag"][:-1] + f'-{encoding}"'
+
+        headers["Content-Length"] = str(len(body))
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+    def _compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        """Comprime o corpo, reaproveitando o resultado de uma ETag já vista"""
+        if etag is None or self.config.compressed_entries <= 0:
+            return compress(body, encoding, self.config)
+        key = (etag, encoding)
+        cached = self._compressed.get(key)
+        if cached is not None:
+            self._compressed.move_to_end(key)
+            return cached
+        cached = compress(body, encoding, self.config)
+        self._compressed[key] = cached
+        while len(self._compressed) > self.config.compressed_entries:
+            self._compressed.popitem(last=False)
+        return cached
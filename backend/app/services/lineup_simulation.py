@@ -0,0 +1,196 @@
+"""
+SuperMittos Lineup Simulation
+Simulação de Monte Carlo vetorizada das pontuações de times
+Amostra a pontuação de cada jogador (incluindo a chance de não jogar) em lotes NumPy
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.team_optimizer import CAPTAIN_MULTIPLIER, PlayerData
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Resolução dos histogramas por time usados para estimar quantis sem guardar os cenários
+HISTOGRAM_BINS = 1024
+
+# Limite de elementos por matriz de cenários em cada lote (controla o pico de memória)
+MAX_CHUNK_ELEMENTS = 20_000_000
+
+def simulate_lineups(expected_points: np.ndarray,
+                     variance: np.ndarray,
+                     prob_starter: np.ndarray,
+                     lineups: np.ndarray,
+                     captains: Optional[np.ndarray] = None,
+                     n_scenarios: int = 100_000,
+                     target: Optional[float] = None,
+                     quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                     captain_multiplier: float = CAPTAIN_MULTIPLIER,
+                     seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Simula a pontuação de vários times em n_scenarios cenários
+
+    Cada jogador joga com probabilidade prob_starter e, se jogar, pontua
+    Normal(expected_points, variance). lineups tem formato (times, vagas) com
+    índices nos arrays de jogadores e captains traz a vaga do capitão de cada
+    time (-1 para nenhum). Os cenários são processados em lotes: a pontuação
+    dos times vem de um produto matricial (times x jogadores) @ (jogadores x
+    cenários) e os quantis saem de histogramas acumulados por time.
+    """
+    lineups = np.asarray(lineups, dtype=int)
+    n_lineups, n_slots = lineups.shape
+    captains = np.full(n_lineups, -1) if captains is None else np.asarray(captains, dtype=int)
+    rng = np.random.default_rng(seed)
+
+    # Apenas os jogadores presentes em algum time são amostrados
+    used, local = np.unique(lineups, return_inverse=True)
+    local = local.reshape(lineups.shape)
+    mu = np.asarray(expected_points, dtype=float)[used]
+    sd = np.sqrt(np.clip(np.asarray(variance, dtype=float)[used], 0, None))
+    p = np.clip(np.asarray(prob_starter, dtype=float)[used], 0, 1)
+
+    # Pesos por time (capitão pontua em dobro por padrão)
+    rows = np.arange(n_lineups)
+    has_captain = captains >= 0
+    captain_local = np.where(has_captain, local[rows, np.clip(captains, 0, None)], 0)
+    weights = np.zeros((n_lineups, len(used)), dtype=np.float32)
+    np.add.at(weights, (np.repeat(rows, n_slots), local.ravel()), 1.0)
+    weights[rows[has_captain], captain_local[has_captain]] += captain_multiplier - 1
+
+    # Média e desvio analíticos definem a faixa do histograma de cada time
+    player_mean = p * mu
+    player_var = p * (sd ** 2 + mu ** 2) - player_mean ** 2
+    lineup_mean = weights @ player_mean
+    lineup_sd = np.sqrt(np.maximum((weights ** 2) @ player_var, 1e-9))
+    low = lineup_mean - 8 * lineup_sd
+    width = 16 * lineup_sd / HISTOGRAM_BINS
+
+    histogram = np.zeros(n_lineups * HISTOGRAM_BINS, dtype=np.int64)
+    total_sum = np.zeros(n_lineups)
+    total_sq = np.zeros(n_lineups)
+    beat_target = np.zeros(n_lineups, dtype=np.int64)
+    captain_sum = np.zeros((n_lineups, n_slots))
+    captain_beat = np.zeros((n_lineups, n_slots), dtype=np.int64)
+    offsets = (rows * HISTOGRAM_BINS)[:, None]
+
+    chunk = max(1, min(n_scenarios, MAX_CHUNK_ELEMENTS // max(len(used), n_lineups * n_slots, 1)))
+    done = 0
+
+    while done < n_scenarios:
+        size = min(chunk, n_scenarios - done)
+        played = rng.random((len(used), size)) < p[:, None]
+        scores = np.where(played, rng.normal(mu[:, None], sd[:, None], (len(used), size)), 0.0)
+        scores = scores.astype(np.float32)
+
+        totals = weights @ scores  # (times, cenários)
+        total_sum += totals.sum(axis=1)
+        total_sq += (totals.astype(np.float64) ** 2).sum(axis=1)
+        if target is not None:
+            beat_target += (totals >= target).sum(axis=1)
+
+        bins = np.clip(((totals - low[:, None]) / width[:, None]).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        histogram += np.bincount((bins + offsets).ravel(), minlength=histogram.size)
+
+        # Impacto do capitão: total sem o bônus do capitão atual + bônus de cada vaga
+        without_captain = totals - np.where(
+            has_captain[:, None], (captain_multiplier - 1) * scores[captain_local], 0.0
+        )
+        for slot in range(n_slots):
+            with_slot = without_captain + (captain_multiplier - 1) * scores[local[:, slot]]
+            captain_sum[:, slot] += with_slot.sum(axis=1)
+            if target is not None:
+                captain_beat[:, slot] += (with_slot >= target).sum(axis=1)
+
+        done += size
+
+    mean = total_sum / n_scenarios
+    std = np.sqrt(np.maximum(total_sq / n_scenarios - mean ** 2, 0))
+    quantile_values = _histogram_quantiles(
+        histogram.reshape(n_lineups, HISTOGRAM_BINS), low, width, quantiles
+    )
+    captain_mean = captain_sum / n_scenarios
+
+    results = []
+    for i in range(n_lineups):
+        best_slot = int(np.argmax(captain_mean[i]))
+        chosen = int(captains[i]) if has_captain[i] else None
+        results.append({
+            "mean": round(float(mean[i]), 3),
+            "std": round(float(std[i]), 3),
+            "quantiles": {
+                f"p{int(round(q * 100)):02d}": round(float(quantile_values[i, j]), 3)
+                for j, q in enumerate(quantiles)
+            },
+            "target": target,
+            "prob_beat_target": round(float(beat_target[i] / n_scenarios), 4) if target is not None else None,
+            "captain_impact": {
+                "chosen_slot": chosen,
+                "best_slot": best_slot,
+                "expected_loss_vs_best": round(
+                    float(captain_mean[i, best_slot] - (captain_mean[i, chosen] if chosen is not None else mean[i])), 3
+                ),
+                "by_slot": [
+                    {
+                        "slot": slot,
+                        "mean": round(float(captain_mean[i, slot]), 3),
+                        "prob_beat_target": (round(float(captain_beat[i, slot] / n_scenarios), 4)
+                                             if target is not None else None)
+                    }
+                    for slot in range(n_slots)
+                ]
+            },
+            "n_scenarios": n_scenarios
+        })
+
+    return results
+
+def _histogram_quantiles(histogram: np.ndarray, low: np.ndarray, width: np.ndarray,
+                         quantiles: Sequence[float]) -> np.ndarray:
+    """Quantis por time a partir dos histogramas acumulados (interpolação linear dentro do bin)"""
+    cumulative = np.cumsum(histogram, axis=1)
+    totals = cumulative[:, -1:]
+    values = np.empty((histogram.shape[0], len(quantiles)))
+
+    for j, q in enumerate(quantiles):
+        rank = q * totals
+        bin_index = np.minimum((cumulative < rank).sum(axis=1), histogram.shape[1] - 1)
+        rows = np.arange(histogram.shape[0])
+        before = np.where(bin_index > 0, cumulative[rows, bin_index - 1], 0)
+        in_bin = np.maximum(histogram[rows, bin_index], 1)
+        fraction = (rank[:, 0] - before) / in_bin
+        values[:, j] = low + (bin_index + fraction) * width
+
+    return values
+
+def simulate_player_lineups(lineups: List[List[PlayerData]],
+                            captain_ids: Optional[List[Optional[str]]] = None,
+                            **kwargs) -> List[Dict[str, Any]]:
+    """Simula times montados a partir de PlayerData (ver simulate_lineups para os parâmetros)"""
+    players: Dict[str, PlayerData] = {}
+    for lineup in lineups:
+        for player in lineup:
+            players.setdefault(player.id, player)
+
+    index = {player_id: i for i, player_id in enumerate(players)}
+    pool = list(players.values())
+    captain_ids = captain_ids or [None] * len(lineups)
+
+    results = simulate_lineups(
+        expected_points=np.array([p.expected_points for p in pool]),
+        variance=np.array([p.variance for p in pool]),
+        prob_starter=np.array([p.prob_starter for p in pool]),
+        lineups=np.array([[index[p.id] for p in lineup] for lineup in lineups]),
+        captains=np.array([
+            next((slot for slot, p in enumerate(lineup) if p.id == captain_id), -1)
+            for lineup, captain_id in zip(lineups, captain_ids)
+        ]),
+        **kwargs
+    )
+
+    # Identifica os jogadores de cada vaga no impacto do capitão
+    for lineup, result in zip(lineups, results):
+        for entry in result["captain_impact"]["by_slot"]:
+            entry["player_id"] = lineup[entry["slot"]].id
+
+    return results
@@ -0,0 +1,146 @@
+"""
+SuperMittos Live Partials
+Pontuação ao vivo das sugestões salvas (sugestoes_times) durante a rodada
+
+As parciais chegam de um único poller (job "parciais" do agendador do ETL);
+cada atualização só mexe nos times que têm algum jogador cuja pontuação
+mudou, e o resultado é distribuído aos assinantes (SSE) por filas em memória.
+Carga no Cartola e no banco não depende de quantos clientes estão assistindo.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from services.queries import LIVE_LINEUPS_QUERY
+from services.team_optimizer import CAPTAIN_MULTIPLIER
+
+logger = logging.getLogger(__name__)
+
+# Escalações são relidas do banco quando a rodada muda ou após este intervalo (s)
+LINEUP_REFRESH_SECONDS = 300.0
+
+# Eventos pendentes por assinante; um cliente lento perde os mais antigos
+SUBSCRIBER_QUEUE_SIZE = 16
+
+class LivePartials:
+    """Totais ao vivo das sugestões da rodada, atualizados incrementalmente"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.round_number: Optional[int] = None
+        self.version = 0
+        self.updated_at: Optional[float] = None
+        self.scores: Dict[str, float] = {}
+        self.totals: Dict[str, float] = {}
+        # cartola_id -> [(sugestao_id, multiplicador)]
+        self._lineups_by_player: Dict[str, List[Tuple[str, float]]] = {}
+        self._lineups_loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+    def update(self, round_number: Optional[int], scores: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        """Aplica novas parciais; retorna (e publica) o evento com o que mudou"""
+        if not round_number or not scores:
+            return None
+
+        with self._lock:
+            if round_number != self.round_number or time.time() - self._lineups_loaded_at > LINEUP_REFRESH_SECONDS:
+                self._load_lineups(round_number)
+                self.scores = {}
+                changed_lineups = set(self.totals)
+            else:
+                changed_lineups = set()
+
+            changed_players = {}
+            for player_id, score in scores.items():
+                score = float(score or 0)
+                delta = score - self.scores.get(player_id, 0.0)
+                if not delta and player_id in self.scores:
+                    continue
+                self.scores[player_id] = score
+                changed_players[player_id] = score
+                for lineup_id, multiplier in self._lineups_by_player.get(player_id, ()):
+                    self.totals[lineup_id] += delta * multiplier
+                    changed_lineups.add(lineup_id)
+
+            if not changed_players and not changed_lineups:
+                return None
+
+            self.version += 1
+            self.updated_at = time.time()
+            event = {
+                "rodada": self.round_number,
+                "version": self.version,
+                "updated_at": self.updated_at,
+                "players": changed_players,
+                "lineups": {lineup_id: round(self.totals[lineup_id], 2) for lineup_id in changed_lineups}
+            }
+
+        self._publish(event)
+        return event
+
+    def snapshot(self, lineup_ids: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Estado completo (enviado a quem acaba de assinar)"""
+        with self._lock:
+            totals = self.totals if lineup_ids is None else {
+                lineup_id: total for lineup_id, total in self.totals.items() if lineup_id in lineup_ids
+            }
+            return {
+                "rodada": self.round_number,
+                "version": self.version,
+                "updated_at": self.updated_at,
+                "players": dict(self.scores),
+                "lineups": {lineup_id: round(total, 2) for lineup_id, total in totals.items()}
+            }
+
+    def subscribe(self) -> asyncio.Queue:
+        """Fila de eventos do assinante (chamar de dentro do event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {entry for entry in self._subscribers if entry[1] is not queue}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, event: Dict[str, Any]):
+        # O poller roda em outra thread: entrega pelo loop de cada assinante
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                self.unsubscribe(queue)  # Loop encerrado
+
+    def _load_lineups(self, round_number: int):
+        """Índice invertido jogador -> sugestões da rodada, com os totais zerados"""
+        lineups_by_player: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        totals: Dict[str, float] = {}
+        with self.engine.connect() as conn:
+            for lineup_id, cartola_id, captain in conn.execute(text(LIVE_LINEUPS_QUERY), {"round_number": round_number}):
+                lineup_id = str(lineup_id)
+                totals[lineup_id] = 0.0
+                lineups_by_player[str(cartola_id)].append((lineup_id, CAPTAIN_MULTIPLIER if captain else 1.0))
+
+        self.round_number = round_number
+        self.totals = totals
+        self._lineups_by_player = dict(lineups_by_player)
+        self._lineups_loaded_at = time.time()
+        logger.info(f"Parciais ao vivo: {len(totals)} sugestões da rodada {round_number}")
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
@@ -0,0 +1,154 @@
+"""
+SuperMittos Market Snapshot
+Snapshot colunar, versionado e imutável do mercado de uma rodada
+Publicado pelo ETL e lido via memory-map pelos workers do otimizador e da API
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 3
+
+# Arquivo com o nome do diretório do snapshot vigente (trocado atomicamente)
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+def snapshot_root() -> str:
+    return os.getenv("MARKET_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "supermittos_snapshots"))
+
+@dataclass
+class MarketSnapshot:
+    """Snapshot aberto: colunas mapeadas em memória (somente leitura)"""
+    path: str
+    round_number: int
+    generation: int
+    created_at: str
+    columns: Dict[str, np.ndarray]
+
+    @property
+    def n_players(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+def write_snapshot(columns: Dict[str, np.ndarray],
+                   round_number: int,
+                   root_dir: Optional[str] = None,
+                   keep: int = 3) -> str:
+    """
+    Grava um novo snapshot e o torna o vigente
+
+    Cada coluna vira um .npy (mapeável com np.load(mmap_mode="r")) dentro de
+    um diretório novo; só depois de completo o diretório é renomeado e o
+    ponteiro CURRENT é substituído com os.replace, então leitores nunca veem
+    um snapshot pela metade. Snapshots antigos além de keep são removidos.
+    """
+    root_dir = root_dir or snapshot_root()
+    os.makedirs(root_dir, exist_ok=True)
+
+    lengths = {name: len(values) for name, values in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"Colunas com tamanhos diferentes: {lengths}")
+
+    generation = max((_generation(entry) for entry in _snapshot_dirs(root_dir)), default=0) + 1
+    name = f"round-{round_number:03d}-gen-{generation:06d}"
+
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=root_dir)
+    try:
+        manifest_columns = {}
+        for column, values in columns.items():
+            values = np.ascontiguousarray(values)
+            np.save(os.path.join(staging, f"{column}.npy"), values, allow_pickle=False)
+            manifest_columns[column] = {"dtype": values.dtype.str, "shape": list(values.shape)}
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "round_number": round_number,
+            "generation": generation,
+            "created_at": datetime.now().isoformat(),
+            "rows": next(iter(lengths.values()), 0),
+            "columns": manifest_columns
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        final_path = os.path.join(root_dir, name)
+        os.rename(staging, final_path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_tmp = os.path.join(root_dir, f".{CURRENT_POINTER}.{os.getpid()}")
+    with open(pointer_tmp, "w") as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(root_dir, CURRENT_POINTER))
+
+    _remove_old_snapshots(root_dir, keep)
+    logger.info(f"Snapshot do mercado publicado: {name} ({manifest['rows']} jogadores)")
+    return final_path
+
+def current_snapshot_name(root_dir: Optional[str] = None) -> Optional[str]:
+    """Nome do snapshot vigente (leitura barata, usada para detectar trocas)"""
+    try:
+        with open(os.path.join(root_dir or snapshot_root(), CURRENT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def open_snapshot(root_dir: Optional[str] = None, name: Optional[str] = None) -> Optional[MarketSnapshot]:
+    """Abre o snapshot vigente (ou o indicado) com as colunas mapeadas em memória"""
+    root_dir = root_dir or snapshot_root()
+    name = name or current_snapshot_name(root_dir)
+    if not name:
+        return None
+
+    path = os.path.join(root_dir, name)
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Snapshot {name} não encontrado em {root_dir}")
+        return None
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning(f"Snapshot {name} com formato incompatível: {manifest.get('format_version')}")
+        return None
+
+    columns = {
+        column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r", allow_pickle=False)
+        for column in manifest["columns"]
+    }
+
+    return MarketSnapshot(
+        path=path,
+        round_number=manifest["round_number"],
+        generation=manifest["generation"],
+        created_at=manifest["created_at"],
+        columns=columns
+    )
+
+def _remove_old_snapshots(root_dir: str, keep: int):
+    """Remove os snapshots mais antigos (processos que já os mapearam continuam válidos)"""
+    current = current_snapshot_name(root_dir)
+    snapshots = sorted(_snapshot_dirs(root_dir), key=_generation)
+
+    for entry in snapshots[:-keep] if keep > 0 else snapshots:
+        if entry != current:
+            shutil.rmtree(os.path.join(root_dir, entry), ignore_errors=True)
+
+def _snapshot_dirs(root_dir: str):
+    return [
+        entry for entry in os.listdir(root_dir)
+        if entry.startswith("round-") and os.path.isdir(os.path.join(root_dir, entry))
+    ]
+
+def _generation(name: str) -> int:
+    return int(name.rsplit("-", 1)[-1])
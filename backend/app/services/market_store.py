@@ -0,0 +1,231 @@
+"""
+SuperMittos Market Store
+Mercado atual em memória para a API, lido do snapshot publicado pelo ETL
+As colunas são mapeadas em memória, então as páginas são compartilhadas entre os workers
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.market_snapshot import MarketSnapshot, current_snapshot_name, open_snapshot, snapshot_root
+
+logger = logging.getLogger(__name__)
+
+# Métricas disponíveis para rankings
+RANKING_METRICS = ("avg_score", "recent_form", "roi")
+
+@dataclass(frozen=True)
+class MarketView:
+    """Versão imutável do mercado; trocada por inteiro a cada atualização"""
+    snapshot: MarketSnapshot
+    columns: Dict[str, np.ndarray]
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.snapshot.path)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: MarketSnapshot) -> "MarketView":
+        columns = dict(snapshot.columns)
+        price = np.asarray(columns["price"], dtype=float)
+        avg_score = np.asarray(columns["avg_score"], dtype=float)
+
+        # Colunas derivadas calculadas uma vez por versão
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns["roi"] = np.where(price > 0, avg_score / price, np.nan)
+        columns["position_abbrev_upper"] = np.char.upper(np.asarray(columns["position_abbrev"]))
+
+        return cls(snapshot=snapshot, columns=columns)
+
+    def mask(self,
+             position: Optional[str] = None,
+             club_id: Optional[int] = None,
+             min_price: Optional[float] = None,
+             max_price: Optional[float] = None) -> np.ndarray:
+        """Filtro vetorizado sobre as colunas"""
+        columns = self.columns
+        mask = np.ones(self.snapshot.n_players, dtype=bool)
+
+        if position:
+            mask &= columns["position_abbrev_upper"] == position.upper()
+        if club_id:
+            mask &= columns["club_id"] == club_id
+        if min_price is not None:
+            mask &= columns["price"] >= min_price
+        if max_price is not None:
+            mask &= columns["price"] <= max_price
+
+        return mask
+
+    def top_k(self, metric: str, mask: np.ndarray, limit: int) -> np.ndarray:
+        """Índices dos limit maiores valores de metric (NaN por último) via argpartition"""
+        candidates = np.flatnonzero(mask)
+        if limit <= 0 or not len(candidates):
+            return candidates[:0]
+
+        values = np.asarray(self.columns[metric], dtype=float)[candidates]
+        values = np.where(np.isnan(values), -np.inf, values)
+
+        if limit < len(candidates):
+            part = np.argpartition(-values, limit - 1)[:limit]
+        else:
+            part = np.arange(len(candidates))
+
+        order = part[np.argsort(-values[part], kind="stable")]
+        return candidates[order]
+
+    def value(self, column: str, index: int) -> Any:
+        """Valor nativo de Python (NaN e texto vazio viram None)"""
+        value = self.columns[column][index].item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        if value == "":
+            return None
+        return value
+
+class MarketStore:
+    """
+    Mantém a versão vigente do mercado e a troca atomicamente
+
+    A troca é a substituição de uma única referência: uma requisição que já
+    pegou a versão anterior termina com ela, nunca com um mercado misturado.
+    O ponteiro CURRENT é verificado no máximo a cada refresh_interval segundos.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, refresh_interval: float = 5.0):
+        self.snapshot_dir = snapshot_dir or snapshot_root()
+        self.refresh_interval = refresh_interval
+        self._view: Optional[MarketView] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def view(self) -> Optional[MarketView]:
+        """Versão vigente (verifica se o ETL publicou uma nova)"""
+        if time.monotonic() - self._checked_at > self.refresh_interval:
+            self.refresh()
+        return self._view
+
+    def refresh(self) -> bool:
+        """Carrega o snapshot vigente se mudou; retorna se houve troca"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            name = current_snapshot_name(self.snapshot_dir)
+            if name is None or (self._view and self._view.name == name):
+                return False
+
+            snapshot = open_snapshot(self.snapshot_dir, name)
+            if snapshot is None:
+                return False
+
+            view = MarketView.from_snapshot(snapshot)
+            self._view = view  # Troca atômica
+
+        logger.info(f"Mercado atualizado: {name} ({snapshot.n_players} jogadores)")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        view = self._view
+        return {
+            "loaded": view is not None,
+            "snapshot": view.name if view else None,
+            "round_number": view.snapshot.round_number if view else None,
+            "generation": view.snapshot.generation if view else None,
+            "players": view.snapshot.n_players if view else 0,
+            "loaded_at": view.loaded_at.isoformat() if view else None
+        }
+
+def list_players(view: MarketView,
+                 position: Optional[str] = None,
+                 club_id: Optional[int] = None,
+                 min_price: Optional[float] = None,
+                 max_price: Optional[float] = None,
+                 limit: int = 100) -> List[Dict[str, Any]]:
+    """Jogadores filtrados, ordenados pela média de pontos"""
+    indices = view.top_k("avg_score", view.mask(position, club_id, min_price, max_price), limit)
+
+    def prob_starter(i: int) -> Optional[float]:
+        value = view.value("prob_starter", i)
+        return round(value * 100, 4) if value is not None else None  # De volta a 0-100
+
+    return [
+        {
+            "id": view.value("id", i),
+            "cartola_id": view.value("cartola_id", i),
+            "name": view.value("name", i),
+            "nickname": view.value("nickname", i),
+            "club_name": view.value("club_name", i),
+            "position_name": view.value("position_name", i) or "",
+            "position_abbrev": view.value("position_abbrev", i) or "",
+            "current_price": view.value("price", i),
+            "avg_score": view.value("avg_score", i),
+            "recent_form": view.value("recent_form", i),
+            "consistency": view.value("consistency", i),
+            "prob_starter": prob_starter(i),
+            "active": True
+        }
+        for i in indices
+    ]
+
+def top_performers(view: MarketView,
+                   metric: str,
+                   position: Optional[str] = None,
+                   limit: int = 10) -> List[Dict[str, Any]]:
+    """Ranking por métrica entre jogadores com média de pontos"""
+    if metric not in RANKING_METRICS:
+        raise ValueError(f"Métrica inválida: {metric}")
+
+    mask = view.mask(position) & ~np.isnan(np.asarray(view.columns["avg_score"], dtype=float))
+    indices = view.top_k(metric, mask, limit)
+
+    return [
+        {
+            "name": view.value("name", i),
+            "nickname": view.value("nickname", i),
+            "club": view.value("club_name", i),
+            "position": view.value("position_abbrev", i),
+            "avg_score": view.value("avg_score", i),
+            "recent_form": view.value("recent_form", i),
+            "current_price": view.value("price", i),
+            "roi": round(view.value("roi", i), 4) if view.value("roi", i) else None
+        }
+        for i in indices
+    ]
+
+def market_dashboard(view: MarketView) -> Dict[str, Any]:
+    """Agregados do mercado para o dashboard"""
+    price = np.asarray(view.columns["price"], dtype=float)
+    avg_score = np.asarray(view.columns["avg_score"], dtype=float)
+    priced = price[~np.isnan(price)]
+    positions, inverse = np.unique(np.asarray(view.columns["position_abbrev"]), return_inverse=True)
+
+    counts = np.bincount(inverse, minlength=len(positions))
+    scored = ~np.isnan(avg_score)
+    score_sums = np.bincount(inverse[scored], weights=avg_score[scored], minlength=len(positions))
+    score_counts = np.bincount(inverse[scored], minlength=len(positions))
+
+    return {
+        "total_players": int(len(price)),
+        "market_stats": {
+            "avg_price": round(float(priced.mean()), 2) if len(priced) else 0,
+            "min_price": float(priced.min()) if len(priced) else 0,
+            "max_price": float(priced.max()) if len(priced) else 0
+        },
+        "position_distribution": [
+            {
+                "position": position or None,
+                "count": int(counts[j]),
+                "avg_score": round(float(score_sums[j] / score_counts[j]), 2) if score_counts[j] else 0
+            }
+            for j, position in enumerate(positions)
+        ],
+        "last_updated": view.snapshot.created_at
+    }
@@ -0,0 +1,248 @@
+"""
+SuperMittos Optimization Jobs
+Execução assíncrona de lotes de otimização em um pool de workers
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from services.team_optimizer import (
+    OptimizationConstraints,
+    OptimizationStrategy,
+    SuperMittosOptimizationEngine,
+)
+
+logger = logging.getLogger(__name__)
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+@dataclass
+class OptimizationJob:
+    """Estado de um lote de otimizações"""
+    id: str
+    round_number: Optional[int]
+    specs: List[Tuple[OptimizationStrategy, OptimizationConstraints]]
+    persist: bool = True
+    status: JobStatus = JobStatus.PENDING
+    results: List[Dict[str, Any]] = field(default_factory=list)  # Na ordem de conclusão
+    error: Optional[str] = None
+    persisted: bool = False
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.specs)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self, offset: int = 0) -> Dict[str, Any]:
+        """Resumo do job com os resultados concluídos a partir de offset"""
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "round_number": self.round_number,
+            "total": self.total,
+            "completed": len(self.results),
+            "succeeded": sum(1 for r in self.results if r["success"]),
+            "persisted": self.persisted,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "results": self.results[offset:]
+        }
+
+    def progress(self) -> Dict[str, Any]:
+        """Resumo do job sem os resultados"""
+        return {key: value for key, value in self.to_dict(len(self.results)).items() if key != "results"}
+
+class OptimizationJobManager:
+    """
+    Agenda lotes de otimização em um pool de threads compartilhado
+
+    Cada job carrega o pool de jogadores uma única vez e o compartilha entre
+    todas as configurações do lote. O solver CBC roda em subprocesso, então
+    threads são suficientes para paralelizar os solves.
+    """
+
+    def __init__(self,
+                 engine: SuperMittosOptimizationEngine,
+                 max_workers: Optional[int] = None,
+                 max_jobs: int = 100):
+        self.engine = engine
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("OPTIMIZER_WORKERS", os.cpu_count() or 2)),
+            thread_name_prefix="optimizer"
+        )
+        self._jobs: Dict[str, OptimizationJob] = {}
+        self._lock = threading.Lock()
+        # Streams abertos: evento sinalizado no loop de cada um quando um job muda
+        self._watchers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def submit(self,
+               specs: List[Tuple[OptimizationStrategy, OptimizationConstraints]],
+               round_number: Optional[int] = None,
+               persist: bool = True) -> OptimizationJob:
+        """Cria um job e dispara sua execução em background"""
+        if not specs:
+            raise ValueError("Lista de configurações não pode ser vazia")
+
+        job = OptimizationJob(
+            id=str(uuid.uuid4()),
+            round_number=round_number,
+            specs=specs,
+            persist=persist
+        )
+
+        with self._lock:
+            self._prune_finished_jobs()
+            self._jobs[job.id] = job
+
+        threading.Thread(
+            target=self._run_job, args=(job,), name=f"optimization-job-{job.id[:8]}", daemon=True
+        ).start()
+
+        return job
+
+    def get(self, job_id: str) -> Optional[OptimizationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def stream_results(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Gera os resultados do job conforme são concluídos (chamar de dentro do event loop)
+
+        Aguarda no event loop, sem ocupar thread, e só termina com o job ou
+        quando o cliente desconecta. A cada heartbeat segundos sem resultado
+        novo (solves longos), gera o progress() do job, que tem "status" em
+        vez de "index".
+        """
+        job = self.get(job_id)
+        if not job:
+            return
+
+        changed = asyncio.Event()
+        watcher = (asyncio.get_running_loop(), changed)
+        with self._lock:
+            self._watchers.add(watcher)
+
+        try:
+            sent = 0
+            while True:
+                # Limpa antes de ler: mudança posterior à leitura sinaliza de novo
+                changed.clear()
+                with self._lock:
+                    pending = job.results[sent:]
+                    finished = job.done
+
+                for result in pending:
+                    yield result
+                sent += len(pending)
+
+                if finished:
+                    return
+                if pending:
+                    continue
+
+                try:
+                    await asyncio.wait_for(changed.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield job.progress()
+        finally:
+            with self._lock:
+                self._watchers.discard(watcher)
+
+    def _run_job(self, job: OptimizationJob):
+        """Carrega o pool de jogadores e distribui as otimizações entre os workers"""
+        self._set_status(job, JobStatus.RUNNING)
+
+        try:
+            if job.round_number is None and job.persist:
+                job.round_number = self.engine.get_current_round()
+
+            players = self.engine.load_players(job.round_number)
+        except Exception as e:
+            logger.error(f"Job {job.id}: erro ao carregar jogadores: {e}")
+            self._finish(job, JobStatus.FAILED, error=str(e))
+            return
+
+        futures = {
+            self.executor.submit(self._optimize, strategy, constraints, players, job.round_number): index
+            for index, (strategy, constraints) in enumerate(job.specs)
+        }
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                entry = {"index": index, "success": True, "result": future.result()}
+            except Exception as e:
+                entry = {"index": index, "success": False, "error": str(e)}
+
+            with self._lock:
+                job.results.append(entry)
+                self._notify_watchers()
+
+        if job.persist:
+            suggestions = [entry["result"] for entry in sorted(job.results, key=lambda r: r["index"])
+                           if entry["success"]]
+            if suggestions:
+                # Uma única escrita em lote para todo o job
+                job.persisted = self.engine.save_suggestions_to_db(suggestions, job.round_number)
+
+        logger.info(f"Job {job.id} concluído: {len(job.results)} otimizações")
+        self._finish(job, JobStatus.COMPLETED)
+
+    def _optimize(self,
+                  strategy: OptimizationStrategy,
+                  constraints: OptimizationConstraints,
+                  players,
+                  round_number: Optional[int]) -> Dict[str, Any]:
+        optimizer = self.engine.create_optimizer(strategy, round_number)
+        return optimizer.optimize_team(players, constraints)
+
+    def _set_status(self, job: OptimizationJob, status: JobStatus):
+        with self._lock:
+            job.status = status
+            self._notify_watchers()
+
+    def _finish(self, job: OptimizationJob, status: JobStatus, error: Optional[str] = None):
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.now()
+            self._notify_watchers()
+
+    def _notify_watchers(self):
+        """Acorda os streams abertos (chamado com lock, de qualquer thread)"""
+        for loop, changed in list(self._watchers):
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                self._watchers.discard((loop, changed))  # Loop encerrado
+
+    def _prune_finished_jobs(self):
+        """Descarta os jobs concluídos mais antigos acima do limite (chamado com lock)"""
+        if len(self._jobs) < self.max_jobs:
+            return
+
+        finished = sorted(
+            (job for job in self._jobs.values() if job.done),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+            del self._jobs[job.id]
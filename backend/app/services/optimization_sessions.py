@@ -0,0 +1,316 @@
+"""
+SuperMittos Optimization Sessions
+Reotimização interativa: o modelo é montado uma vez e cada ajuste do usuário
+(travar, excluir, mudar orçamento, capitão) altera apenas limites de variáveis
+ou o lado direito do orçamento, com warm start a partir do time anterior
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Set
+
+import pulp
+
+from services.team_optimizer import (
+    OptimizationConstraints,
+    OptimizationStrategy,
+    PlayerData,
+    SuperMittosOptimizationEngine,
+    TeamOptimizer,
+)
+
+logger = logging.getLogger(__name__)
+
+SESSION_OPERATIONS = (
+    "lock", "unlock", "exclude", "include", "exclude_club", "include_club", "budget", "captain"
+)
+
+class OptimizationSession:
+    """
+    Modelo ILP de um pool de jogadores mantido entre ajustes do usuário
+
+    O modelo inclui todos os jogadores que passam nos filtros fixos (lesão,
+    suspensão, preço); travas, exclusões, corte de titularidade e poda por
+    dominância viram limites das variáveis. Ajustes que apenas restringem o
+    problema sem afetar o time atual não precisam de novo solve.
+    """
+
+    def __init__(self,
+                 session_id: str,
+                 optimizer: TeamOptimizer,
+                 players: List[PlayerData],
+                 constraints: OptimizationConstraints,
+                 round_number: Optional[int] = None):
+        self.id = session_id
+        self.optimizer = optimizer
+        self.round_number = round_number
+        self.constraints = replace(constraints)
+        self.captain_id: Optional[str] = None
+        self.solves = 0
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.lock = threading.Lock()
+
+        # Filtros do usuário ficam fora da montagem: serão aplicados como limites
+        base = replace(constraints, min_prob_starter=0.0, locked_players=[], excluded_players=[], excluded_clubs=[])
+        self.candidates = [
+            p for p in optimizer._filter_eligible_players(players, base) if p.position in constraints.positions
+        ]
+        if len(self.candidates) < 11:
+            raise ValueError(f"Poucos jogadores elegíveis: {len(self.candidates)}")
+
+        self.players = {p.id: p for p in self.candidates}
+        self.clubs = {p.club_id for p in self.candidates}
+        self.prob, self.player_vars = optimizer._build_model(self.candidates, base)
+        self.selected: Set[str] = set()
+        self.result: Optional[Dict[str, Any]] = None
+
+        for player_id in self.constraints.locked_players:
+            self._require_player(player_id)
+
+        self.result = self._solve()
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def apply(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Aplica uma lista de ajustes e reotimiza se necessário
+
+        Cada operação é {"op": ..., "player_id"/"club_id"/"budget": ...}. Se o
+        resultado ficar inviável, o estado anterior é restaurado.
+        """
+        start = time.perf_counter()
+        previous = (replace(self.constraints), self.captain_id)
+        needs_solve = False
+
+        try:
+            for operation in operations:
+                needs_solve |= self._apply(operation)
+
+            if needs_solve:
+                self.result = self._solve()
+            else:
+                self.result = self._current_result()
+        except Exception:
+            self.constraints, self.captain_id = previous
+            raise
+
+        self.result["session"].update({
+            "operations": len(operations),
+            "resolved": needs_solve,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+        return self.result
+
+    def _apply(self, operation: Dict[str, Any]) -> bool:
+        """Aplica um ajuste; retorna se o time atual pode deixar de ser ótimo"""
+        op = operation.get("op")
+        constraints = self.constraints
+
+        if op == "lock":
+            player_id = self._require_player(operation.get("player_id"))
+            if player_id in constraints.excluded_players:
+                constraints.excluded_players.remove(player_id)
+            if player_id not in constraints.locked_players:
+                constraints.locked_players.append(player_id)
+            return player_id not in self.selected
+
+        if op == "unlock":
+            player_id = self._require_player(operation.get("player_id"))
+            if player_id in constraints.locked_players:
+                constraints.locked_players.remove(player_id)
+                return True
+            return False
+
+        if op == "exclude":
+            player_id = self._require_player(operation.get("player_id"))
+            if player_id in constraints.locked_players:
+                constraints.locked_players.remove(player_id)
+            if player_id not in constraints.excluded_players:
+                constraints.excluded_players.append(player_id)
+            if self.captain_id == player_id:
+                self.captain_id = None
+            return player_id in self.selected
+
+        if op == "include":
+            player_id = self._require_player(operation.get("player_id"))
+            if player_id in constraints.excluded_players:
+                constraints.excluded_players.remove(player_id)
+                return True
+            return False
+
+        if op == "exclude_club":
+            club_id = self._require_club(operation.get("club_id"))
+            if club_id not in constraints.excluded_clubs:
+                constraints.excluded_clubs.append(club_id)
+            constraints.locked_players = [
+                pid for pid in constraints.locked_players if self.players[pid].club_id != club_id
+            ]
+            return any(self.players[pid].club_id == club_id for pid in self.selected)
+
+        if op == "include_club":
+            club_id = self._require_club(operation.get("club_id"))
+            if club_id in constraints.excluded_clubs:
+                constraints.excluded_clubs.remove(club_id)
+                return True
+            return False
+
+        if op == "budget":
+            budget = operation.get("budget")
+            if budget is None or budget <= 0:
+                raise ValueError("Orçamento deve ser positivo")
+            loosened = budget > constraints.budget
+            constraints.budget = float(budget)
+            return loosened or sum(self.players[pid].price for pid in self.selected) > budget
+
+        if op == "captain":
+            # Capitão fora do time é travado antes de ser escolhido
+            player_id = self._require_player(operation.get("player_id"))
+            self.captain_id = player_id
+            return self._apply({"op": "lock", "player_id": player_id})
+
+        raise ValueError(f"Operação inválida: {op} (válidas: {', '.join(SESSION_OPERATIONS)})")
+
+    def _require_player(self, player_id: Optional[str]) -> str:
+        if player_id not in self.players:
+            raise ValueError(f"Jogador não elegível nesta sessão: {player_id}")
+        return player_id
+
+    def _require_club(self, club_id: Optional[int]) -> int:
+        if club_id not in self.clubs:
+            raise ValueError(f"Clube sem jogadores nesta sessão: {club_id}")
+        return club_id
+
+    def _update_bounds(self) -> int:
+        """Traduz travas, exclusões, titularidade e dominância em limites; retorna quantos ficaram livres"""
+        constraints = self.constraints
+        locked = set(constraints.locked_players)
+        excluded = set(constraints.excluded_players)
+        excluded_clubs = set(constraints.excluded_clubs)
+
+        available = [
+            p for p in self.candidates
+            if p.id in locked or (
+                p.id not in excluded and
+                p.club_id not in excluded_clubs and
+                p.prob_starter >= constraints.min_prob_starter
+            )
+        ]
+        if self.optimizer.prune_dominated:
+            available = self.optimizer._prune_dominated_players(available, constraints)
+        available_ids = {p.id for p in available}
+
+        for player_id, var in self.player_vars.items():
+            var.lowBound = 1 if player_id in locked else 0
+            var.upBound = 1 if player_id in available_ids else 0
+
+        return len(available_ids)
+
+    def _solve(self) -> Dict[str, Any]:
+        """Reotimiza a partir do time atual (warm start)"""
+        start = time.perf_counter()
+        free_variables = self._update_bounds()
+        self.prob.constraints["budget"].changeRHS(self.constraints.budget)
+
+        # Time anterior como ponto de partida, ajustado aos novos limites
+        for player_id, var in self.player_vars.items():
+            var.setInitialValue(min(max(int(player_id in self.selected), var.lowBound), var.upBound))
+
+        self.prob.solve(pulp.PULP_CBC_CMD(msg=0, warmStart=bool(self.selected)))
+        self.solves += 1
+
+        if self.prob.status != pulp.LpStatusOptimal:
+            # apply() restaura as restrições; os limites são recalculados no próximo solve
+            raise ValueError(f"Ajuste torna o time inviável: {pulp.LpStatus[self.prob.status]}")
+
+        self.selected = {pid for pid, var in self.player_vars.items() if var.varValue > 0.5}
+
+        result = self._current_result()
+        result["model_stats"] = {
+            "model_variables": len(self.candidates),
+            "free_variables": free_variables
+        }
+        result["solver"] = {
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "objective": round(pulp.value(self.prob.objective), 4)
+        }
+        return result
+
+    def _current_result(self) -> Dict[str, Any]:
+        """Resultado do time atual, com o capitão escolhido pelo usuário"""
+        result = self.optimizer._build_result([self.players[pid] for pid in self.selected], self.constraints)
+
+        if self.captain_id in self.selected:
+            previous_captain = next(p["id"] for p in result["players"] if p["is_captain"])
+            if self.captain_id != previous_captain:
+                # O capitão anterior só vira vice se o novo capitão era o vice
+                was_vice = next(p["is_vice_captain"] for p in result["players"] if p["id"] == self.captain_id)
+                for player in result["players"]:
+                    if player["id"] == self.captain_id:
+                        player["is_captain"], player["is_vice_captain"] = True, False
+                    elif player["id"] == previous_captain:
+                        player["is_captain"], player["is_vice_captain"] = False, was_vice
+
+        for key in ("model_stats", "solver"):
+            if self.result and key in self.result and key not in result:
+                result[key] = self.result[key]
+
+        result["session"] = {"session_id": self.id, "solves": self.solves, "captain_id": self.captain_id}
+        return result
+
+class OptimizationSessionManager:
+    """Sessões interativas em memória, descartadas após ttl_seconds sem uso"""
+
+    def __init__(self,
+                 engine: SuperMittosOptimizationEngine,
+                 ttl_seconds: float = 900,
+                 max_sessions: int = 200):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, OptimizationSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self,
+               strategy: OptimizationStrategy,
+               constraints: OptimizationConstraints,
+               round_number: Optional[int] = None) -> OptimizationSession:
+        """Carrega o pool, monta o modelo e resolve o time inicial"""
+        players = self.engine.load_players(round_number)
+        optimizer = self.engine.create_optimizer(strategy, round_number)
+        session = OptimizationSession(str(uuid.uuid4()), optimizer, players, constraints, round_number)
+
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+                del self._sessions[oldest.id]
+            self._sessions[session.id] = session
+
+        logger.info(f"Sessão {session.id} criada ({len(session.candidates)} jogadores)")
+        return session
+
+    def get(self, session_id: str) -> Optional[OptimizationSession]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session:
+                session.touch()
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        """Remove sessões inativas (chamado com lock)"""
+        now = time.monotonic()
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl_seconds]
+        for session_id in expired:
+            del self._sessions[session_id]
+        if expired:
+            logger.info(f"{len(expired)} sessões expiradas")
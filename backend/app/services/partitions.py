@@ -0,0 +1,104 @@
+"""
+SuperMittos Partitions
+Partições por rodada das tabelas do mercado, compartilhadas pela API e pelo ETL
+Criação sob demanda (ensure_round_partitions) e listagem; a retenção fica no
+PartitionManager do ETL (etl/partition_manager.py)
+"""
+
+import re
+from datetime import date, datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+ROUND_TABLES = ("estatisticas_rodada", "historico_precos", "predicoes", "sugestoes_times", "sugestoes_jogadores")
+
+# Sugestões de rodadas passadas não são arquivadas; sugestoes_jogadores
+# referencia sugestoes_times e sai primeiro
+SUGGESTION_TABLES = ("sugestoes_jogadores", "sugestoes_times")
+
+SNAPSHOT_TABLE = "players_merged"
+
+ROUND_PARTITION = re.compile(r"^(?P<table>%s)_(?P<season>\w+?)_r(?P<round>\d+)$" % "|".join(ROUND_TABLES))
+SNAPSHOT_PARTITION = re.compile(r"^%s_p(?P<day>\d{8})$" % SNAPSHOT_TABLE)
+
+# Tabelas do schema corrente com a tabela-mãe, quando anexadas
+PARTITIONS_QUERY = """
+SELECT c.relname, p.relname AS parent, COALESCE(i.inhdetachpending, false) AS pending
+FROM pg_class c
+LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+LEFT JOIN pg_class p ON p.oid = i.inhparent
+WHERE c.relnamespace = current_schema()::regnamespace
+  AND c.relkind = 'r'
+  AND c.relname ~ :pattern
+"""
+
+class Partition(NamedTuple):
+    table: str
+    name: str
+    attached: bool
+    pending: bool  # DETACH CONCURRENTLY interrompido: falta o FINALIZE
+    season: Optional[str] = None
+    round: Optional[int] = None
+    day: Optional[date] = None
+
+def list_partitions(conn) -> List[Partition]:
+    """Partições por rodada e de snapshot do schema, anexadas ou arquivadas"""
+    pattern = "^(%s)_" % "|".join(ROUND_TABLES + (SNAPSHOT_TABLE,))
+    partitions = []
+    for name, parent, pending in conn.execute(text(PARTITIONS_QUERY), {"pattern": pattern}):
+        by_round = ROUND_PARTITION.match(name)
+        by_day = SNAPSHOT_PARTITION.match(name)
+        if by_round:
+            partitions.append(Partition(
+                by_round["table"], name, parent is not None, pending,
+                season=by_round["season"], round=int(by_round["round"])
+            ))
+        elif by_day:
+            partitions.append(Partition(
+                SNAPSHOT_TABLE, name, parent is not None, pending,
+                day=datetime.strptime(by_day["day"], "%Y%m%d").date()
+            ))
+    return partitions
+
+def current_season(conn) -> str:
+    """Temporada do último status do mercado (ano corrente, sem status)"""
+    season = conn.execute(text("SELECT temporada FROM mercado_status ORDER BY created_at DESC LIMIT 1")).scalar()
+    return str(season or date.today().year)
+
+def ensure_round_partitions(conn,
+                            rounds: Iterable[int],
+                            season: Optional[str] = None,
+                            tables: Iterable[str] = ROUND_TABLES) -> List[str]:
+    """
+    Cria as partições que faltam para as rodadas; retorna as criadas
+
+    Rodada com partição anexada (de qualquer temporada) é mantida: a virada de
+    temporada é do PartitionManager.rollover. A temporada das partições novas
+    é a das já anexadas; sem nenhuma, season ou a do último status do mercado.
+    Roda na transação de quem chamou: criar partição bloqueia a tabela-mãe até
+    o commit, então só acontece uma vez por rodada.
+    """
+    if conn.dialect.name != "postgresql":
+        return []  # SQLite dos benchmarks: tabelas sem partições
+
+    partitions = list_partitions(conn)
+    attached = {(partition.table, partition.round) for partition in partitions if partition.attached}
+    missing = [(table, int(round_number)) for round_number in set(rounds) for table in tables
+               if (table, int(round_number)) not in attached]
+    if not missing:
+        return []
+
+    season = str(season) if season else None
+    attached_seasons = {partition.season for partition in partitions if partition.attached and partition.season}
+    if attached_seasons and season not in attached_seasons:
+        season = max(attached_seasons)
+    season = season or current_season(conn)
+    if not re.fullmatch(r"\w+", season):
+        raise ValueError(f"Temporada inválida para nome de partição: {season!r}")
+
+    return [
+        conn.execute(text("SELECT criar_particao_rodada(:tabela, :temporada, :rodada)"),
+                     {"tabela": table, "temporada": season, "rodada": round_number}).scalar()
+        for table, round_number in sorted(missing)
+    ]
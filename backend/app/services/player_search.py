@@ -0,0 +1,201 @@
+"""
+SuperMittos Player Search
+Busca de jogadores por nome e apelido: autocomplete por prefixo em memória e
+busca aproximada por trigramas (pg_trgm) no banco
+
+A busca passa pelo DataNormalizer.normalize_name do ETL, o mesmo que gravou
+nome_normalizado e apelido_normalizado, então acento e caixa não contam. O
+índice de prefixos é reconstruído depois de cada ETL que carrega jogadores e
+trocado por inteiro (como o MarketStore): uma busca nunca vê um índice pela metade.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from etl.supermittos_etl import DataNormalizer
+from services.queries import SEARCH_FUZZY_QUERY, SEARCH_INDEX_QUERY
+
+logger = logging.getLogger(__name__)
+
+# Peso da popularidade (0-1) na nota dos resultados; o resto é a similaridade
+POPULARITY_WEIGHT = 0.3
+
+# Candidatos lidos do banco por resultado pedido na busca aproximada (reordenados pela nota)
+FUZZY_CANDIDATES = 3
+
+# Colunas de cada resultado (as mesmas nas duas buscas)
+RESULT_COLUMNS = ("id", "cartola_id", "name", "nickname", "club_name", "position_abbrev", "avg_score")
+
+class _Node:
+    __slots__ = ("children", "players", "exact")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.players: Any = set()  # Jogadores com alguma palavra com este prefixo
+        self.exact: Any = set()    # Jogadores com uma palavra exatamente igual
+
+@dataclass(frozen=True)
+class PrefixIndex:
+    """
+    Trie das palavras de nome e apelido normalizados
+
+    Cada nó guarda os jogadores do seu prefixo já em ordem de popularidade:
+    completar uma palavra custa o tamanho da palavra mais o limite, não o
+    número de jogadores.
+    """
+    root: _Node
+    players: List[Dict[str, Any]]
+    words: List[Tuple[str, ...]]
+    popularity: Dict[str, float]
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "PrefixIndex":
+        # Índice na lista = posição no ranking de popularidade
+        rows = sorted(rows, key=lambda row: -(row["popularity"] or 0.0))
+        root = _Node()
+        words_by_player = []
+        for position, row in enumerate(rows):
+            words = tuple(set(row["nome_normalizado"].split()) | set(row["apelido_normalizado"].split()))
+            words_by_player.append(words)
+            for word in words:
+                node = root
+                for char in word:
+                    node = node.children.setdefault(char, _Node())
+                    node.players.add(position)
+                node.exact.add(position)
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.players = tuple(sorted(node.players))
+            node.exact = tuple(sorted(node.exact))
+            stack.extend(node.children.values())
+
+        players = [{column: row[column] for column in RESULT_COLUMNS} for row in rows]
+        popularity = {row["id"]: float(row["popularity"] or 0.0) for row in rows}
+        return cls(root=root, players=players, words=words_by_player, popularity=popularity)
+
+    def find(self, word: str) -> Optional[_Node]:
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, normalized: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Jogadores em que cada palavra da busca é prefixo de alguma palavra do
+        nome ou apelido: palavra exata antes de prefixo, depois por popularidade
+        """
+        words = normalized.split()
+        nodes = [self.find(word) for word in words]
+        if not words or any(node is None for node in nodes):
+            return []
+
+        if len(nodes) == 1:
+            node = nodes[0]
+            tiers = [(node.exact, "exact"), (node.players, "prefix")]
+            filters = []
+        else:
+            # Percorre o menor conjunto e confere os outros
+            nodes.sort(key=lambda node: len(node.players))
+            tiers = [(nodes[0].players, "prefix")]
+            filters = [set(node.players) for node in nodes[1:]]
+
+        results, seen = [], set()
+        for positions, match in tiers:
+            for position in positions:
+                if position in seen or any(position not in allowed for allowed in filters):
+                    continue
+                seen.add(position)
+                player = self.players[position]
+                results.append({**player, "match": match,
+                                "score": score(self._similarity(words, position), self.popularity[player["id"]])})
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _similarity(self, words: List[str], position: int) -> float:
+        """Fração das palavras do jogador já digitada (a palavra mais curta que completa cada uma)"""
+        fractions = [
+            max((len(word) / len(candidate) for candidate in self.words[position] if candidate.startswith(word)),
+                default=0.0)
+            for word in words
+        ]
+        return sum(fractions) / len(fractions)
+
+def score(similarity: float, popularity: float) -> float:
+    """Nota de um resultado: similaridade (0-1) ponderada com a popularidade (0-1)"""
+    return round((1 - POPULARITY_WEIGHT) * similarity + POPULARITY_WEIGHT * popularity, 4)
+
+class PlayerSearch:
+    """Índice de prefixos vigente e a busca aproximada no banco"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._index: Optional[PrefixIndex] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Optional[PrefixIndex]:
+        if self._index is None:
+            self.refresh()
+        return self._index
+
+    def refresh(self) -> bool:
+        """Reconstrói o índice a partir dos jogadores ativos; retorna se carregou"""
+        with self._lock:
+            try:
+                with self.engine.connect() as conn:
+                    rows = [dict(row) for row in conn.execute(text(SEARCH_INDEX_QUERY)).mappings()]
+            except Exception as e:
+                logger.warning(f"Índice de busca de jogadores não atualizado: {e}")
+                return False
+            index = PrefixIndex.from_rows(rows)
+            self._index = index  # Troca atômica
+
+        logger.info(f"Índice de busca atualizado: {len(index.players)} jogadores")
+        return True
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """Autocomplete em memória, completado pela busca aproximada se faltarem resultados"""
+        normalized = DataNormalizer.normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+
+        index = self.index
+        results = index.complete(normalized, limit) if index else []
+        if fuzzy and len(results) < limit:
+            found = {result["id"] for result in results}
+            popularity = index.popularity if index else {}
+            extra = [row for row in self._fuzzy(normalized, limit) if row["id"] not in found]
+            for row in extra:
+                row["score"] = score(row.pop("similarity"), popularity.get(row["id"], 0.0))
+                row["match"] = "fuzzy"
+            extra.sort(key=lambda row: -row["score"])
+            results += extra[:limit - len(results)]
+        return results
+
+    def _fuzzy(self, normalized: str, limit: int) -> List[Dict[str, Any]]:
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text(SEARCH_FUZZY_QUERY), {"q": normalized, "candidates": limit * FUZZY_CANDIDATES})
+                return [dict(row) for row in rows.mappings()]
+        except Exception as e:
+            logger.warning(f"Busca aproximada indisponível: {e}")
+            return []
+
+    def status(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "loaded": index is not None,
+            "players": len(index.players) if index else 0,
+            "loaded_at": index.loaded_at.isoformat() if index else None
+        }
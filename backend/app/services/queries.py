@@ -0,0 +1,313 @@
+"""
+SuperMittos Queries
+Consultas SQL da API, do otimizador, das parciais e da busca de jogadores
+Compartilhadas com o benchmark de planos (benchmarks/query_plans.py), que roda
+EXPLAIN exatamente no SQL que a aplicação executa
+
+Consultas com filtros opcionais têm a base, um filtro por parâmetro e a
+ordenação; filtered_query monta a mesma combinação nos dois lados.
+"""
+
+from typing import Any, Dict
+
+# ================================
+# JOGADORES
+# ================================
+
+# Colunas já no formato de PlayerResponse: as linhas vão direto para a resposta
+PLAYERS_QUERY = """
+SELECT
+    CAST(id AS TEXT) as id,
+    jogador_id as cartola_id,
+    nome as name,
+    apelido as nickname,
+    clube_nome as club_name,
+    COALESCE(posicao_nome, '') as position_name,
+    COALESCE(posicao_abrev, '') as position_abbrev,
+    preco_atual as current_price,
+    media_pontos as avg_score,
+    forma_recente as recent_form,
+    consistencia as consistency,
+    prob_titular as prob_starter,
+    status_ativo as active
+FROM vw_jogadores_completo
+WHERE status_ativo = true
+"""
+
+PLAYERS_FILTERS = {
+    "position": " AND posicao_abrev = :position",
+    "club_id": " AND clube_id = :club_id",
+    "min_price": " AND preco_atual >= :min_price",
+    "max_price": " AND preco_atual <= :max_price"
+}
+
+PLAYERS_ORDER = " ORDER BY media_pontos DESC NULLS LAST LIMIT :limit"
+
+PLAYER_DETAIL_QUERY = """
+SELECT * FROM vw_jogadores_completo
+WHERE id = :player_id
+"""
+
+PLAYER_STATS_QUERY = """
+SELECT
+    CAST(jogador_id AS TEXT) as player_id,
+    rodada as round_number,
+    pontos_cartola as cartola_points,
+    preco as price,
+    COALESCE(jogou, false) as played,
+    COALESCE(minutos_jogados, 0) as minutes,
+    COALESCE(gols, 0) as goals,
+    COALESCE(assistencias, 0) as assists,
+    xg,
+    xa,
+    rating
+FROM estatisticas_rodada
+WHERE jogador_id = :player_id
+"""
+
+PLAYER_STATS_FILTERS = {
+    "round_start": " AND rodada >= :round_start",
+    "round_end": " AND rodada <= :round_end"
+}
+
+PLAYER_STATS_ORDER = " ORDER BY rodada DESC LIMIT :limit"
+
+# Jogadores ativos do índice da busca; popularidade = posição (0-1) nos pontos da temporada
+SEARCH_INDEX_QUERY = """
+SELECT CAST(j.id AS TEXT) as id, j.jogador_id as cartola_id, j.nome as name, j.apelido as nickname,
+       c.nome as club_name, COALESCE(p.abreviacao, '') as position_abbrev, eh.media_pontos as avg_score,
+       j.nome_normalizado, COALESCE(j.apelido_normalizado, '') as apelido_normalizado,
+       percent_rank() OVER (ORDER BY COALESCE(eh.jogos * eh.media_pontos, 0), j.jogador_id DESC) as popularity
+FROM jogadores j
+LEFT JOIN clubes c ON c.clube_id = j.clube_id
+LEFT JOIN posicoes p ON p.posicao_id = j.posicao_id
+LEFT JOIN estatisticas_historicas eh ON eh.jogador_id = j.id AND eh.periodo = 'temporada'
+    AND eh.temporada = (SELECT MAX(temporada) FROM estatisticas_historicas)
+WHERE j.status_ativo = true
+"""
+
+# word_similarity: a busca é comparada com o trecho mais parecido do nome (nome
+# digitado pela metade ou com erro); <% usa os índices GIN de trigramas
+SEARCH_FUZZY_QUERY = """
+SELECT CAST(j.id AS TEXT) as id, j.jogador_id as cartola_id, j.nome as name, j.apelido as nickname,
+       c.nome as club_name, COALESCE(p.abreviacao, '') as position_abbrev, eh.media_pontos as avg_score,
+       GREATEST(word_similarity(:q, j.nome_normalizado),
+                word_similarity(:q, COALESCE(j.apelido_normalizado, ''))) as similarity
+FROM jogadores j
+LEFT JOIN clubes c ON c.clube_id = j.clube_id
+LEFT JOIN posicoes p ON p.posicao_id = j.posicao_id
+LEFT JOIN estatisticas_historicas eh ON eh.jogador_id = j.id AND eh.periodo = 'temporada'
+    AND eh.temporada = (SELECT MAX(temporada) FROM estatisticas_historicas)
+WHERE j.status_ativo = true
+  AND (:q <% j.nome_normalizado OR :q <% j.apelido_normalizado)
+ORDER BY similarity DESC
+LIMIT :candidates
+"""
+
+# ================================
+# MERCADO
+# ================================
+
+MARKET_STATUS_QUERY = "SELECT * FROM mercado_status ORDER BY created_at DESC LIMIT 1"
+
+CURRENT_ROUND_QUERY = "SELECT MAX(rodada_atual) FROM mercado_status"
+
+# Variação média de preço por rodada nas últimas :lookback rodadas
+PRICE_TRENDS_QUERY = """
+SELECT jogador_id, AVG(COALESCE(variacao, 0)) as trend
+FROM historico_precos
+WHERE rodada <= :round_number
+  AND rodada > :round_number - :lookback
+GROUP BY jogador_id
+"""
+
+# Mercado ativo do otimizador (snapshot colunar e fallback do banco)
+MARKET_PLAYERS_QUERY = """
+SELECT
+    j.id,
+    j.jogador_id,
+    j.nome,
+    j.apelido,
+    j.posicao_nome,
+    j.posicao_abrev,
+    j.clube_id,
+    j.clube_nome,
+    j.preco_atual as price,
+    j.media_pontos as avg_score,
+    j.forma_recente,
+    j.consistencia,
+    j.prob_titular,
+    COALESCE(pe.lesionado, false) as injured,
+    COALESCE(pe.suspenso, false) as suspended,
+    pr.valor_predito,
+    pr.intervalo_min,
+    pr.intervalo_max
+FROM vw_jogadores_completo j
+LEFT JOIN (
+    -- Uma linha por jogador: qualquer fonte que aponte lesão/suspensão vale
+    SELECT jogador_id,
+           MAX(CAST(lesionado AS INTEGER)) = 1 as lesionado,
+           MAX(CAST(suspenso AS INTEGER)) = 1 as suspenso
+    FROM provaveis_escalacoes
+    WHERE rodada = COALESCE(:round_number, (SELECT MAX(rodada_atual) FROM mercado_status))
+    GROUP BY jogador_id
+) pe ON j.id = pe.jogador_id
+LEFT JOIN (
+    -- Predições do modelo de pontuação ativo (gravadas em lote pelo ETL)
+    SELECT jogador_id, valor_predito, intervalo_min, intervalo_max
+    FROM predicoes
+    WHERE rodada = COALESCE(:round_number, (SELECT MAX(rodada_atual) FROM mercado_status))
+      AND modelo_id = (
+          SELECT id FROM modelos_predicao
+          WHERE tipo = 'pontuacao' AND ativo = true
+          ORDER BY created_at DESC
+          LIMIT 1
+      )
+) pr ON j.id = pr.jogador_id
+WHERE j.status_ativo = true
+"""
+
+# ================================
+# SUGESTÕES
+# ================================
+
+SUGGESTIONS_QUERY = """
+SELECT
+    CAST(id AS TEXT) as id,
+    rodada as round_number,
+    COALESCE(esquema_tatico, '3-4-3') as formation,
+    COALESCE(estrategia, 'balanced') as strategy,
+    pontuacao_esperada as expected_score,
+    custo_total as total_cost,
+    roi_esperado as expected_roi,
+    created_at
+FROM sugestoes_times
+WHERE 1=1
+"""
+
+SUGGESTIONS_FILTERS = {
+    "round_number": " AND rodada = :round_number",
+    "strategy": " AND estrategia = :strategy"
+}
+
+SUGGESTIONS_ORDER = " ORDER BY pontuacao_esperada DESC NULLS LAST LIMIT :limit"
+
+SUGGESTION_DETAIL_QUERY = """
+SELECT
+    id,
+    rodada as round_number,
+    esquema_tatico as formation,
+    estrategia as strategy,
+    pontuacao_esperada as expected_score,
+    custo_total as total_cost,
+    roi_esperado as expected_roi,
+    created_at
+FROM sugestoes_times
+WHERE id = :suggestion_id
+"""
+
+SUGGESTION_ROUND_QUERY = "SELECT rodada FROM sugestoes_times WHERE id = :suggestion_id"
+
+# Jogadores da sugestão (rodada da sugestão: lê só a partição dela)
+SUGGESTION_PLAYERS_QUERY = """
+SELECT
+    sj.jogador_id as player_id,
+    j.nome as player_name,
+    sj.posicao_time as position,
+    sj.pontos_esperados as expected_points,
+    sj.preco as price,
+    sj.capitao as captain,
+    sj.vice_capitao as vice_captain
+FROM sugestoes_jogadores sj
+JOIN jogadores j ON sj.jogador_id = j.id
+WHERE sj.sugestao_id = :suggestion_id AND sj.rodada = :round_number
+ORDER BY
+    CASE sj.posicao_time
+        WHEN 'GOL' THEN 1
+        WHEN 'DEF' THEN 2
+        WHEN 'MID' THEN 3
+        WHEN 'ATA' THEN 4
+        ELSE 5
+    END
+"""
+
+SUGGESTION_SIMULATION_QUERY = """
+SELECT
+    sj.jogador_id as player_id,
+    sj.pontos_esperados as expected_points,
+    sj.capitao as captain,
+    j.consistencia,
+    j.prob_titular
+FROM sugestoes_jogadores sj
+LEFT JOIN vw_jogadores_completo j ON sj.jogador_id = j.id
+WHERE sj.sugestao_id = :suggestion_id AND sj.rodada = :round_number
+ORDER BY sj.jogador_id
+"""
+
+# Escalações da rodada para o índice invertido das parciais ao vivo
+LIVE_LINEUPS_QUERY = """
+SELECT sj.sugestao_id, j.jogador_id as cartola_id, sj.capitao
+FROM sugestoes_jogadores sj
+JOIN sugestoes_times st ON st.id = sj.sugestao_id AND st.rodada = sj.rodada
+JOIN jogadores j ON j.id = sj.jogador_id
+WHERE sj.rodada = :round_number
+"""
+
+# ================================
+# ANALYTICS
+# ================================
+
+TOP_PERFORMERS_QUERY = """
+SELECT
+    nome,
+    apelido,
+    clube_nome,
+    posicao_abrev,
+    media_pontos,
+    forma_recente,
+    preco_atual,
+    (media_pontos / NULLIF(preco_atual, 0)) as roi
+FROM vw_jogadores_completo
+WHERE status_ativo = true
+  AND media_pontos IS NOT NULL
+"""
+
+TOP_PERFORMERS_FILTERS = {
+    "position": " AND posicao_abrev = :position"
+}
+
+# Métrica -> expressão de ordenação (só valores desta tabela entram no SQL)
+TOP_PERFORMERS_METRICS = {
+    "avg_score": "media_pontos",
+    "recent_form": "forma_recente",
+    "roi": "(media_pontos / NULLIF(preco_atual, 0))"
+}
+
+def top_performers_order(metric: str) -> str:
+    return f" ORDER BY {TOP_PERFORMERS_METRICS[metric]} DESC NULLS LAST LIMIT :limit"
+
+DASHBOARD_TOTAL_PLAYERS_QUERY = "SELECT COUNT(*) as count FROM jogadores WHERE status_ativo = true"
+
+DASHBOARD_MARKET_STATS_QUERY = """
+SELECT
+    AVG(preco_atual) as avg_price,
+    MIN(preco_atual) as min_price,
+    MAX(preco_atual) as max_price
+FROM vw_jogadores_completo
+WHERE preco_atual IS NOT NULL
+"""
+
+DASHBOARD_POSITIONS_QUERY = """
+SELECT
+    posicao_abrev as position,
+    COUNT(*) as count,
+    AVG(media_pontos) as avg_score
+FROM vw_jogadores_completo
+WHERE status_ativo = true
+GROUP BY posicao_abrev
+ORDER BY position
+"""
+
+def filtered_query(base: str, filters: Dict[str, str], params: Dict[str, Any], order: str) -> str:
+    """Base + o filtro de cada parâmetro presente em params (na ordem de filters) + ordenação"""
+    return base + "".join(clause for key, clause in filters.items() if key in params) + order
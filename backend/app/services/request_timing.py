@@ -0,0 +1,75 @@
+"""
+SuperMittos Request Timing
+Cabeçalho Server-Timing com o tempo gasto no banco e o total de cada requisição
+
+Os eventos de cursor do SQLAlchemy somam a duração das consultas num
+acumulador guardado em contextvar; o middleware cria o acumulador por
+requisição e escreve o cabeçalho quando a resposta começa. Endpoints síncronos
+rodam no threadpool com cópia do contexto, então enxergam o mesmo acumulador.
+Trabalho em threads próprias (jobs de otimização, agendador do ETL) não entra.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+class RequestTiming:
+    """Acumulador do tempo de banco de uma requisição"""
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+
+    def header(self, total_seconds: float) -> str:
+        return (f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} consultas", '
+                f'total;dur={total_seconds * 1000:.2f}')
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current.get()
+
+def instrument_engine(engine):
+    """Mede cada execução de cursor da engine na requisição corrente"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        timing = _current.get()
+        if timing is not None and started is not None:
+            timing.db_seconds += time.perf_counter() - started
+            timing.queries += 1
+
+class ServerTimingMiddleware:
+    """Middleware ASGI: Server-Timing (db e total) em todas as respostas HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.header(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
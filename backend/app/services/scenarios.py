@@ -0,0 +1,148 @@
+"""
+SuperMittos Scenarios
+Geração de cenários conjuntos de pontuação a partir do histórico de estatisticas_rodada
+Usados pela estratégia robusta (CVaR) do otimizador
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScenarioSet:
+    """Cenários reduzidos (amostras reais): desvios de pontuação por jogador em cada cenário"""
+    player_ids: List[str]
+    deviations: np.ndarray     # (jogadores, cenários) desvio em relação à média do jogador
+    probabilities: np.ndarray  # (cenários,) somam 1
+    round_number: int
+    sampled_scenarios: int     # Cenários amostrados antes da redução
+
+    def __post_init__(self):
+        self._index = {player_id: i for i, player_id in enumerate(self.player_ids)}
+
+    @property
+    def n_scenarios(self) -> int:
+        return len(self.probabilities)
+
+    def deviations_for(self, player_ids: List[str]) -> np.ndarray:
+        """Desvios (jogadores x cenários) na ordem pedida; jogadores sem histórico têm desvio zero"""
+        rows = np.array([self._index.get(player_id, -1) for player_id in player_ids], dtype=int)
+        out = np.zeros((len(player_ids), self.n_scenarios))
+        known = rows >= 0
+        out[known] = self.deviations[rows[known]]
+        return out
+
+def generate_scenarios(history: pd.DataFrame,
+                       round_number: int,
+                       n_samples: int = 2000,
+                       n_scenarios: int = 50,
+                       half_life_rounds: float = 10.0,
+                       seed: Optional[int] = 42) -> ScenarioSet:
+    """
+    Gera cenários conjuntos por bootstrap de rodadas em blocos por clube
+
+    history tem uma linha por (jogador_id, rodada, clube_id, pontos). Em cada
+    cenário amostrado, cada clube recebe uma rodada histórica (rodadas recentes
+    pesam mais) e todos os seus jogadores usam os desvios daquela rodada, o que
+    preserva a correlação entre jogadores do mesmo clube. Depois os cenários
+    são reduzidos a n_scenarios amostras reais, uma por estrato de desvio total.
+    """
+    if history.empty:
+        raise ValueError("Histórico vazio: não há como gerar cenários")
+
+    player_codes, player_ids = pd.factorize(history["jogador_id"].astype(str))
+    round_codes, rounds = pd.factorize(history["rodada"], sort=True)
+    points = np.full((len(player_ids), len(rounds)), np.nan)
+    points[player_codes, round_codes] = history["pontos"].to_numpy(dtype=float)
+
+    # Desvio em relação à média do jogador; rodadas sem registro não trazem informação
+    means = np.nanmean(points, axis=1, keepdims=True)
+    deviations = np.nan_to_num(points - means, nan=0.0)
+
+    # Clube atual de cada jogador (último registro)
+    latest = history.sort_values("rodada").groupby(history["jogador_id"].astype(str))["clube_id"].last()
+    club_codes, _ = pd.factorize(latest.reindex(player_ids).fillna(-1).to_numpy())
+
+    # Pesos de recência por rodada
+    age = rounds.to_numpy().max() - rounds.to_numpy()
+    weights = 0.5 ** (age / half_life_rounds)
+    weights = weights / weights.sum()
+
+    rng = np.random.default_rng(seed)
+    sampled_rounds = rng.choice(len(rounds), size=(n_samples, club_codes.max() + 1), p=weights)
+    samples = deviations[np.arange(len(player_ids))[None, :], sampled_rounds[:, club_codes]]  # (amostras, jogadores)
+
+    scenarios, probabilities = reduce_scenarios(samples, min(n_scenarios, n_samples), rng)
+
+    logger.info(f"Cenários gerados para a rodada {round_number}: {n_samples} amostras -> {len(probabilities)}")
+    return ScenarioSet(
+        player_ids=list(player_ids),
+        deviations=scenarios.T,
+        probabilities=probabilities,
+        round_number=round_number,
+        sampled_scenarios=n_samples
+    )
+
+def reduce_scenarios(samples: np.ndarray,
+                     k: int,
+                     rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Redução estratificada: retorna (cenários k x jogadores, probabilidades)
+
+    As amostras são ordenadas pelo desvio total e divididas em k estratos de
+    mesmo tamanho; cada estrato é representado por uma amostra real sorteada
+    nele, com a probabilidade do estrato. Centroides (k-means) e medoides
+    puxam os cenários para o centro da distribuição e apagam a cauda que o
+    CVaR mede; os estratos garantem representantes nas rodadas ruins.
+    """
+    strata = np.array_split(np.argsort(samples.sum(axis=1), kind="stable"), k)
+    chosen = np.array([rng.choice(stratum) for stratum in strata])
+    probabilities = np.array([len(stratum) for stratum in strata]) / len(samples)
+
+    # Desvio médio zero por jogador: poucos cenários não podem favorecer um
+    # jogador na média, só na dispersão
+    scenarios = samples[chosen] - probabilities @ samples[chosen]
+    return scenarios, probabilities
+
+def load_round_history(engine, round_number: int, lookback_rounds: int = 38) -> pd.DataFrame:
+    """Pontuações do Cartola nas rodadas anteriores a round_number"""
+    query = """
+    SELECT
+        er.jogador_id,
+        er.rodada,
+        j.clube_id,
+        COALESCE(er.pontos_cartola, 0) as pontos
+    FROM estatisticas_rodada er
+    JOIN jogadores j ON er.jogador_id = j.id
+    WHERE er.fonte = 'cartola'
+      AND er.rodada < :round_number
+      AND er.rodada >= :round_number - :lookback
+    """
+
+    with engine.connect() as conn:
+        return pd.read_sql(text(query), conn, params={"round_number": round_number, "lookback": lookback_rounds})
+
+class ScenarioCache:
+    """Cache de cenários por rodada, compartilhado por todos os usuários do processo"""
+
+    def __init__(self):
+        self._scenarios: Dict[int, ScenarioSet] = {}
+        self._lock = threading.Lock()
+
+    def get(self, round_number: int, build: Callable[[int], ScenarioSet]) -> ScenarioSet:
+        with self._lock:
+            if round_number not in self._scenarios:
+                self._scenarios[round_number] = build(round_number)
+                # Mantém apenas as rodadas mais recentes
+                for old in sorted(self._scenarios)[:-2]:
+                    del self._scenarios[old]
+            return self._scenarios[round_number]
+
+scenario_cache = ScenarioCache()
@@ -0,0 +1,85 @@
+"""
+SuperMittos Serialization
+Respostas de listagem montadas direto das linhas do banco, sem um modelo
+Pydantic por linha
+
+As consultas já devolvem as colunas com os nomes e defaults do contrato da
+API (aliases e COALESCE no SQL), então as linhas são confiáveis e vão direto
+para bytes com orjson. MessagePack é servido quando o cliente pede no Accept.
+Sem orjson/msgpack instalados, cai no json da biblioteca padrão.
+"""
+
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def _default(value: Any) -> Any:
+    """Tipos que os drivers devolvem e os encoders não conhecem"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps_json(data: Any) -> bytes:
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps_json(data: Any) -> bytes:
+        return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_msgpack(data: Any) -> bytes:
+    return msgpack.packb(data, default=_default, use_bin_type=True)
+
+def rows_to_dicts(result: Iterable) -> List[dict]:
+    """Linhas de um Result do SQLAlchemy como dicts, usando os nomes das colunas"""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Accept pede MessagePack (e o pacote está disponível)"""
+    if msgpack is None or not accept:
+        return False
+    accepted = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    return any(media_type in accepted for media_type in MSGPACK_MEDIA_TYPES)
+
+class FastJSONResponse(Response):
+    """JSONResponse com orjson (usado como classe padrão de resposta da API)"""
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+def negotiated_response(data: Any, accept: Optional[str] = None, status_code: int = 200) -> Response:
+    """Serializa sem validação, em MessagePack ou JSON conforme o Accept"""
+    if wants_msgpack(accept):
+        return Response(dumps_msgpack(data), status_code=status_code,
+                        media_type=MSGPACK_MEDIA_TYPES[0], headers={"Vary": "Accept"})
+    return Response(dumps_json(data), status_code=status_code,
+                    media_type=JSON_MEDIA_TYPE, headers={"Vary": "Accept"})
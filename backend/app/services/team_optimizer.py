@@ -8,20 +8,70 @@ import pulp
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 import logging
+from bisect import bisect_left, insort
 from datetime import datetime
 import json
-from sqlalchemy import create_engine, text
+import time
+import uuid
+from sqlalchemy import create_engine, text, insert, table, column
 import os
 
+from services.partitions import SUGGESTION_TABLES, ensure_round_partitions
+from services.queries import CURRENT_ROUND_QUERY, MARKET_PLAYERS_QUERY, PRICE_TRENDS_QUERY
+from services.heuristic_optimizer import LineupProblem, solve_heuristic
+from services.scenarios import ScenarioSet, generate_scenarios, load_round_history, scenario_cache
+from services.market_snapshot import (
+    MarketSnapshot, current_snapshot_name, open_snapshot, snapshot_root, write_snapshot
+)
+
 logger = logging.getLogger(__name__)
 
+# Tabelas de sugestões usadas na escrita em lote (INSERT multi-linha)
+SUGESTOES_TIMES_TABLE = table(
+    "sugestoes_times",
+    column("id"), column("rodada"), column("orcamento_maximo"), column("estrategia"),
+    column("esquema_tatico"), column("pontuacao_esperada"), column("custo_total"),
+    column("roi_esperado"), column("algoritmo_versao"), column("parametros")
+)
+
+SUGESTOES_JOGADORES_TABLE = table(
+    "sugestoes_jogadores",
+    column("id"), column("sugestao_id"), column("rodada"), column("jogador_id"), column("posicao_time"),
+    column("capitao"), column("vice_capitao"), column("pontos_esperados"),
+    column("preco"), column("roi_individual")
+)
+
+# Multiplicador da pontuação do capitão no Cartola (simulação e parciais ao vivo)
+CAPTAIN_MULTIPLIER = 1.5
+
+# Mapeia posições do banco para posições do otimizador
+POSITION_MAP = {
+    'Goleiro': 'GOL',
+    'Lateral': 'LAT',
+    'Zagueiro': 'ZAG',
+    'Meia': 'MEI',
+    'Atacante': 'ATA'
+}
+
+# Colunas do pool de jogadores (snapshot do mercado e consulta ao banco)
+PLAYER_COLUMNS = (
+    "id", "cartola_id", "name", "position", "club_id", "price", "avg_score",
+    "recent_form", "consistency", "prob_starter", "injured", "suspended",
+    "predicted_points", "predicted_min", "predicted_max"
+)
+
 class OptimizationStrategy(Enum):
     CONSERVATIVE = "conservative"  # Foco em consistência e baixo risco
     BALANCED = "balanced"         # Equilibrio entre risco e retorno
     AGGRESSIVE = "aggressive"     # Alto risco, alto retorno
+    ROBUST = "robust"             # Máximo esperado com restrição de CVaR sobre cenários
+
+class OptimizationMode(Enum):
+    EXACT = "exact"          # ILP resolvido pelo CBC (ótimo comprovado)
+    HEURISTIC = "heuristic"  # Guloso + busca local dentro de um orçamento de tempo
 
 class Formation(Enum):
     F_3_4_3 = "3-4-3"
@@ -50,6 +100,13 @@ class PlayerData:
     injured: bool = False
     suspended: bool = False
     
+    avg_score: float = 0.0  # Média histórica de pontos
+    
+    # Predição em lote do modelo ativo (predicoes), quando existe para a rodada
+    predicted_points: Optional[float] = None
+    predicted_min: Optional[float] = None
+    predicted_max: Optional[float] = None
+    
     def __post_init__(self):
         # Garantir que probabilidades estejam entre 0 e 1
         self.prob_starter = max(0, min(1, self.prob_starter))
@@ -62,12 +119,24 @@ class OptimizationConstraints:
     max_players_per_club: int = 3
     min_prob_starter: float = 0.6  # Mínimo de probabilidade de ser titular
     
+    # Estratégia robusta: média dos piores cvar_beta cenários >= cvar_ratio * pontos esperados
+    cvar_beta: float = 0.2
+    cvar_ratio: float = 0.75
+    
     # Restrições por posição (baseado na formação)
     positions: Dict[str, Tuple[int, int]] = None  # (min, max)
     
+    # Travas e exclusões definidas pelo usuário
+    locked_players: List[str] = None  # IDs que devem estar no time
+    excluded_players: List[str] = None  # IDs que não podem ser escalados
+    excluded_clubs: List[int] = None  # Clubes sem nenhum jogador escalado
+    
     def __post_init__(self):
         if self.positions is None:
             self.positions = self._get_formation_constraints()
+        self.locked_players = list(self.locked_players or [])
+        self.excluded_players = list(self.excluded_players or [])
+        self.excluded_clubs = list(self.excluded_clubs or [])
     
     def _get_formation_constraints(self) -> Dict[str, Tuple[int, int]]:
         """Define constraints por formação"""
@@ -161,13 +230,47 @@ class PointsPredictor:
         )
         
         return max(0, expected)
+    
+    def expected_from_prediction(self,
+                                 predicted: float,
+                                 predicted_min: Optional[float],
+                                 predicted_max: Optional[float]) -> float:
+        """
+        Pontos esperados a partir da predição em lote
+        
+        A estratégia escolhe o ponto do intervalo: conservadora puxa para o
+        limite inferior, agressiva para o superior.
+        """
+        if self.strategy == OptimizationStrategy.CONSERVATIVE and predicted_min is not None:
+            predicted = (predicted + predicted_min) / 2
+        elif self.strategy == OptimizationStrategy.AGGRESSIVE and predicted_max is not None:
+            predicted = (predicted + predicted_max) / 2
+        
+        return max(0, predicted)
 
 class TeamOptimizer:
     """Otimizador principal usando programação linear inteira"""
     
-    def __init__(self, strategy: OptimizationStrategy = OptimizationStrategy.BALANCED):
+    def __init__(self, 
+                 strategy: OptimizationStrategy = OptimizationStrategy.BALANCED,
+                 prune_dominated: bool = True,
+                 mode: OptimizationMode = OptimizationMode.EXACT,
+                 time_budget_ms: float = 50.0,
+                 scenarios: Optional[ScenarioSet] = None):
         self.strategy = strategy
         self.predictor = PointsPredictor(strategy)
+        self.mode = mode
+        self.time_budget_ms = time_budget_ms  # Usado apenas no modo heurístico
+        self.scenarios = scenarios  # Necessário para a estratégia robusta
+        
+        # A dominância não vale com a restrição de CVaR (a troca pode piorar o risco)
+        self.prune_dominated = prune_dominated and strategy != OptimizationStrategy.ROBUST
+        
+        if strategy == OptimizationStrategy.ROBUST:
+            if scenarios is None:
+                raise ValueError("Estratégia robusta requer cenários")
+            if mode != OptimizationMode.EXACT:
+                raise ValueError("Estratégia robusta requer o modo exato")
         
     def optimize_team(self, 
                      players: List[PlayerData],
@@ -177,6 +280,118 @@ class TeamOptimizer:
         """
         logger.info(f"Iniciando otimização com estratégia {self.strategy.value}")
         
+        # No modo heurístico o orçamento de tempo inclui o preparo dos candidatos
+        start = time.perf_counter()
+        eligible_players, candidates = self._prepare_candidates(players, constraints)
+        
+        if self.mode == OptimizationMode.HEURISTIC:
+            result = self._optimize_heuristic(candidates, constraints, start)
+        else:
+            result = self._optimize_exact(candidates, constraints)
+        
+        result["model_stats"] = {
+            "eligible_players": len(eligible_players),
+            "pruned_players": len(eligible_players) - len(candidates),
+            "model_variables": len(candidates)
+        }
+        return result
+    
+    def budget_frontier(self,
+                        players: List[PlayerData],
+                        constraints: OptimizationConstraints,
+                        budgets: List[float]) -> Dict[str, Any]:
+        """
+        Calcula a fronteira orçamento x pontos esperados em uma única chamada
+        
+        Usa um único modelo e altera apenas o lado direito da restrição de
+        orçamento. Os orçamentos são percorridos do maior para o menor: o time
+        ótimo com orçamento b e custo c continua ótimo para qualquer orçamento
+        em [c, b], então esses orçamentos são pulados sem resolver. Cada solve
+        parte (warm start) do time heurístico viável para o novo orçamento.
+        """
+        start = time.perf_counter()
+        eligible_players, candidates = self._prepare_candidates(players, constraints)
+        
+        prob, player_vars = self._build_model(candidates, constraints)
+        budget_constraint = prob.constraints["budget"]
+        
+        in_formation = [p for p in candidates if p.position in constraints.positions]
+        warm_start_problem = self._build_lineup_problem(in_formation, constraints)
+        
+        budgets = sorted(set(budgets), reverse=True)
+        points_by_budget: Dict[float, Optional[Dict[str, Any]]] = {}
+        breakpoints = []
+        solves = 0
+        i = 0
+        
+        while i < len(budgets):
+            budget = budgets[i]
+            budget_constraint.changeRHS(budget)
+            
+            # Warm start a partir da heurística (o time anterior custa mais que o novo orçamento)
+            warm_start_problem.budget = budget
+            heuristic = solve_heuristic(warm_start_problem, time_budget_ms=5)
+            if heuristic is not None:
+                chosen = {in_formation[idx].id for idx in heuristic.selected}
+                for player_id, var in player_vars.items():
+                    var.setInitialValue(1 if player_id in chosen else 0)
+            
+            prob.solve(pulp.PULP_CBC_CMD(msg=0, warmStart=heuristic is not None))
+            solves += 1
+            
+            if prob.status != pulp.LpStatusOptimal:
+                # Orçamentos menores também são inviáveis
+                for remaining in budgets[i:]:
+                    points_by_budget[remaining] = None
+                break
+            
+            selected = [p for p in candidates if player_vars[p.id].varValue > 0.5]
+            total_cost = round(sum(p.price for p in selected), 2)
+            breakpoint = {
+                "min_budget": total_cost,
+                "max_budget": budget,
+                "total_cost": total_cost,
+                "total_expected_points": round(sum(p.expected_points for p in selected), 2),
+                "objective": round(pulp.value(prob.objective), 4),
+                "players": [p.id for p in selected]
+            }
+            breakpoints.append(breakpoint)
+            
+            # Todos os orçamentos em [custo, orçamento] têm o mesmo time ótimo
+            while i < len(budgets) and budgets[i] >= total_cost - 1e-9:
+                points_by_budget[budgets[i]] = breakpoint
+                i += 1
+        
+        return {
+            "success": True,
+            "strategy": self.strategy.value,
+            "formation": constraints.formation.value,
+            "breakpoints": list(reversed(breakpoints)),
+            "frontier": [
+                {
+                    "budget": budget,
+                    "total_cost": points_by_budget[budget]["total_cost"] if points_by_budget[budget] else None,
+                    "total_expected_points": (points_by_budget[budget]["total_expected_points"]
+                                              if points_by_budget[budget] else None)
+                }
+                for budget in sorted(points_by_budget)
+            ],
+            "solver": {
+                "budgets_evaluated": len(budgets),
+                "solves": solves,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+            },
+            "model_stats": {
+                "eligible_players": len(eligible_players),
+                "pruned_players": len(eligible_players) - len(candidates),
+                "model_variables": len(candidates)
+            }
+        }
+    
+    def _prepare_candidates(self,
+                            players: List[PlayerData],
+                            constraints: OptimizationConstraints) -> Tuple[List[PlayerData], List[PlayerData]]:
+        """Filtra os elegíveis, valida as travas e aplica a poda por dominância"""
         if not players:
             raise ValueError("Lista de jogadores não pode ser vazia")
         
@@ -186,23 +401,103 @@ class TeamOptimizer:
         if len(eligible_players) < 11:
             raise ValueError(f"Poucos jogadores elegíveis: {len(eligible_players)}")
         
+        eligible_ids = {p.id for p in eligible_players}
+        missing_locked = [pid for pid in constraints.locked_players if pid not in eligible_ids]
+        if missing_locked:
+            raise ValueError(f"Jogadores travados não elegíveis: {missing_locked}")
+        
+        # Remove candidatos dominados antes de montar o modelo
+        candidates = (self._prune_dominated_players(eligible_players, constraints)
+                      if self.prune_dominated else eligible_players)
+        
+        return eligible_players, candidates
+    
+    def _build_model(self,
+                     candidates: List[PlayerData],
+                     constraints: OptimizationConstraints) -> Tuple[pulp.LpProblem, Dict[str, pulp.LpVariable]]:
+        """Monta o ILP (variáveis, objetivo e restrições)"""
         # Cria problema de otimização
         prob = pulp.LpProblem("SuperMittos_Team_Optimization", pulp.LpMaximize)
         
         # Variáveis de decisão (binária para cada jogador)
         player_vars = {
             player.id: pulp.LpVariable(f"player_{player.id}", cat='Binary')
-            for player in eligible_players
+            for player in candidates
         }
         
         # Função objetivo: maximizar pontos esperados
         prob += pulp.lpSum([
             player_vars[player.id] * self._calculate_adjusted_points(player)
-            for player in eligible_players
+            for player in candidates
         ])
         
         # Restrições
-        self._add_constraints(prob, eligible_players, player_vars, constraints)
+        self._add_constraints(prob, candidates, player_vars, constraints)
+        
+        if self.strategy == OptimizationStrategy.ROBUST:
+            self._add_cvar_constraints(prob, candidates, player_vars, constraints)
+        
+        return prob, player_vars
+    
+    def _add_cvar_constraints(self,
+                              prob,
+                              players: List[PlayerData],
+                              player_vars: Dict[str, pulp.LpVariable],
+                              constraints: OptimizationConstraints):
+        """
+        Restrição de CVaR (Rockafellar-Uryasev) sobre os cenários conjuntos
+        
+        Pontuação no cenário s: Z_s = soma x_i (pontos_i + desvio_is).
+        CVaR_beta (média dos piores beta cenários) = max_t t - (1/beta) E[(t - Z)+],
+        linearizado com t livre e u_s >= t - Z_s, u_s >= 0.
+        """
+        deviations = self.scenarios.deviations_for([p.id for p in players])
+        probabilities = self.scenarios.probabilities
+        points = np.array([self._calculate_adjusted_points(p) for p in players])
+        scenario_points = points[:, None] + deviations  # (jogadores, cenários)
+        
+        threshold = pulp.LpVariable("cvar_threshold")
+        shortfall = [pulp.LpVariable(f"cvar_shortfall_{s}", lowBound=0) for s in range(len(probabilities))]
+        
+        for s, shortfall_var in enumerate(shortfall):
+            prob += shortfall_var >= threshold - pulp.lpSum([
+                player_vars[p.id] * scenario_points[i, s] for i, p in enumerate(players)
+            ])
+        
+        cvar = threshold - (1 / constraints.cvar_beta) * pulp.lpSum([
+            probabilities[s] * shortfall_var for s, shortfall_var in enumerate(shortfall)
+        ])
+        prob += cvar >= constraints.cvar_ratio * pulp.lpSum([
+            player_vars[p.id] * points[i] for i, p in enumerate(players)
+        ]), "cvar"
+    
+    def _lineup_cvar(self, selected_players: List[PlayerData], beta: float) -> Dict[str, float]:
+        """CVaR e média por cenário de um time já escolhido"""
+        deviations = self.scenarios.deviations_for([p.id for p in selected_players])
+        points = np.array([self._calculate_adjusted_points(p) for p in selected_players])
+        totals = points.sum() + deviations.sum(axis=0)
+        
+        # Média ponderada dos piores cenários até acumular beta de probabilidade
+        order = np.argsort(totals)
+        cumulative = np.cumsum(self.scenarios.probabilities[order])
+        weights = np.clip(beta - (cumulative - self.scenarios.probabilities[order]), 0, None)
+        weights = np.minimum(weights, self.scenarios.probabilities[order])
+        
+        return {
+            "cvar_beta": beta,
+            "cvar": round(float((weights * totals[order]).sum() / beta), 2),
+            "scenario_mean": round(float((self.scenarios.probabilities * totals).sum()), 2),
+            "worst_scenario": round(float(totals.min()), 2),
+            "n_scenarios": self.scenarios.n_scenarios
+        }
+    
+    def _optimize_exact(self,
+                        candidates: List[PlayerData],
+                        constraints: OptimizationConstraints) -> Dict[str, Any]:
+        """Resolve o ILP com o CBC"""
+        start = time.perf_counter()
+        
+        prob, player_vars = self._build_model(candidates, constraints)
         
         # Resolve o problema
         prob.solve(pulp.PULP_CBC_CMD(msg=0))
@@ -211,38 +506,165 @@ class TeamOptimizer:
         if prob.status != pulp.LpStatusOptimal:
             raise Exception(f"Otimização falhou com status: {pulp.LpStatus[prob.status]}")
         
-        return self._extract_solution(eligible_players, player_vars, constraints)
+        result = self._extract_solution(candidates, player_vars, constraints)
+        if self.strategy == OptimizationStrategy.ROBUST:
+            selected = [p for p in candidates if player_vars[p.id].varValue > 0.5]
+            result["risk"] = self._lineup_cvar(selected, constraints.cvar_beta)
+        result["solver"] = {
+            "mode": OptimizationMode.EXACT.value,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "objective": round(pulp.value(prob.objective), 4),
+            "gap": 0.0
+        }
+        return result
+    
+    def _optimize_heuristic(self,
+                            candidates: List[PlayerData],
+                            constraints: OptimizationConstraints,
+                            started_at: Optional[float] = None) -> Dict[str, Any]:
+        """Busca heurística dentro de time_budget_ms, com gap em relação ao limite da relaxação"""
+        # Posições fora da formação não entram no time heurístico
+        candidates = [p for p in candidates if p.position in constraints.positions]
+        problem = self._build_lineup_problem(candidates, constraints)
+        heuristic = solve_heuristic(problem, self.time_budget_ms, started_at)
+        
+        if heuristic is None:
+            raise Exception("Otimização falhou com status: Infeasible (heurística)")
+        
+        result = self._build_result([candidates[i] for i in heuristic.selected], constraints)
+        result["solver"] = {
+            "mode": OptimizationMode.HEURISTIC.value,
+            "elapsed_ms": round(heuristic.elapsed_ms, 2),
+            "objective": round(heuristic.objective, 4),
+            "upper_bound": round(heuristic.upper_bound, 4),
+            "gap": round(heuristic.gap, 4),
+            "local_search_moves": heuristic.moves
+        }
+        return result
+    
+    def _build_lineup_problem(self,
+                              players: List[PlayerData],
+                              constraints: OptimizationConstraints) -> LineupProblem:
+        """Converte candidatos e restrições para a forma vetorizada da heurística"""
+        position_codes = {position: i for i, position in enumerate(constraints.positions)}
+        club_codes = {club_id: i for i, club_id in enumerate(sorted(set(p.club_id for p in players)))}
+        locked = set(constraints.locked_players)
+        
+        return LineupProblem(
+            points=np.array([self._calculate_adjusted_points(p) for p in players], dtype=float),
+            prices=np.array([p.price for p in players], dtype=float),
+            positions=np.array([position_codes[p.position] for p in players], dtype=int),
+            clubs=np.array([club_codes[p.club_id] for p in players], dtype=int),
+            locked=np.array([p.id in locked for p in players], dtype=bool),
+            position_limits={
+                position_codes[position]: limits for position, limits in constraints.positions.items()
+            },
+            budget=constraints.budget,
+            max_per_club=constraints.max_players_per_club
+        )
     
     def _filter_eligible_players(self, 
                                 players: List[PlayerData],
                                 constraints: OptimizationConstraints) -> List[PlayerData]:
-        """Filtra jogadores elegíveis"""
+        """
+        Filtra jogadores elegíveis
+        
+        Retorna cópias dos jogadores, para que o mesmo pool possa ser
+        compartilhado entre otimizações concorrentes de estratégias diferentes.
+        """
         eligible = []
+        locked = set(constraints.locked_players)
+        excluded = set(constraints.excluded_players)
+        excluded_clubs = set(constraints.excluded_clubs)
         
         for player in players:
             # Filtros básicos
             if (player.injured or 
                 player.suspended or
                 player.price <= 0 or
-                player.prob_starter < constraints.min_prob_starter):
+                player.id in excluded or
+                player.club_id in excluded_clubs):
                 continue
-                
-            # Calcula pontos esperados
-            player.expected_points = self.predictor.calculate_expected_points(
-                avg_score=getattr(player, 'avg_score', 0),
-                recent_form=player.recent_form,
-                consistency=player.consistency,
-                prob_starter=player.prob_starter
-            )
             
-            # Calcula ROI ajustado
-            player.roi = player.expected_points / player.price if player.price > 0 else 0
+            # Jogadores travados ignoram o corte de probabilidade de titular
+            if player.prob_starter < constraints.min_prob_starter and player.id not in locked:
+                continue
+                
+            # Pontos esperados: predição em lote quando existe, senão a fórmula da estratégia
+            if player.predicted_points is not None:
+                expected_points = self.predictor.expected_from_prediction(
+                    player.predicted_points, player.predicted_min, player.predicted_max
+                )
+            else:
+                expected_points = self.predictor.calculate_expected_points(
+                    avg_score=player.avg_score,
+                    recent_form=player.recent_form,
+                    consistency=player.consistency,
+                    prob_starter=player.prob_starter
+                )
             
-            eligible.append(player)
+            eligible.append(replace(
+                player,
+                expected_points=expected_points,
+                roi=expected_points / player.price if player.price > 0 else 0  # ROI ajustado
+            ))
         
         logger.info(f"Jogadores elegíveis: {len(eligible)} de {len(players)}")
         return eligible
     
+    def _prune_dominated_players(self,
+                                 players: List[PlayerData],
+                                 constraints: OptimizationConstraints) -> List[PlayerData]:
+        """
+        Remove jogadores dominados, que nunca aparecem em um time ótimo
+        
+        Um jogador é dominado por outro da mesma posição que custa no máximo o
+        mesmo e pontua pelo menos o mesmo (empates decididos por preço, pontos
+        e id). Se o jogador estiver no time, no máximo k-1 dominadores também
+        estão (k = máximo da posição) e no máximo (11-1) // max_por_clube
+        outros clubes estão lotados. Contando um dominador por clube (e todos
+        do próprio clube, cuja troca não altera a contagem), k + clubes_lotados
+        dominadores garantem uma troca viável que não piora o time.
+        """
+        full_clubs = (11 - 1) // constraints.max_players_per_club
+        locked = set(constraints.locked_players)
+        points = {p.id: self._calculate_adjusted_points(p) for p in players}
+        
+        kept = []
+        for position in set(p.position for p in players):
+            position_players = [p for p in players if p.position == position]
+            
+            if position not in constraints.positions:
+                kept.extend(position_players)
+                continue
+            
+            needed = constraints.positions[position][1] + full_clubs
+            
+            # Fronteira preço/pontos: quem vem antes custa menos (ou pontua mais pelo mesmo preço)
+            position_players.sort(key=lambda p: (p.price, -points[p.id], p.id))
+            
+            club_index = {club_id: i for i, club_id in enumerate(set(p.club_id for p in position_players))}
+            club_best = np.full(len(club_index), -np.inf)  # Maior pontuação já vista por clube
+            club_points: Dict[int, List[float]] = {}  # Pontuações já vistas por clube (ordenadas)
+            
+            for player in position_players:
+                player_points = points[player.id]
+                own = club_index[player.club_id]
+                own_points = club_points.setdefault(own, [])
+                
+                # Um representante por clube adversário + todos os dominadores do próprio clube
+                other_clubs = int((club_best >= player_points).sum()) - int(club_best[own] >= player_points)
+                same_club = len(own_points) - bisect_left(own_points, player_points)
+                
+                if other_clubs + same_club < needed or player.id in locked:
+                    kept.append(player)
+                
+                club_best[own] = max(club_best[own], player_points)
+                insort(own_points, player_points)
+        
+        logger.info(f"Poda por dominância: {len(players) - len(kept)} de {len(players)} jogadores removidos")
+        return kept
+    
     def _calculate_adjusted_points(self, player: PlayerData) -> float:
         """Calcula pontos ajustados pela estratégia"""
         base_points = player.expected_points
@@ -268,10 +690,10 @@ class TeamOptimizer:
                         constraints: OptimizationConstraints):
         """Adiciona todas as restrições ao problema"""
         
-        # 1. Restrição orçamentária
+        # 1. Restrição orçamentária (nomeada para permitir alterar o lado direito)
         prob += pulp.lpSum([
             player_vars[p.id] * p.price for p in players
-        ]) <= constraints.budget
+        ]) <= constraints.budget, "budget"
         
         # 2. Exatamente 11 jogadores
         prob += pulp.lpSum([player_vars[p.id] for p in players]) == 11
@@ -305,22 +727,26 @@ class TeamOptimizer:
             prob += pulp.lpSum([player_vars[p.id] for p in midfielders]) >= 1
         if attackers:
             prob += pulp.lpSum([player_vars[p.id] for p in attackers]) >= 1
+        
+        # 6. Jogadores travados pelo usuário
+        for player_id in constraints.locked_players:
+            if player_id in player_vars:
+                prob += player_vars[player_id] == 1
     
     def _extract_solution(self, 
                          players: List[PlayerData],
                          player_vars: Dict[str, pulp.LpVariable],
                          constraints: OptimizationConstraints) -> Dict[str, Any]:
         """Extrai solução do problema resolvido"""
-        
-        selected_players = []
-        total_cost = 0
-        total_expected = 0
-        
-        for player in players:
-            if player_vars[player.id].varValue == 1:
-                selected_players.append(player)
-                total_cost += player.price
-                total_expected += player.expected_points
+        selected_players = [p for p in players if player_vars[p.id].varValue == 1]
+        return self._build_result(selected_players, constraints)
+    
+    def _build_result(self,
+                      selected_players: List[PlayerData],
+                      constraints: OptimizationConstraints) -> Dict[str, Any]:
+        """Monta o resultado a partir dos jogadores escolhidos"""
+        total_cost = sum(p.price for p in selected_players)
+        total_expected = sum(p.expected_points for p in selected_players)
         
         # Ordena por posição e pontos esperados
         selected_players.sort(key=lambda p: (
@@ -369,7 +795,10 @@ class TeamOptimizer:
                 "budget": constraints.budget,
                 "formation": constraints.formation.value,
                 "max_per_club": constraints.max_players_per_club,
-                "min_prob_starter": constraints.min_prob_starter
+                "min_prob_starter": constraints.min_prob_starter,
+                "locked_players": constraints.locked_players,
+                "excluded_players": constraints.excluded_players,
+                "excluded_clubs": constraints.excluded_clubs
             },
             "created_at": datetime.now().isoformat()
         }
@@ -381,85 +810,175 @@ class TeamOptimizer:
             distribution[player.position] = distribution.get(player.position, 0) + 1
         return distribution
 
+def players_from_columns(columns: Dict[str, np.ndarray]) -> List[PlayerData]:
+    """
+    Monta PlayerData a partir das colunas (snapshot ou consulta ao banco)
+    
+    As colunas guardam os valores brutos do mercado ativo (NaN quando
+    ausentes); os padrões do otimizador são aplicados aqui, e só jogadores
+    com preço entram no pool.
+    """
+    def with_default(values: np.ndarray, default: float) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        return np.where(np.isnan(values) | (values == 0), default, values)
+    
+    price = np.asarray(columns["price"], dtype=float)
+    priced = ~np.isnan(price) & (price > 0)
+    columns = {name: np.asarray(columns[name])[priced] for name in PLAYER_COLUMNS}
+    columns["avg_score"] = with_default(columns["avg_score"], 0.0)
+    columns["recent_form"] = with_default(columns["recent_form"], 0.0)
+    columns["consistency"] = with_default(columns["consistency"], 5.0)
+    columns["prob_starter"] = with_default(columns["prob_starter"], 0.5)
+    for name in ("predicted_points", "predicted_min", "predicted_max"):
+        values = np.asarray(columns[name], dtype=float)
+        columns[name] = np.where(np.isnan(values), None, values)
+    
+    return [
+        PlayerData(
+            id=player_id,
+            cartola_id=cartola_id,
+            name=name,
+            position=position,
+            club_id=club_id,
+            price=price,
+            expected_points=0,  # Será calculado pelo predictor (ou vem de predicted_points)
+            variance=consistency,
+            prob_starter=prob_starter,
+            recent_form=recent_form,
+            consistency=consistency,
+            roi=0,  # Será calculado
+            injured=injured,
+            suspended=suspended,
+            avg_score=avg_score,
+            predicted_points=predicted_points,
+            predicted_min=predicted_min,
+            predicted_max=predicted_max
+        )
+        for (player_id, cartola_id, name, position, club_id, price, avg_score,
+             recent_form, consistency, prob_starter, injured, suspended,
+             predicted_points, predicted_min, predicted_max) in zip(
+            *(columns[name].tolist() for name in PLAYER_COLUMNS)
+        )
+    ]
+
 class SuperMittosOptimizationEngine:
     """Engine principal de otimização do SuperMittos"""
     
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(self, database_url: Optional[str] = None, engine=None, snapshot_dir: Optional[str] = None):
         self.database_url = database_url or os.getenv("DATABASE_URL")
-        self.engine = create_engine(self.database_url) if self.database_url else None
+        self.engine = engine or (create_engine(self.database_url) if self.database_url else None)
+        self.snapshot_dir = snapshot_dir or snapshot_root()
+        self._snapshot: Optional[MarketSnapshot] = None
     
-    def load_players_from_db(self, round_number: Optional[int] = None) -> List[PlayerData]:
-        """Carrega jogadores do banco de dados"""
+    def create_optimizer(self,
+                         strategy: OptimizationStrategy,
+                         round_number: Optional[int] = None,
+                         **kwargs) -> TeamOptimizer:
+        """Cria o otimizador, anexando os cenários da rodada quando a estratégia é robusta"""
+        if strategy == OptimizationStrategy.ROBUST and "scenarios" not in kwargs:
+            kwargs["scenarios"] = self.load_scenarios(round_number)
+        return TeamOptimizer(strategy, **kwargs)
+    
+    def load_scenarios(self, round_number: Optional[int] = None) -> ScenarioSet:
+        """Cenários conjuntos da rodada (gerados uma vez e compartilhados via cache)"""
         if not self.engine:
             raise ValueError("Database engine não configurado")
         
-        query = """
-        SELECT 
-            j.id,
-            j.jogador_id,
-            j.nome,
-            j.posicao_nome,
-            j.clube_id,
-            j.preco_atual as price,
-            j.media_pontos as avg_score,
-            j.forma_recente,
-            j.consistencia,
-            j.prob_titular,
-            COALESCE(pe.lesionado, false) as injured,
-            COALESCE(pe.suspenso, false) as suspended
-        FROM vw_jogadores_completo j
-        LEFT JOIN provaveis_escalacoes pe ON j.id = pe.jogador_id 
-            AND pe.rodada = COALESCE(:round_number, (SELECT MAX(rodada_atual) FROM mercado_status))
-        WHERE j.status_ativo = true
-          AND j.preco_atual IS NOT NULL
-          AND j.preco_atual > 0
+        round_number = round_number or self.get_current_round()
+        return scenario_cache.get(
+            round_number,
+            lambda r: generate_scenarios(load_round_history(self.engine, r), r)
+        )
+    
+    def get_current_round(self) -> int:
+        """Obtém a rodada atual do mercado"""
+        if not self.engine:
+            raise ValueError("Database engine não configurado")
+        
+        with self.engine.connect() as conn:
+            result = conn.execute(text(CURRENT_ROUND_QUERY))
+            return result.scalar() or 1
+    
+    def load_price_trends(self, round_number: Optional[int] = None, lookback_rounds: int = 3) -> Dict[str, float]:
+        """Variação média de preço por rodada nas últimas lookback_rounds rodadas (historico_precos)"""
+        if not self.engine:
+            raise ValueError("Database engine não configurado")
+
+        round_number = round_number or self.get_current_round()
+
+        with self.engine.connect() as conn:
+            result = conn.execute(text(PRICE_TRENDS_QUERY), {"round_number": round_number, "lookback": lookback_rounds})
+            return {str(row.jogador_id): float(row.trend or 0) for row in result}
+
+    def load_players(self, round_number: Optional[int] = None) -> List[PlayerData]:
+        """Carrega jogadores do snapshot publicado pelo ETL, com fallback para o banco"""
+        snapshot = self.open_snapshot()
+        if snapshot and (round_number is None or snapshot.round_number == round_number):
+            return players_from_columns(snapshot.columns)
+        
+        return self.load_players_from_db(round_number)
+    
+    def open_snapshot(self) -> Optional[MarketSnapshot]:
+        """Snapshot vigente, reaberto apenas quando o ponteiro CURRENT muda"""
+        name = current_snapshot_name(self.snapshot_dir)
+        if name is None:
+            return None
+        
+        if self._snapshot is None or os.path.basename(self._snapshot.path) != name:
+            self._snapshot = open_snapshot(self.snapshot_dir, name)
+        return self._snapshot
+    
+    def publish_snapshot(self, round_number: Optional[int] = None) -> str:
+        """Consulta o mercado uma vez e publica o snapshot colunar da rodada"""
+        round_number = round_number or self.get_current_round()
+        columns = self.load_player_columns_from_db(round_number)
+        return write_snapshot(columns, round_number, self.snapshot_dir)
+    
+    def load_players_from_db(self, round_number: Optional[int] = None) -> List[PlayerData]:
+        """Carrega jogadores do banco de dados"""
+        players = players_from_columns(self.load_player_columns_from_db(round_number))
+        logger.info(f"Carregados {len(players)} jogadores do banco")
+        return players
+    
+    def load_player_columns_from_db(self, round_number: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Consulta o mercado ativo em forma colunar (snapshot da API e do otimizador)
+        
+        Jogadores sem preço vêm com NaN em price; players_from_columns os deixa
+        fora do pool do otimizador.
         """
+        if not self.engine:
+            raise ValueError("Database engine não configurado")
         
         try:
             with self.engine.connect() as conn:
-                result = conn.execute(text(query), {"round_number": round_number})
-                players = []
-                
-                for row in result:
-                    # Mapeia posições do banco para posições do otimizador
-                    position_map = {
-                        'Goleiro': 'GOL',
-                        'Lateral': 'LAT', 
-                        'Zagueiro': 'ZAG',
-                        'Meia': 'MEI',
-                        'Atacante': 'ATA'
-                    }
-                    
-                    position = position_map.get(row.posicao_nome, 'MEI')
-                    
-                    player = PlayerData(
-                        id=str(row.id),
-                        cartola_id=row.jogador_id,
-                        name=row.nome,
-                        position=position,
-                        club_id=row.clube_id or 0,
-                        price=float(row.price or 0),
-                        expected_points=0,  # Será calculado pelo predictor
-                        variance=row.consistencia or 5,
-                        prob_starter=(row.prob_titular or 50) / 100,  # Converte para 0-1
-                        recent_form=row.forma_recente or 0,
-                        consistency=row.consistencia or 5,
-                        roi=0,  # Será calculado
-                        injured=row.injured or False,
-                        suspended=row.suspended or False
-                    )
-                    
-                    # Adiciona avg_score como atributo extra
-                    setattr(player, 'avg_score', row.avg_score or 0)
-                    
-                    players.append(player)
-                
-                logger.info(f"Carregados {len(players)} jogadores do banco")
-                return players
-                
+                df = pd.read_sql(text(MARKET_PLAYERS_QUERY), conn, params={"round_number": round_number})
         except Exception as e:
             logger.error(f"Erro ao carregar jogadores: {e}")
             raise
+        
+        return {
+            "id": df["id"].astype(str).to_numpy(dtype=str),
+            "cartola_id": df["jogador_id"].fillna(0).to_numpy(dtype=np.int64),
+            "name": df["nome"].fillna("").to_numpy(dtype=str),
+            "position": df["posicao_nome"].map(POSITION_MAP).fillna("MEI").to_numpy(dtype=str),
+            "club_id": df["clube_id"].fillna(0).to_numpy(dtype=np.int64),
+            "price": df["price"].to_numpy(dtype=float),
+            "avg_score": df["avg_score"].to_numpy(dtype=float),
+            "recent_form": df["forma_recente"].to_numpy(dtype=float),
+            "consistency": df["consistencia"].to_numpy(dtype=float),
+            "prob_starter": (df["prob_titular"] / 100).to_numpy(dtype=float),
+            "injured": df["injured"].fillna(False).to_numpy(dtype=bool),
+            "suspended": df["suspended"].fillna(False).to_numpy(dtype=bool),
+            "predicted_points": df["valor_predito"].to_numpy(dtype=float),
+            "predicted_min": df["intervalo_min"].to_numpy(dtype=float),
+            "predicted_max": df["intervalo_max"].to_numpy(dtype=float),
+            # Colunas de exibição (API)
+            "nickname": df["apelido"].fillna("").to_numpy(dtype=str),
+            "club_name": df["clube_nome"].fillna("").to_numpy(dtype=str),
+            "position_name": df["posicao_nome"].fillna("").to_numpy(dtype=str),
+            "position_abbrev": df["posicao_abrev"].fillna("").to_numpy(dtype=str)
+        }
     
     def generate_team_suggestions(self,
                                 round_number: Optional[int] = None,
@@ -480,12 +999,12 @@ class SuperMittosOptimizationEngine:
             budgets = [100.0]
         
         # Carrega jogadores
-        players = self.load_players_from_db(round_number)
+        players = self.load_players(round_number)
         
         suggestions = []
         
         for strategy in strategies:
-            optimizer = TeamOptimizer(strategy)
+            optimizer = self.create_optimizer(strategy, round_number)
             
             for formation in formations:
                 for budget in budgets:
@@ -514,19 +1033,33 @@ class SuperMittosOptimizationEngine:
     
     def save_suggestions_to_db(self, 
                               suggestions: List[Dict[str, Any]], 
-                              round_number: int) -> bool:
-        """Salva sugestões no banco de dados"""
+                              round_number: int,
+                              bulk: bool = True) -> bool:
+        """
+        Salva sugestões no banco de dados
+        
+        No modo bulk os ids são gerados no cliente e cada tabela recebe um
+        único INSERT multi-linha, tudo na mesma transação. O modo linha a linha
+        (bulk=False) é mantido para comparação em benchmarks.
+        """
         if not self.engine:
             return False
         
         try:
             with self.engine.connect() as conn:
-                for suggestion in suggestions:
-                    # Insere sugestão principal
-                    suggestion_id = self._insert_suggestion(conn, suggestion, round_number)
-                    
-                    # Insere jogadores da sugestão
-                    self._insert_suggestion_players(conn, suggestion_id, suggestion["players"])
+                # Partição da rodada nas tabelas de sugestões (particionadas por rodada)
+                ensure_round_partitions(conn, [round_number], tables=SUGGESTION_TABLES)
+                
+                if bulk:
+                    self._bulk_insert_suggestions(conn, suggestions, round_number)
+                else:
+                    for suggestion in suggestions:
+                        # Insere sugestão principal
+                        suggestion_id = self._insert_suggestion(conn, suggestion, round_number)
+                        suggestion["suggestion_id"] = suggestion_id
+                        
+                        # Insere jogadores da sugestão
+                        self._insert_suggestion_players(conn, suggestion_id, round_number, suggestion["players"])
                 
                 conn.commit()
                 logger.info(f"Salvas {len(suggestions)} sugestões no banco")
@@ -536,6 +1069,48 @@ class SuperMittosOptimizationEngine:
             logger.error(f"Erro ao salvar sugestões: {e}")
             return False
     
+    def _bulk_insert_suggestions(self, conn, suggestions: List[Dict], round_number: int):
+        """Insere todas as sugestões e seus jogadores com um INSERT em lote por tabela"""
+        suggestion_rows = []
+        player_rows = []
+        
+        for suggestion in suggestions:
+            # Ids gerados no cliente dispensam o RETURNING por sugestão
+            suggestion_id = str(uuid.uuid4())
+            suggestion["suggestion_id"] = suggestion_id
+            
+            suggestion_rows.append({
+                "id": suggestion_id,
+                "rodada": round_number,
+                "orcamento_maximo": suggestion["constraints_used"]["budget"],
+                "estrategia": suggestion["strategy"],
+                "esquema_tatico": suggestion["formation"],
+                "pontuacao_esperada": suggestion["metrics"]["total_expected_points"],
+                "custo_total": suggestion["metrics"]["total_cost"],
+                "roi_esperado": suggestion["metrics"]["expected_roi"],
+                "algoritmo_versao": "1.0",
+                "parametros": json.dumps(suggestion["constraints_used"])
+            })
+            
+            for player in suggestion["players"]:
+                player_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "sugestao_id": suggestion_id,
+                    "rodada": round_number,
+                    "jogador_id": player["id"],
+                    "posicao_time": player["position"],
+                    "capitao": player["is_captain"],
+                    "vice_capitao": player["is_vice_captain"],
+                    "pontos_esperados": player["expected_points"],
+                    "preco": player["price"],
+                    "roi_individual": player["roi"]
+                })
+        
+        if suggestion_rows:
+            conn.execute(insert(SUGESTOES_TIMES_TABLE), suggestion_rows)
+        if player_rows:
+            conn.execute(insert(SUGESTOES_JOGADORES_TABLE), player_rows)
+    
     def _insert_suggestion(self, conn, suggestion: Dict, round_number: int) -> str:
         """Insere sugestão principal"""
         query = """
@@ -560,19 +1135,20 @@ class SuperMittosOptimizationEngine:
         
         return str(result.scalar())
     
-    def _insert_suggestion_players(self, conn, suggestion_id: str, players: List[Dict]):
+    def _insert_suggestion_players(self, conn, suggestion_id: str, round_number: int, players: List[Dict]):
         """Insere jogadores da sugestão"""
         for player in players:
             query = """
             INSERT INTO sugestoes_jogadores
-            (sugestao_id, jogador_id, posicao_time, capitao, vice_capitao, 
+            (sugestao_id, rodada, jogador_id, posicao_time, capitao, vice_capitao, 
              pontos_esperados, preco, roi_individual)
-            VALUES (:sugestao_id, :jogador_id, :posicao, :capitao, :vice, 
+            VALUES (:sugestao_id, :rodada, :jogador_id, :posicao, :capitao, :vice, 
                     :pontos, :preco, :roi)
             """
             
             conn.execute(text(query), {
                 "sugestao_id": suggestion_id,
+                "rodada": round_number,
                 "jogador_id": player["id"],
                 "posicao": player["position"],
                 "capitao": player["is_captain"],
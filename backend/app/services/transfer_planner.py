@@ -0,0 +1,361 @@
+"""
+SuperMittos Transfer Planner
+Planejamento de transferências para várias rodadas a partir do elenco atual
+Horizonte rolante: as primeiras rodadas da janela são inteiras, o restante é relaxado
+"""
+
+import logging
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pulp
+
+from services.team_optimizer import (
+    OptimizationConstraints,
+    OptimizationStrategy,
+    PlayerData,
+    TeamOptimizer,
+)
+
+logger = logging.getLogger(__name__)
+
+class TransferPlanner:
+    """
+    Planeja o elenco de cada rodada de um horizonte com limite de transferências
+
+    O patrimônio (constraints.budget) é o saldo em caixa mais o valor do elenco
+    atual. A cada rodada o saldo muda pelas vendas e compras aos preços
+    projetados daquela rodada, então a valorização dos jogadores mantidos
+    aumenta o orçamento das rodadas seguintes.
+
+    Decomposição por horizonte rolante: para cada rodada k resolve a janela
+    k..horizonte com as exact_rounds primeiras rodadas inteiras e as demais
+    relaxadas (aproximação do futuro), fixa apenas as decisões da rodada k e
+    avança. São horizon solves pequenos em vez de um único MILP com todas as
+    rodadas inteiras.
+    """
+
+    def __init__(self,
+                 strategy: OptimizationStrategy = OptimizationStrategy.BALANCED,
+                 exact_rounds: int = 1,
+                 candidates_per_position: int = 40):
+        if strategy == OptimizationStrategy.ROBUST:
+            raise ValueError("Estratégia robusta não suportada no planejamento de transferências")
+
+        self.strategy = strategy
+        self.optimizer = TeamOptimizer(strategy, prune_dominated=False)
+        self.exact_rounds = max(1, exact_rounds)
+        self.candidates_per_position = candidates_per_position
+
+    def plan(self,
+             players: List[PlayerData],
+             constraints: OptimizationConstraints,
+             current_squad: Optional[List[str]] = None,
+             horizon: int = 5,
+             max_transfers: int = 3,
+             transfer_penalty: float = 0.0,
+             price_trends: Optional[Dict[str, float]] = None,
+             forecast_decay: float = 0.85,
+             start_round: int = 1) -> Dict[str, Any]:
+        """
+        Planeja as transferências das próximas horizon rodadas
+
+        current_squad traz os IDs do elenco atual (vazio = montar do zero, sem
+        limite de transferências na primeira rodada). price_trends traz a
+        variação de preço esperada por rodada; as projeções de pontos e preços
+        perdem peso com a distância (forecast_decay) e os pontos convergem para
+        a média histórica do jogador.
+        """
+        start = time.perf_counter()
+        current_squad = list(current_squad or [])
+        price_trends = price_trends or {}
+
+        if horizon < 1:
+            raise ValueError("Horizonte deve ter ao menos uma rodada")
+        if current_squad and len(set(current_squad)) != 11:
+            raise ValueError(f"Elenco atual deve ter 11 jogadores distintos: {len(set(current_squad))}")
+
+        candidates = self._plan_candidates(players, constraints, current_squad)
+
+        # Projeções por rodada (jogadores x rodadas)
+        decay = forecast_decay ** np.arange(horizon)
+        expected = np.array([p.expected_points for p in candidates])
+        avg_score = np.array([p.avg_score for p in candidates])
+        strategy_offset = np.array([self.optimizer._calculate_adjusted_points(p) for p in candidates]) - expected
+        projected = avg_score[:, None] + (expected - avg_score)[:, None] * decay[None, :]
+        points = projected + strategy_offset[:, None]
+
+        trend = np.array([price_trends.get(p.id, 0.0) for p in candidates])
+        cumulative_decay = np.concatenate([[0.0], np.cumsum(decay[1:])])
+        prices = np.clip(np.array([p.price for p in candidates])[:, None] + trend[:, None] * cumulative_decay[None, :],
+                         0.0, None)
+
+        keep = self._restrict_candidates(candidates, points, prices, constraints, current_squad)
+        candidates = [candidates[i] for i in keep]
+        points, prices, projected = points[keep], prices[keep], projected[keep]
+
+        index = {p.id: i for i, p in enumerate(candidates)}
+        held = np.zeros(len(candidates))
+        held[[index[pid] for pid in current_squad]] = 1.0
+
+        bank = constraints.budget - float((held * prices[:, 0]).sum())
+        if bank < -1e-6:
+            raise ValueError("Patrimônio menor que o valor do elenco atual")
+
+        rounds = []
+        for k in range(horizon):
+            limited = k > 0 or bool(current_squad)
+            selected = self._solve_window(
+                points, prices, candidates, constraints, held, bank, k, horizon,
+                max_transfers, transfer_penalty, limited_first_round=limited
+            )
+
+            bought = np.flatnonzero((selected > 0.5) & (held < 0.5))
+            sold = np.flatnonzero((selected < 0.5) & (held > 0.5))
+            bank += float(prices[sold, k].sum() - prices[bought, k].sum())
+            held = selected
+
+            rounds.append(self._round_summary(
+                candidates, points, prices, projected, held, bought, sold, bank, k,
+                start_round, constraints, limited
+            ))
+
+        total_points = sum(r["expected_points"] for r in rounds)
+        total_transfers = sum(r["n_transfers"] for r in rounds if r["counts_as_transfers"])
+        final_value = rounds[-1]["team_value"] + rounds[-1]["bank"]
+
+        return {
+            "success": True,
+            "strategy": self.strategy.value,
+            "formation": constraints.formation.value,
+            "horizon": horizon,
+            "start_round": start_round,
+            "rounds": rounds,
+            "metrics": {
+                "total_expected_points": round(total_points, 2),
+                "total_transfers": total_transfers,
+                "initial_patrimony": round(constraints.budget, 2),
+                "final_patrimony": round(final_value, 2)
+            },
+            "constraints_used": {
+                "budget": constraints.budget,
+                "max_transfers": max_transfers,
+                "transfer_penalty": transfer_penalty,
+                "forecast_decay": forecast_decay,
+                "max_per_club": constraints.max_players_per_club,
+                "min_prob_starter": constraints.min_prob_starter,
+                "locked_players": constraints.locked_players,
+                "excluded_players": constraints.excluded_players,
+                "excluded_clubs": constraints.excluded_clubs
+            },
+            "solver": {
+                "solves": horizon,
+                "exact_rounds": self.exact_rounds,
+                "model_variables": len(candidates),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+        }
+
+    def _plan_candidates(self,
+                         players: List[PlayerData],
+                         constraints: OptimizationConstraints,
+                         current_squad: List[str]) -> List[PlayerData]:
+        """
+        Elegíveis mais o elenco atual (que pode ser mantido mesmo fora dos
+        filtros; se estiver excluído, _solve_window obriga a venda)
+        """
+        if not players:
+            raise ValueError("Lista de jogadores não pode ser vazia")
+
+        pool = {p.id: p for p in players}
+        missing = [pid for pid in current_squad if pid not in pool]
+        if missing:
+            raise ValueError(f"Jogadores do elenco atual não encontrados: {missing}")
+
+        eligible = self.optimizer._filter_eligible_players(players, constraints)
+        eligible_ids = {p.id for p in eligible}
+        predictor = self.optimizer.predictor
+
+        for pid in current_squad:
+            if pid not in eligible_ids:
+                player = pool[pid]
+                if player.predicted_points is not None:
+                    expected_points = predictor.expected_from_prediction(
+                        player.predicted_points, player.predicted_min, player.predicted_max
+                    )
+                else:
+                    expected_points = predictor.calculate_expected_points(
+                        avg_score=player.avg_score,
+                        recent_form=player.recent_form,
+                        consistency=player.consistency,
+                        prob_starter=player.prob_starter
+                    )
+                # Lesionados e suspensos podem ser mantidos, mas não pontuam nesta rodada
+                if player.injured or player.suspended:
+                    expected_points = 0.0
+                eligible.append(replace(player, expected_points=expected_points))
+                eligible_ids.add(pid)
+
+        missing_locked = [pid for pid in constraints.locked_players if pid not in eligible_ids]
+        if missing_locked:
+            raise ValueError(f"Jogadores travados não elegíveis: {missing_locked}")
+
+        eligible = [p for p in eligible if p.position in constraints.positions]
+        if len(eligible) < 11:
+            raise ValueError(f"Poucos jogadores elegíveis: {len(eligible)}")
+
+        return eligible
+
+    def _restrict_candidates(self,
+                             candidates: List[PlayerData],
+                             points: np.ndarray,
+                             prices: np.ndarray,
+                             constraints: OptimizationConstraints,
+                             current_squad: List[str]) -> List[int]:
+        """
+        Limita os candidatos por posição aos melhores em pontos no horizonte e
+        em pontos por cartoleta (mantendo elenco atual e travados)
+        """
+        required = set(current_squad) | set(constraints.locked_players)
+        keep: Set[int] = {i for i, p in enumerate(candidates) if p.id in required}
+        total_points = points.sum(axis=1)
+        value = total_points / np.maximum(prices.mean(axis=1), 1e-6)
+        positions = np.array([p.position for p in candidates])
+        limit = self.candidates_per_position
+
+        for position in constraints.positions:
+            idx = np.flatnonzero(positions == position)
+            keep.update(idx[np.argsort(-total_points[idx], kind="stable")[:limit]].tolist())
+            keep.update(idx[np.argsort(-value[idx], kind="stable")[:limit]].tolist())
+
+        return sorted(keep)
+
+    def _solve_window(self,
+                      points: np.ndarray,
+                      prices: np.ndarray,
+                      candidates: List[PlayerData],
+                      constraints: OptimizationConstraints,
+                      held: np.ndarray,
+                      bank: float,
+                      first: int,
+                      horizon: int,
+                      max_transfers: int,
+                      transfer_penalty: float,
+                      limited_first_round: bool) -> np.ndarray:
+        """Resolve a janela first..horizon e retorna o elenco escolhido para a rodada first"""
+        prob = pulp.LpProblem(f"SuperMittos_Plan_{first}", pulp.LpMaximize)
+        n_players = len(candidates)
+        window = range(first, horizon)
+
+        x, buy, sell, cash = {}, {}, {}, {}
+        for t in window:
+            category = pulp.LpBinary if t < first + self.exact_rounds else pulp.LpContinuous
+            for i in range(n_players):
+                x[i, t] = pulp.LpVariable(f"x_{i}_{t}", lowBound=0, upBound=1, cat=category)
+                buy[i, t] = pulp.LpVariable(f"buy_{i}_{t}", lowBound=0, upBound=1)
+                sell[i, t] = pulp.LpVariable(f"sell_{i}_{t}", lowBound=0, upBound=1)
+            cash[t] = pulp.LpVariable(f"bank_{t}", lowBound=0)
+
+        penalized = [t for t in window if t > first or limited_first_round]
+        prob += (
+            pulp.lpSum([points[i, t] * x[i, t] for t in window for i in range(n_players)]) -
+            transfer_penalty * pulp.lpSum([buy[i, t] for t in penalized for i in range(n_players)])
+        )
+
+        positions = [p.position for p in candidates]
+        clubs: Dict[int, List[int]] = {}
+        for i, p in enumerate(candidates):
+            clubs.setdefault(p.club_id, []).append(i)
+        locked_ids = set(constraints.locked_players)
+        locked = [i for i, p in enumerate(candidates) if p.id in locked_ids]
+        # Exclusões valem também para o elenco atual: o jogador precisa ser vendido
+        excluded_ids = set(constraints.excluded_players)
+        excluded_clubs = set(constraints.excluded_clubs)
+        excluded = [i for i, p in enumerate(candidates) if p.id in excluded_ids or p.club_id in excluded_clubs]
+
+        for t in window:
+            # Fluxo do elenco: entra quem foi comprado, sai quem foi vendido
+            for i in range(n_players):
+                previous = held[i] if t == first else x[i, t - 1]
+                prob += x[i, t] - previous == buy[i, t] - sell[i, t]
+
+            # Saldo: vendas e compras ao preço projetado da rodada
+            previous_cash = bank if t == first else cash[t - 1]
+            prob += cash[t] == previous_cash + pulp.lpSum([
+                prices[i, t] * (sell[i, t] - buy[i, t]) for i in range(n_players)
+            ]), f"cash_{t}"
+
+            if t in penalized:
+                prob += pulp.lpSum([buy[i, t] for i in range(n_players)]) <= max_transfers, f"transfers_{t}"
+
+            prob += pulp.lpSum([x[i, t] for i in range(n_players)]) == 11
+
+            for position, (min_count, max_count) in constraints.positions.items():
+                position_sum = pulp.lpSum([x[i, t] for i in range(n_players) if positions[i] == position])
+                prob += position_sum >= min_count
+                prob += position_sum <= max_count
+
+            for members in clubs.values():
+                if len(members) > constraints.max_players_per_club:
+                    prob += pulp.lpSum([x[i, t] for i in members]) <= constraints.max_players_per_club
+
+            for i in locked:
+                prob += x[i, t] == 1
+            for i in excluded:
+                prob += x[i, t] == 0
+
+        prob.solve(pulp.PULP_CBC_CMD(msg=0))
+
+        if prob.status != pulp.LpStatusOptimal:
+            raise Exception(f"Planejamento falhou na rodada {first + 1} com status: {pulp.LpStatus[prob.status]}")
+
+        return np.array([round(x[i, first].varValue or 0) for i in range(n_players)], dtype=float)
+
+    def _round_summary(self,
+                       candidates: List[PlayerData],
+                       points: np.ndarray,
+                       prices: np.ndarray,
+                       projected: np.ndarray,
+                       held: np.ndarray,
+                       bought: np.ndarray,
+                       sold: np.ndarray,
+                       bank: float,
+                       t: int,
+                       start_round: int,
+                       constraints: OptimizationConstraints,
+                       counts_as_transfers: bool) -> Dict[str, Any]:
+        """Elenco, transferências e saldo de uma rodada do plano"""
+        squad = np.flatnonzero(held > 0.5)
+        team_value = float(prices[squad, t].sum())
+
+        # Elenco com pontos e preços projetados para a rodada
+        lineup = [
+            replace(candidates[i], price=round(float(prices[i, t]), 2), expected_points=float(projected[i, t]))
+            for i in squad
+        ]
+        lineup_result = self.optimizer._build_result(lineup, replace(constraints, budget=team_value + bank))
+
+        def transfer(i: int) -> Dict[str, Any]:
+            p = candidates[i]
+            return {
+                "id": p.id,
+                "cartola_id": p.cartola_id,
+                "name": p.name,
+                "position": p.position,
+                "club_id": p.club_id,
+                "price": round(float(prices[i, t]), 2)
+            }
+
+        return {
+            "round": start_round + t,
+            "transfers_in": [transfer(i) for i in bought],
+            "transfers_out": [transfer(i) for i in sold],
+            "n_transfers": len(bought),
+            "counts_as_transfers": counts_as_transfers,
+            "expected_points": round(float(points[squad, t].sum()), 2),
+            "team_value": round(team_value, 2),
+            "bank": round(bank, 2),
+            "players": lineup_result["players"]
+        }
@@ -0,0 +1,85 @@
+"""
+SuperMittos Benchmark - ETL reproduzido offline
+Reproduz rodadas gravadas (ETL_FIXTURE_MODE=record) pelos mesmos clientes do ETL
+e mede a vazão de cada estágio do pipeline (fetch, parse, match, write) e o pico de
+memória alocada; a escrita só roda com --database-url, pois usa SQL do PostgreSQL
+
+Gravação (em backend/app): ETL_FIXTURE_MODE=record ETL_FIXTURE_RECORDING=rodada-12 python -m etl.supermittos_etl
+"""
+
+import argparse
+import re
+import statistics
+import tracemalloc
+
+from synthetic import scale_etl_recording
+from etl.fixture_store import FixtureStore
+from etl.supermittos_etl import ConfigETL, SuperMittosETL
+
+def run_recording(args, name: str):
+    """Executa o pipeline sobre uma gravação; retorna jogadores, tempos por estágio e pico de memória"""
+    config = ConfigETL(
+        database_url=args.database_url or "sqlite://",
+        fixture_mode="replay",
+        fixture_dir=args.fixtures,
+        fixture_recording=name
+    )
+    timings = {}
+    players = 0
+    peak = 0
+
+    for _ in range(args.repeat):
+        etl = SuperMittosETL(config)
+
+        tracemalloc.start()
+        stats = etl.run_pipeline(write=bool(args.database_url), chunk_size=args.chunk_size)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        if args.database_url and not stats["database_saved"]:
+            raise RuntimeError("Falha ao salvar no banco")
+
+        players = stats["players_processed"]
+        for stage, seconds in stats["stages"].items():
+            timings.setdefault(stage, []).append(seconds)
+
+    return players, timings, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=ConfigETL.fixture_dir, help="Diretório do FixtureStore")
+    parser.add_argument("--recording", action="append", help="Gravações a reproduzir (padrão: todas)")
+    parser.add_argument("--scale", type=int, default=1, help="Replica o mercado N vezes (gravação sintética)")
+    parser.add_argument("--database-url", default=None, help="PostgreSQL para medir a persistência")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    # Gravações sintéticas (<nome>-x<fator>) só entram quando pedidas
+    recordings = args.recording or [
+        name for name in store.list_recordings() if not re.search(r"-x\d+$", name)
+    ]
+    if not recordings:
+        parser.error(f"Nenhuma gravação em {args.fixtures}")
+
+    if args.scale > 1:
+        recordings = [scale_etl_recording(store, name, args.scale) for name in recordings]
+
+    print(f"📼 Benchmark ETL reproduzido - {len(recordings)} gravações, melhor de {args.repeat}")
+    print(f"{'gravação':<28} {'jogadores':>9} {'estágio':<8} {'melhor ms':>10} {'mediana ms':>11} "
+          f"{'jogadores/s':>12}")
+
+    for name in recordings:
+        players, timings, peak = run_recording(args, name)
+        for stage, values in timings.items():
+            best = min(values)
+            if not best:
+                continue
+            throughput = players / best if best > 0 else float("inf")
+            print(f"{name:<28} {players:>9} {stage:<8} {best * 1000:>10.2f} "
+                  f"{statistics.median(values) * 1000:>11.2f} {throughput:>12.0f}")
+        print(f"{name:<28} {players:>9} {'pico de memória alocada:':<33} {peak / 2 ** 20:>9.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+SuperMittos Benchmark - Otimizador heurístico vs ILP
+Compara latência e qualidade (gap para o ótimo e para o limite da relaxação)
+nos pools sintéticos, para todas as estratégias (exceto a robusta, só exata) e
+formações
+"""
+
+import argparse
+import statistics
+import time
+
+from synthetic import POOL_SIZES, make_player_pool
+from services.team_optimizer import (
+    Formation, OptimizationConstraints, OptimizationMode, OptimizationStrategy, TeamOptimizer
+)
+
+def timed(optimizer, players, constraints):
+    start = time.perf_counter()
+    result = optimizer.optimize_team(players, constraints)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--time-budget-ms", type=float, default=20.0)
+    parser.add_argument("--budget", type=float, default=100.0)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"⚡ Heurística ({args.time_budget_ms} ms) vs ILP - orçamento C$ {args.budget}")
+    print(f"{'pool':>6} {'ILP ms (p50)':>13} {'heur ms (p50)':>14} {'gap ótimo médio':>16} "
+          f"{'gap ótimo máx':>14} {'gap limite médio':>17}")
+
+    for pool_size in POOL_SIZES:
+        exact_ms, heuristic_ms, optimum_gaps, bound_gaps = [], [], [], []
+
+        for seed in range(args.seeds):
+            players = make_player_pool(pool_size, seed=seed)
+
+            for strategy in OptimizationStrategy:
+                if strategy == OptimizationStrategy.ROBUST:
+                    continue  # Só no modo exato (restrição de CVaR): não há heurística a comparar
+                exact = TeamOptimizer(strategy)
+                heuristic = TeamOptimizer(strategy, mode=OptimizationMode.HEURISTIC,
+                                          time_budget_ms=args.time_budget_ms)
+
+                for formation in Formation:
+                    constraints = OptimizationConstraints(budget=args.budget, formation=formation)
+                    try:
+                        exact_result, exact_elapsed = timed(exact, players, constraints)
+                    except Exception:
+                        continue  # Pool sem time viável para esta configuração
+                    heuristic_result, heuristic_elapsed = timed(heuristic, players, constraints)
+
+                    optimum = exact_result["solver"]["objective"]
+                    found = heuristic_result["solver"]["objective"]
+                    exact_ms.append(exact_elapsed)
+                    heuristic_ms.append(heuristic_elapsed)
+                    optimum_gaps.append((optimum - found) / optimum if optimum > 0 else 0.0)
+                    bound_gaps.append(heuristic_result["solver"]["gap"])
+
+        if not exact_ms:
+            continue
+
+        print(f"{pool_size:>6} {statistics.median(exact_ms):>13.1f} {statistics.median(heuristic_ms):>14.1f} "
+              f"{statistics.mean(optimum_gaps):>15.2%} {max(optimum_gaps):>14.2%} "
+              f"{statistics.mean(bound_gaps):>16.2%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+SuperMittos Benchmark - ETag, 304 e compressão das respostas
+Bytes trafegados e latência de uma listagem de jogadores servida pelo
+HTTPCacheMiddleware: sem compressão, gzip, brotli (se instalado) e as
+revalidações (If-None-Match) com ETag pela versão do snapshot (o endpoint não
+roda) e pelo hash do corpo (o endpoint roda, o corpo não trafega)
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from bench_serialization import make_rows
+from services import http_cache
+from services.http_cache import HTTPCacheConfig, HTTPCacheMiddleware, ResourceVersion
+from services.serialization import dumps_json
+
+def make_app(rows, calls, config=None):
+    async def players(request):
+        calls["players"] += 1
+        return Response(dumps_json(rows), media_type="application/json")
+
+    app = Starlette(routes=[Route("/snapshot", players), Route("/db", players)])
+    version = ResourceVersion("round-012-gen-000042", datetime.now())
+    app.add_middleware(HTTPCacheMiddleware, versions=lambda path: version if path == "/snapshot" else None,
+                       config=config)
+    return app
+
+def measure(client, path: str, headers, repeat: int):
+    timings, response = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    # Tamanho no fio: httpx já devolve o corpo descomprimido
+    wire = int(response.headers.get("content-length", len(response.content)))
+    return response.status_code, wire, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    calls = {"players": 0}
+    rows = make_rows(args.players)
+    client = TestClient(make_app(rows, calls))
+    uncached = TestClient(make_app(rows, calls, HTTPCacheConfig(compressed_entries=0)))
+    snapshot_etag = client.get("/snapshot", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    db_etag = client.get("/db", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    cases = [("sem compressão", client, "/snapshot", {"Accept-Encoding": "identity"}),
+             ("gzip sem LRU", uncached, "/snapshot", {"Accept-Encoding": "gzip"}),
+             ("gzip", client, "/snapshot", {"Accept-Encoding": "gzip"})]
+    if http_cache.brotli is not None:
+        cases += [("brotli sem LRU", uncached, "/snapshot", {"Accept-Encoding": "br"}),
+                  ("brotli", client, "/snapshot", {"Accept-Encoding": "br"})]
+    cases += [("304 versão do snapshot", client, "/snapshot", {"If-None-Match": snapshot_etag}),
+              ("304 hash do corpo", client, "/db", {"If-None-Match": db_etag})]
+
+    print(f"🗜️  Listagem de {args.players} jogadores - mediana de {args.repeat} requisições")
+    print(f"{'caso':<24} {'status':>6} {'bytes':>9} {'% do original':>14} {'ms':>8} {'endpoint':>9}")
+    original = None
+    for name, case_client, path, headers in cases:
+        before = calls["players"]
+        status, wire, ms = measure(case_client, path, headers, args.repeat)
+        original = original or wire
+        ran = "sim" if calls["players"] > before else "não"
+        print(f"{name:<24} {status:>6} {wire:>9} {wire / original:>13.1%} {ms:>8.2f} {ran:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+SuperMittos Benchmark - Autocomplete de jogadores
+Latência do índice de prefixos (services/player_search.py) contra a varredura
+linear dos nomes normalizados, para prefixos de 1 a 6 letras e buscas de duas
+palavras, em mercados sintéticos de tamanhos crescentes
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from synthetic import POOL_SIZES
+from etl.supermittos_etl import DataNormalizer
+from services.player_search import PrefixIndex
+
+FIRST_NAMES = ["Gabriel", "João", "Pedro", "Lucas", "Matheus", "Vitor", "Éverton", "Rafael", "Thiago", "André",
+               "Bruno", "Luís", "Felipe", "Guilherme", "Caio", "Hulk", "Paulinho", "Douglas", "Rodrigo", "Cássio"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Araújo", "Barbosa", "Ribeiro", "Conceição",
+              "Gonçalves", "Menino", "Veiga", "Arrascaeta", "Calleri", "Cano", "Estêvão", "Gómez", "Nuñez"]
+
+def make_rows(n_players: int, seed: int = 42):
+    """Jogadores com nome composto, apelido e popularidade aleatórios"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_players):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        nickname = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if rng.random() < 0.7 else name
+        rows.append({
+            "id": str(i), "cartola_id": 100000 + i, "name": name, "nickname": nickname, "club_name": None,
+            "position_abbrev": "MEI", "avg_score": float(rng.normal(4, 2)),
+            "nome_normalizado": DataNormalizer.normalize_name(name),
+            "apelido_normalizado": DataNormalizer.normalize_name(nickname),
+            "popularity": float(rng.random())
+        })
+    return rows
+
+def linear_scan(rows, normalized: str, limit: int):
+    """Referência: todas as palavras de todos os jogadores, a cada busca"""
+    words = normalized.split()
+    matches = [
+        row for row in rows
+        if all(any(candidate.startswith(word)
+                   for candidate in f"{row['nome_normalizado']} {row['apelido_normalizado']}".split())
+               for word in words)
+    ]
+    matches.sort(key=lambda row: -row["popularity"])
+    return matches[:limit]
+
+def timed_ms(fn, queries, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), sorted(samples)[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    typed = [DataNormalizer.normalize_name(name[:size]) for name in FIRST_NAMES + LAST_NAMES for size in range(1, 7)]
+    queries = typed + [f"{DataNormalizer.normalize_name(first)} {DataNormalizer.normalize_name(last)[:3]}"
+                       for first, last in zip(FIRST_NAMES, LAST_NAMES)]
+
+    print(f"🔤 Autocomplete - {len(queries)} buscas, limite {args.limit}")
+    print(f"{'jogadores':>10} {'índice ms':>10} {'trie p50 ms':>12} {'trie p99 ms':>12} "
+          f"{'linear p50 ms':>14} {'linear p99 ms':>14}")
+
+    for n_players in POOL_SIZES + [5000, 20000]:
+        rows = make_rows(n_players)
+        start = time.perf_counter()
+        index = PrefixIndex.from_rows(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for query in queries:
+            expected = [row["id"] for row in linear_scan(rows, query, len(rows))]
+            found = [result["id"] for result in index.complete(query, len(rows))]
+            assert sorted(found) == sorted(expected), f"Resultados diferentes para {query!r}"
+
+        trie = timed_ms(lambda query: index.complete(query, args.limit), queries, args.repeat)
+        linear = timed_ms(lambda query: linear_scan(rows, query, args.limit), queries, max(1, args.repeat // 10))
+        print(f"{n_players:>10} {build_ms:>10.1f} {trie[0]:>12.4f} {trie[1]:>12.4f} "
+              f"{linear[0]:>14.3f} {linear[1]:>14.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+SuperMittos Benchmark - Persistência de sugestões
+Compara o save_suggestions_to_db linha a linha com o caminho em lote,
+contando round trips ao banco (SQLite local ou PostgreSQL via --database-url)
+"""
+
+import argparse
+import time
+
+from sqlalchemy import create_engine, event, text
+
+from synthetic import make_suggestions
+from services.team_optimizer import SuperMittosOptimizationEngine
+
+# Schema mínimo para o SQLite (no PostgreSQL usa-se database/schema.sql)
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE sugestoes_times (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        rodada INTEGER NOT NULL,
+        orcamento_maximo REAL,
+        estrategia TEXT,
+        esquema_tatico TEXT,
+        pontuacao_esperada REAL,
+        custo_total REAL,
+        roi_esperado REAL,
+        algoritmo_versao TEXT,
+        parametros TEXT
+    )
+    """,
+    """
+    CREATE TABLE sugestoes_jogadores (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        sugestao_id TEXT REFERENCES sugestoes_times(id) ON DELETE CASCADE,
+        rodada INTEGER NOT NULL,
+        jogador_id TEXT,
+        posicao_time TEXT NOT NULL,
+        capitao BOOLEAN,
+        vice_capitao BOOLEAN,
+        pontos_esperados REAL,
+        preco REAL,
+        roi_individual REAL
+    )
+    """
+]
+
+def run_case(engine, suggestions, bulk: bool, rtt_ms: float):
+    """Executa um save e retorna (round trips, segundos)"""
+    round_trips = {"count": 0}
+
+    def count_round_trip(conn, cursor, statement, parameters, context, executemany):
+        round_trips["count"] += 1
+        if rtt_ms:
+            time.sleep(rtt_ms / 1000)  # Simula a latência de rede de um banco remoto
+
+    event.listen(engine, "before_cursor_execute", count_round_trip)
+    try:
+        optimizer_engine = SuperMittosOptimizationEngine(engine=engine)
+        start = time.perf_counter()
+        saved = optimizer_engine.save_suggestions_to_db(suggestions, round_number=1, bulk=bulk)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count_round_trip)
+
+    if not saved:
+        raise RuntimeError("Falha ao salvar sugestões")
+
+    return round_trips["count"], elapsed
+
+def cleanup(engine, suggestions):
+    ids = [s["suggestion_id"] for s in suggestions if "suggestion_id" in s]
+    with engine.begin() as conn:
+        for suggestion_id in ids:
+            conn.execute(text("DELETE FROM sugestoes_jogadores WHERE sugestao_id = :id"), {"id": suggestion_id})
+            conn.execute(text("DELETE FROM sugestoes_times WHERE id = :id"), {"id": suggestion_id})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--suggestions", type=int, default=30)
+    parser.add_argument("--database-url", default=None,
+                        help="PostgreSQL com database/schema.sql aplicado (padrão: SQLite em memória)")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Latência simulada por round trip")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            for ddl in SQLITE_SCHEMA:
+                conn.execute(text(ddl))
+
+    print(f"💾 Benchmark save_suggestions_to_db - {args.suggestions} sugestões, RTT simulado {args.rtt_ms} ms")
+
+    for label, bulk in [("linha a linha", False), ("lote", True)]:
+        timings = []
+        for _ in range(args.repeat):
+            suggestions = make_suggestions(args.suggestions)
+            round_trips, elapsed = run_case(engine, suggestions, bulk, args.rtt_ms)
+            timings.append(elapsed)
+            cleanup(engine, suggestions)
+
+        best = min(timings) * 1000
+        print(f"  {label:<14} round trips: {round_trips:>4}   melhor tempo: {best:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+SuperMittos Benchmark - Serialização das listagens
+Custo por linha de uma resposta de 1.000 jogadores: o caminho anterior (um
+PlayerResponse por linha, validação do response_model e json.dumps) contra as
+linhas do banco direto para bytes (orjson e, se instalado, MessagePack)
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from synthetic import make_player_pool
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from main import PlayerResponse  # noqa: E402
+from services import serialization  # noqa: E402
+from services.serialization import dumps_json, dumps_msgpack  # noqa: E402
+
+POSITION_NAMES = {"GOL": "Goleiro", "LAT": "Lateral", "ZAG": "Zagueiro", "MEI": "Meia", "ATA": "Atacante"}
+
+def make_rows(n_players: int):
+    """Linhas no formato da consulta de /api/v1/players (colunas já com os aliases)"""
+    return [
+        {
+            "id": player.id,
+            "cartola_id": player.cartola_id,
+            "name": player.name,
+            "nickname": player.name.split()[-1],
+            "club_name": f"Clube {player.club_id}",
+            "position_name": POSITION_NAMES[player.position],
+            "position_abbrev": player.position,
+            "current_price": player.price,
+            "avg_score": player.avg_score,
+            "recent_form": player.recent_form,
+            "consistency": player.consistency,
+            "prob_starter": round(player.prob_starter * 100, 4),
+            "active": True
+        }
+        for player in make_player_pool(n_players)
+    ]
+
+def pydantic_response(rows, adapter) -> bytes:
+    """Caminho anterior: modelo por linha, response_model e JSONResponse"""
+    players = [PlayerResponse(**row) for row in rows]
+    content = adapter.dump_python(adapter.validate_python(players), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def best_of(func, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.players)
+    adapter = TypeAdapter(List[PlayerResponse])
+
+    cases = [("pydantic + json", lambda data: pydantic_response(data, adapter))]
+    if serialization.orjson is not None:
+        cases.append(("linhas + orjson", dumps_json))
+    else:
+        cases.append(("linhas + json", dumps_json))
+    if serialization.msgpack is not None:
+        cases.append(("linhas + msgpack", dumps_msgpack))
+
+    print(f"📦 Benchmark serialização - {args.players} jogadores, melhor de {args.repeat}")
+
+    baseline = None
+    for label, func in cases:
+        elapsed = best_of(func, rows, args.repeat)
+        size = len(func(rows))
+        baseline = baseline or elapsed
+        per_row = elapsed / args.players * 1e6
+        print(f"  {label:<18} {elapsed * 1000:8.2f} ms   {per_row:6.2f} µs/linha   "
+              f"{size / 1024:7.1f} KiB   {baseline / elapsed:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+SuperMittos Benchmark - Teste de carga da API
+Dispara o tráfego de um dia de rodada (listagem de jogadores, detalhe de
+escalação, dashboard, otimização...) em níveis crescentes de concorrência e
+mede vazão, percentis de latência e tempo de banco (Server-Timing) por endpoint
+
+Uso (temporada sintética + API local):
+  python load_test.py --database-url postgresql://localhost/supermittos_bench --seed --start-server \\
+      --players-per-club 150 --output resultados/v1.json
+  python load_test.py --base-url http://localhost:8000 --output v2.json --compare resultados/v1.json
+
+O JSON de saída é estável (chaves ordenadas) para ser comparado entre versões;
+a escalada para no primeiro nível que passa do limite de erros ou de p99.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+from synthetic_season import add_season_arguments, build_season, spec_from_args
+
+APP_DIR = os.path.join(os.path.dirname(__file__), '..', 'app')
+
+SERVER_TIMING_DB = re.compile(r'(?:^|,)\s*db;dur=([0-9.]+)')
+
+POSITIONS = ["GOL", "LAT", "ZAG", "MEI", "ATA"]
+STRATEGIES = ["conservative", "balanced", "aggressive"]
+
+@dataclass
+class Endpoint:
+    """Rota do mix: peso relativo e montagem da requisição a partir das ids da temporada"""
+    name: str
+    weight: float
+    build: Callable[[random.Random, Dict[str, Any]], Tuple[str, str, Optional[Dict[str, Any]]]]
+
+def _players_list(rng, ids):
+    params = {"limit": 100}
+    if rng.random() < 0.5:
+        params["position"] = rng.choice(POSITIONS)
+    if rng.random() < 0.3:
+        params["max_price"] = rng.choice([8, 12, 20])
+    return "GET", f"/api/v1/players?{urlencode(params)}", None
+
+def _suggestions_list(rng, ids):
+    params = {"round_number": ids["round_number"], "limit": 10}
+    if rng.random() < 0.5:
+        params["strategy"] = rng.choice(STRATEGIES)
+    return "GET", f"/api/v1/suggestions?{urlencode(params)}", None
+
+def _optimize(rng, ids):
+    body = {
+        "strategy": rng.choice(STRATEGIES),
+        "formation": rng.choice(["3-4-3", "4-3-3", "4-4-2"]),
+        "budget": rng.choice([100.0, 120.0, 140.0]),
+        "mode": "heuristic" if rng.random() < 0.5 else "exact"
+    }
+    return "POST", "/api/v1/optimize", body
+
+# Mix de um dia de rodada (mercado aberto): leitura domina, otimização é rara e cara
+ROUND_DAY_MIX = [
+    Endpoint("players_list", 35, _players_list),
+    Endpoint("player_stats", 10, lambda rng, ids: ("GET", f"/api/v1/players/{rng.choice(ids['players'])}/stats", None)),
+    Endpoint("suggestions_list", 10, _suggestions_list),
+    Endpoint("suggestion_detail", 20, lambda rng, ids: ("GET", f"/api/v1/suggestions/{rng.choice(ids['suggestions'])}", None)),
+    Endpoint("dashboard", 12, lambda rng, ids: ("GET", "/api/v1/analytics/dashboard", None)),
+    Endpoint("top_performers", 8, lambda rng, ids: ("GET", f"/api/v1/analytics/top-performers?metric={rng.choice(['avg_score', 'recent_form', 'roi'])}", None)),
+    Endpoint("optimize", 5, _optimize)
+]
+
+def parse_mix(overrides: List[str]) -> List[Endpoint]:
+    """Aplica pesos nome=peso (peso 0 remove a rota do mix)"""
+    weights = {endpoint.name: endpoint.weight for endpoint in ROUND_DAY_MIX}
+    for override in overrides or []:
+        name, _, weight = override.partition("=")
+        if name not in weights:
+            raise SystemExit(f"Rota desconhecida no mix: {name} (opções: {', '.join(weights)})")
+        weights[name] = float(weight)
+    return [Endpoint(e.name, weights[e.name], e.build) for e in ROUND_DAY_MIX if weights[e.name] > 0]
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return round(ordered[index], 2)
+
+def summarize(samples: List[Tuple[str, int, float, Optional[float]]], duration: float) -> Dict[str, Any]:
+    """Amostras (rota, status, latência ms, banco ms) -> métricas por rota e totais"""
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+
+    def metrics(group):
+        latencies = [latency for _, _, latency, _ in group]
+        db_times = [db for _, _, _, db in group if db is not None]
+        errors = sum(1 for _, status, _, _ in group if status == 0 or status >= 500)
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+            "rps": round(len(group) / duration, 2),
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": round(max(latencies), 2) if latencies else None
+            },
+            "db_ms": {
+                "p50": percentile(db_times, 50),
+                "p95": percentile(db_times, 95),
+                "mean": round(statistics.fmean(db_times), 2) if db_times else None
+            }
+        }
+
+    return {
+        "total": metrics(samples),
+        "endpoints": {name: metrics(group) for name, group in sorted(by_endpoint.items())}
+    }
+
+async def run_level(base_url: str,
+                    mix: List[Endpoint],
+                    ids: Dict[str, Any],
+                    concurrency: int,
+                    duration: float,
+                    warmup: float,
+                    timeout: float,
+                    seed: int) -> Dict[str, Any]:
+    """concurrency clientes em laço fechado durante warmup + duration segundos"""
+    samples: List[Tuple[str, int, float, Optional[float]]] = []
+    weights = [endpoint.weight for endpoint in mix]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(client: httpx.AsyncClient, worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(mix, weights)[0]
+            method, path, body = endpoint.build(rng, ids)
+            sent = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+                match = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+                db_ms = float(match.group(1)) if match else None
+            except httpx.HTTPError:
+                status, db_ms = 0, None
+            if sent >= measure_from:
+                samples.append((endpoint.name, status, (time.perf_counter() - sent) * 1000, db_ms))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+
+    return {"concurrency": concurrency, "duration_s": duration, **summarize(samples, duration)}
+
+def discover_ids(base_url: str) -> Dict[str, Any]:
+    """Ids reais (jogadores, sugestões, rodada) lidos da própria API"""
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        market = client.get("/api/v1/market/status").json()
+        round_number = market.get("current_round")
+        players = client.get("/api/v1/players", params={"limit": 500}).json()
+        suggestions = client.get("/api/v1/suggestions", params={"round_number": round_number, "limit": 200}).json()
+        if not suggestions:
+            suggestions = client.get("/api/v1/suggestions", params={"limit": 200}).json()
+
+    if not players or not suggestions:
+        raise SystemExit("API sem jogadores ou sugestões: rode com --seed ou aponte para uma base populada")
+    return {
+        "round_number": round_number,
+        "players": [player["id"] for player in players],
+        "suggestions": [suggestion["id"] for suggestion in suggestions]
+    }
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    """Sobe a API (uvicorn) contra a base indicada e espera o /health; log no diretório do snapshot"""
+    work_dir = tempfile.mkdtemp(prefix="supermittos_load_")
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "ETL_SCHEDULER_ENABLED": "false",
+        # Snapshot do mercado publicado a partir desta base, não um de outra execução
+        "MARKET_SNAPSHOT_DIR": work_dir
+    }
+    log = open(os.path.join(work_dir, "api.log"), "w", encoding="utf-8")
+    print(f"📝 Log da API: {log.name}")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(120):
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise SystemExit("A API encerrou durante a inicialização")
+        time.sleep(0.5)
+    stop_server(process)
+    raise SystemExit("A API não respondeu ao /health")
+
+def stop_server(process: subprocess.Popen):
+    # Otimizações presas no solver seguram o shutdown gracioso
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def with_search_path(database_url: str) -> str:
+    """URL da API com o search_path do schema supermittos (tabelas da temporada sintética)"""
+    separator = "&" if "?" in database_url else "?"
+    return f"{database_url}{separator}options=-csearch_path%3Dsupermittos,public"
+
+def print_level(level: Dict[str, Any]):
+    total = level["total"]
+    print(f"\n👥 concorrência {level['concurrency']}: {total['rps']:.1f} req/s, "
+          f"p50 {total['latency_ms']['p50']} ms, p99 {total['latency_ms']['p99']} ms, "
+          f"erros {total['error_rate'] * 100:.2f}%")
+    for name, metrics in level["endpoints"].items():
+        latency, db = metrics["latency_ms"], metrics["db_ms"]
+        print(f"  {name:<18} {metrics['rps']:8.1f} req/s  p50 {latency['p50']:>8} ms  p95 {latency['p95']:>8} ms  "
+              f"p99 {latency['p99']:>8} ms  banco p50 {db['p50']} ms  erros {metrics['errors']}")
+
+def print_comparison(current: Dict[str, Any], previous: Dict[str, Any]):
+    """Variação de vazão e p95 por nível/rota em relação a outra execução"""
+    previous_levels = {level["concurrency"]: level for level in previous.get("levels", [])}
+    print(f"\n📊 Comparação com {previous.get('meta', {}).get('label') or 'execução anterior'}")
+    for level in current["levels"]:
+        before = previous_levels.get(level["concurrency"])
+        if not before:
+            continue
+        print(f"  concorrência {level['concurrency']}")
+        for name, metrics in [("total", level["total"]), *level["endpoints"].items()]:
+            old = before["endpoints"].get(name) if name != "total" else before["total"]
+            if not old or not old["rps"] or not old["latency_ms"]["p95"]:
+                continue
+            rps_change = (metrics["rps"] / old["rps"] - 1) * 100
+            p95_change = ((metrics["latency_ms"]["p95"] or 0) / old["latency_ms"]["p95"] - 1) * 100
+            print(f"    {name:<18} req/s {rps_change:+7.1f}%   p95 {p95_change:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="API já em execução (padrão: --start-server)")
+    parser.add_argument("--database-url", default=None, help="PostgreSQL descartável para --seed/--start-server")
+    parser.add_argument("--seed", action="store_true", help="Recria o schema e popula a temporada sintética")
+    add_season_arguments(parser)
+    parser.add_argument("--start-server", action="store_true", help="Sobe a API (uvicorn) contra --database-url")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn com --start-server")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Níveis de concorrência, em ordem")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos medidos por nível")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Segundos descartados no início de cada nível")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", action="append", help="Peso de uma rota (ex.: optimize=0, dashboard=30)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Para a escalada acima desta taxa")
+    parser.add_argument("--max-p99-ms", type=float, default=2000.0, help="Para a escalada acima deste p99")
+    parser.add_argument("--seed-rng", type=int, default=42, help="Semente do sorteio das requisições")
+    parser.add_argument("--label", default=None, help="Nome da execução no JSON (ex.: versão ou commit)")
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--compare", default=None, help="JSON de outra execução para comparar")
+    args = parser.parse_args()
+
+    if (args.seed or args.start_server) and not args.database_url:
+        parser.error("--seed e --start-server exigem --database-url")
+    if not args.base_url and not args.start_server:
+        parser.error("Informe --base-url ou --start-server")
+
+    spec = spec_from_args(args)
+    if args.seed:
+        build_season(args.database_url, spec)
+
+    server = start_server(with_search_path(args.database_url), args.port, args.workers) if args.start_server else None
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+
+    try:
+        ids = discover_ids(base_url)
+        mix = parse_mix(args.mix)
+        print(f"🚦 Teste de carga {base_url} - {len(ids['players'])} jogadores, {len(ids['suggestions'])} sugestões, "
+              f"rodada {ids['round_number']}")
+
+        levels, breaking_point = [], None
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            level = asyncio.run(run_level(
+                base_url, mix, ids, concurrency, args.duration, args.warmup, args.timeout, args.seed_rng
+            ))
+            levels.append(level)
+            print_level(level)
+
+            total = level["total"]
+            reasons = []
+            if total["error_rate"] > args.max_error_rate:
+                reasons.append(f"taxa de erros {total['error_rate'] * 100:.2f}%")
+            if (total["latency_ms"]["p99"] or 0) > args.max_p99_ms:
+                reasons.append(f"p99 {total['latency_ms']['p99']} ms")
+            if reasons:
+                breaking_point = {"concurrency": concurrency, "reasons": reasons}
+                print(f"\n💥 Limite atingido com concorrência {concurrency}: {', '.join(reasons)}")
+                break
+    finally:
+        if server:
+            stop_server(server)
+
+    peak = max(levels, key=lambda level: level["total"]["rps"])
+    results = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "base_url": base_url,
+            "python": platform.python_version(),
+            "season": {"clubs": spec.clubs, "players": spec.players, "rounds": spec.rounds,
+                       "suggestions_per_round": spec.suggestions_per_round} if args.seed else None,
+            "mix": {endpoint.name: endpoint.weight for endpoint in mix},
+            "duration_s": args.duration,
+            "workers": args.workers if server else None
+        },
+        "levels": levels,
+        "peak": {"concurrency": peak["concurrency"], "rps": peak["total"]["rps"]},
+        "breaking_point": breaking_point
+    }
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\n💾 Resultados em {args.output} (pico: {peak['total']['rps']:.1f} req/s com {peak['concurrency']} clientes)")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
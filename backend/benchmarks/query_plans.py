@@ -0,0 +1,233 @@
+"""
+SuperMittos Benchmark - Regressão de planos de consulta
+Roda EXPLAIN (ANALYZE, BUFFERS) nas consultas da API e do otimizador
+(services/queries.py) sobre uma temporada sintética e falha (exit 1) quando:
+- alguma consulta faz Seq Scan numa tabela grande (--seq-scan-min-rows) fora
+  da lista permitida dela
+- o tempo ou os buffers lidos passam da baseline gravada além da tolerância
+
+Uso:
+  python query_plans.py --database-url postgresql://localhost/supermittos_bench --seed --save-baseline
+  python query_plans.py --database-url postgresql://localhost/supermittos_bench
+Buffers dependem só dos dados e do plano (comparáveis entre máquinas); o tempo
+só deve ser comparado com uma baseline gravada na mesma máquina.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from sqlalchemy import text
+
+from synthetic_season import add_season_arguments, build_season, season_engine, spec_from_args
+
+# SQL da aplicação (mesmo layout usado pela API)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.queries import (  # noqa: E402
+    CURRENT_ROUND_QUERY, DASHBOARD_MARKET_STATS_QUERY, DASHBOARD_POSITIONS_QUERY, DASHBOARD_TOTAL_PLAYERS_QUERY,
+    LIVE_LINEUPS_QUERY, MARKET_PLAYERS_QUERY, MARKET_STATUS_QUERY, PLAYER_DETAIL_QUERY, PLAYER_STATS_FILTERS,
+    PLAYER_STATS_ORDER, PLAYER_STATS_QUERY, PLAYERS_FILTERS, PLAYERS_ORDER, PLAYERS_QUERY, PRICE_TRENDS_QUERY,
+    SEARCH_FUZZY_QUERY, SUGGESTION_DETAIL_QUERY, SUGGESTION_PLAYERS_QUERY, SUGGESTION_ROUND_QUERY,
+    SUGGESTION_SIMULATION_QUERY, SUGGESTIONS_FILTERS, SUGGESTIONS_ORDER, SUGGESTIONS_QUERY, TOP_PERFORMERS_FILTERS,
+    TOP_PERFORMERS_QUERY, filtered_query, top_performers_order
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'query_plans_baseline.json')
+
+# Consultas do mercado inteiro leem todos os jogadores ativos (o MarketStore
+# serve essas rotas em memória; o banco é o fallback)
+MARKET_WIDE = frozenset({"jogadores"})
+
+@dataclass
+class QueryCase:
+    """
+    Consulta com os parâmetros (chaves de sample_params), valores fixos (limites
+    padrão das rotas) e as tabelas onde Seq Scan é aceito
+    """
+    name: str
+    sql: str
+    params: Tuple[str, ...] = ()
+    fixed: Dict[str, Any] = field(default_factory=dict)
+    allow_seq_scan: FrozenSet[str] = field(default_factory=frozenset)
+
+def filtered(base: str, filters: Dict[str, str], order: str, *present: str) -> str:
+    """Mesma montagem da API, com os filtros opcionais indicados"""
+    return filtered_query(base, filters, dict.fromkeys(present), order)
+
+# O SQL vem de services/queries.py, o mesmo que a API e o otimizador executam
+# (com os filtros mais usados e os limites padrão das rotas)
+CASES = [
+    QueryCase("players_list", filtered(PLAYERS_QUERY, PLAYERS_FILTERS, PLAYERS_ORDER),
+              fixed={"limit": 100}, allow_seq_scan=MARKET_WIDE),
+    QueryCase("players_list_position_price",
+              filtered(PLAYERS_QUERY, PLAYERS_FILTERS, PLAYERS_ORDER, "position", "min_price", "max_price"),
+              params=("position", "min_price", "max_price"), fixed={"limit": 100}, allow_seq_scan=MARKET_WIDE),
+    QueryCase("player_detail", PLAYER_DETAIL_QUERY, params=("player_id",)),
+    QueryCase("player_stats", filtered(PLAYER_STATS_QUERY, PLAYER_STATS_FILTERS, PLAYER_STATS_ORDER),
+              params=("player_id",), fixed={"limit": 10}),
+    QueryCase("player_search_fuzzy", SEARCH_FUZZY_QUERY, params=("q",), fixed={"candidates": 30}),
+    QueryCase("market_status", MARKET_STATUS_QUERY),
+    QueryCase("suggestions_list", filtered(SUGGESTIONS_QUERY, SUGGESTIONS_FILTERS, SUGGESTIONS_ORDER),
+              fixed={"limit": 10}),
+    QueryCase("suggestions_by_round",
+              filtered(SUGGESTIONS_QUERY, SUGGESTIONS_FILTERS, SUGGESTIONS_ORDER, "round_number"),
+              params=("round_number",), fixed={"limit": 10}),
+    QueryCase("suggestions_by_strategy",
+              filtered(SUGGESTIONS_QUERY, SUGGESTIONS_FILTERS, SUGGESTIONS_ORDER, "strategy"),
+              params=("strategy",), fixed={"limit": 10}),
+    QueryCase("suggestions_by_round_strategy",
+              filtered(SUGGESTIONS_QUERY, SUGGESTIONS_FILTERS, SUGGESTIONS_ORDER, "round_number", "strategy"),
+              params=("round_number", "strategy"), fixed={"limit": 10}),
+    QueryCase("suggestion_round", SUGGESTION_ROUND_QUERY, params=("suggestion_id",)),
+    QueryCase("suggestion_detail", SUGGESTION_DETAIL_QUERY, params=("suggestion_id",)),
+    QueryCase("suggestion_players", SUGGESTION_PLAYERS_QUERY, params=("suggestion_id", "round_number")),
+    QueryCase("suggestion_simulation", SUGGESTION_SIMULATION_QUERY, params=("suggestion_id", "round_number")),
+    QueryCase("top_performers_roi",
+              filtered(TOP_PERFORMERS_QUERY, TOP_PERFORMERS_FILTERS, top_performers_order("roi")),
+              fixed={"limit": 10}, allow_seq_scan=MARKET_WIDE),
+    QueryCase("dashboard_total_players", DASHBOARD_TOTAL_PLAYERS_QUERY, allow_seq_scan=MARKET_WIDE),
+    QueryCase("dashboard_market_stats", DASHBOARD_MARKET_STATS_QUERY, allow_seq_scan=MARKET_WIDE),
+    QueryCase("dashboard_positions", DASHBOARD_POSITIONS_QUERY, allow_seq_scan=MARKET_WIDE),
+    QueryCase("optimizer_current_round", CURRENT_ROUND_QUERY),
+    QueryCase("optimizer_price_trends", PRICE_TRENDS_QUERY, params=("round_number",), fixed={"lookback": 3}),
+    QueryCase("optimizer_players", MARKET_PLAYERS_QUERY, params=("round_number",), allow_seq_scan=MARKET_WIDE),
+    QueryCase("live_partials_lineups", LIVE_LINEUPS_QUERY, params=("round_number",), allow_seq_scan=MARKET_WIDE)
+]
+
+def sample_params(engine) -> Dict[str, Any]:
+    """Valores reais da base para os parâmetros das consultas"""
+    with engine.connect() as conn:
+        round_number = conn.execute(text(CURRENT_ROUND_QUERY)).scalar()
+        player_id = conn.execute(text("""
+            SELECT jogador_id FROM estatisticas_rodada WHERE fonte = 'cartola' ORDER BY jogador_id LIMIT 1
+        """)).scalar()
+        suggestion_id = conn.execute(text("""
+            SELECT id FROM sugestoes_times WHERE rodada = :rodada ORDER BY id LIMIT 1
+        """), {"rodada": round_number}).scalar()
+
+    return {
+        "round_number": round_number,
+        "player_id": str(player_id),
+        "suggestion_id": str(suggestion_id),
+        "strategy": "balanced",
+        "q": "jogdor 12",  # Com erro de digitação: só a busca aproximada encontra
+        "position": "MEI",
+        "min_price": 5.0,
+        "max_price": 12.0
+    }
+
+def explain(conn, case: QueryCase, params: Dict[str, Any]) -> Dict[str, Any]:
+    statement = text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {case.sql}")
+    plan = conn.execute(statement, {**case.fixed, **{key: params[key] for key in case.params}}).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+def walk(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+def summarize(plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mediana do tempo, buffers (hit + read) e tabelas lidas por Seq Scan"""
+    root = plans[-1]["Plan"]
+    return {
+        "execution_ms": round(statistics.median(plan["Execution Time"] for plan in plans), 3),
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "seq_scans": sorted({node["Relation Name"] for node in walk(root) if node["Node Type"] == "Seq Scan"})
+    }
+
+def table_rows(conn) -> Dict[str, float]:
+    """Linhas estimadas (pg_class) das tabelas do schema"""
+    rows = conn.execute(text("""
+        SELECT c.relname, c.reltuples FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'supermittos' AND c.relkind IN ('r', 'p')
+    """))
+    return {name: tuples for name, tuples in rows}
+
+def check(case: QueryCase,
+          result: Dict[str, Any],
+          baseline: Dict[str, Any],
+          sizes: Dict[str, float],
+          args) -> List[str]:
+    # Seq Scan em tabela pequena (domínio, poucos jogadores) é o plano certo
+    problems = [
+        f"Seq Scan em {table} ({sizes.get(table, 0):.0f} linhas)"
+        for table in result["seq_scans"]
+        if sizes.get(table, 0) >= args.seq_scan_min_rows and table not in case.allow_seq_scan
+    ]
+
+    previous = baseline.get(case.name)
+    if previous:
+        time_limit = previous["execution_ms"] * (1 + args.time_tolerance) + args.time_slack_ms
+        if result["execution_ms"] > time_limit:
+            problems.append(f"tempo {result['execution_ms']:.2f} ms > {time_limit:.2f} ms (baseline {previous['execution_ms']:.2f})")
+        buffer_limit = previous["buffers"] * (1 + args.buffer_tolerance) + args.buffer_slack
+        if result["buffers"] > buffer_limit:
+            problems.append(f"buffers {result['buffers']} > {buffer_limit:.0f} (baseline {previous['buffers']})")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="PostgreSQL descartável com a temporada sintética")
+    parser.add_argument("--seed", action="store_true", help="Recria o schema e popula a temporada antes")
+    parser.add_argument("--no-migrations", action="store_true", help="Com --seed: só database/schema.sql")
+    add_season_arguments(parser)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como nova baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Aumento relativo de tempo aceito")
+    parser.add_argument("--time-slack-ms", type=float, default=1.0, help="Folga absoluta para consultas muito rápidas")
+    parser.add_argument("--buffer-tolerance", type=float, default=0.2, help="Aumento relativo de buffers aceito")
+    parser.add_argument("--buffer-slack", type=int, default=8,
+                        help="Folga absoluta de buffers (ids sorteados mudam a cada --seed)")
+    parser.add_argument("--seq-scan-min-rows", type=int, default=5000, help="Tabelas menores podem ter Seq Scan")
+    parser.add_argument("--only", action="append", help="Roda só os casos indicados")
+    args = parser.parse_args()
+
+    if args.seed:
+        engine = build_season(args.database_url, spec_from_args(args), migrations=not args.no_migrations)
+    else:
+        engine = season_engine(args.database_url)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    params = sample_params(engine)
+    cases = [case for case in CASES if not args.only or case.name in args.only]
+    results, failures = {}, 0
+
+    print(f"🔎 Planos de consulta - {len(cases)} consultas, mediana de {args.repeat} execuções")
+    with engine.connect() as conn:
+        sizes = table_rows(conn)
+        for case in cases:
+            plans = [explain(conn, case, params) for _ in range(args.repeat)]
+            result = results[case.name] = summarize(plans)
+            problems = check(case, result, baseline, sizes, args)
+            failures += bool(problems)
+
+            status = "FALHOU" if problems else "ok"
+            print(f"  {case.name:<32} {result['execution_ms']:8.2f} ms  {result['buffers']:>7} buffers  {status}")
+            for problem in problems:
+                print(f"      - {problem}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline gravada em {args.baseline}")
+
+    if failures:
+        print(f"❌ {failures} consulta(s) com regressão")
+        sys.exit(1)
+    print("✅ Nenhuma regressão")
+
+if __name__ == "__main__":
+    main()
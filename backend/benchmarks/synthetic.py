@@ -0,0 +1,152 @@
+"""
+SuperMittos Benchmarks - Dados sintéticos
+Geração de pools de jogadores e sugestões com distribuições realistas do Cartola FC
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Permite importar os módulos da aplicação (mesmo layout usado pela API)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.team_optimizer import PlayerData  # noqa: E402
+from etl.fixture_store import FixtureStore  # noqa: E402
+
+# Proporção aproximada de cada posição no mercado do Cartola
+POSITION_SHARES = {
+    "GOL": 0.10,
+    "ZAG": 0.20,
+    "LAT": 0.18,
+    "MEI": 0.32,
+    "ATA": 0.20
+}
+
+# Tamanhos de pool usados nos benchmarks de otimização
+POOL_SIZES = [200, 400, 800]
+
+# Listas de jogadores nos payloads das fontes do ETL (Cartola, FootyStats, SofaScore)
+ETL_PLAYER_LISTS = ("atletas", "data", "players")
+ETL_NAME_FIELDS = ("nome", "apelido", "name")
+ETL_ID_FIELDS = ("atleta_id", "id")
+
+def make_player_pool(n_players: int = 800, n_clubs: int = 20, seed: int = 42) -> List[PlayerData]:
+    """Gera um pool de jogadores com preço correlacionado à pontuação"""
+    rng = np.random.default_rng(seed)
+
+    positions = rng.choice(list(POSITION_SHARES), size=n_players, p=list(POSITION_SHARES.values()))
+    clubs = rng.integers(1, n_clubs + 1, size=n_players)
+    prices = np.round(rng.gamma(shape=2.0, scale=3.5, size=n_players) + 1.0, 2)
+    quality = prices * 0.45 + rng.normal(0, 1.5, size=n_players)
+    avg_scores = np.clip(quality, 0, None)
+    recent_form = np.clip(quality + rng.normal(0, 2.5, size=n_players), 0, None)
+    consistency = np.clip(rng.gamma(shape=2.0, scale=1.5, size=n_players), 0.5, 10)
+    prob_starter = np.clip(rng.beta(5, 2, size=n_players), 0, 1)
+
+    return [
+        PlayerData(
+            id=f"p{i}",
+            cartola_id=100000 + i,
+            name=f"Jogador {i}",
+            position=str(positions[i]),
+            club_id=int(clubs[i]),
+            price=float(prices[i]),
+            expected_points=0,
+            variance=float(consistency[i]) ** 2,
+            prob_starter=float(prob_starter[i]),
+            recent_form=float(recent_form[i]),
+            consistency=float(consistency[i]),
+            roi=0,
+            injured=bool(rng.random() < 0.03),
+            suspended=bool(rng.random() < 0.02),
+            avg_score=float(avg_scores[i])
+        )
+        for i in range(n_players)
+    ]
+
+def make_suggestions(n_suggestions: int = 30, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera sugestões no formato retornado por TeamOptimizer.optimize_team (sem resolver o ILP)"""
+    rng = np.random.default_rng(seed)
+    formation = ["GOL"] + ["ZAG"] * 3 + ["MEI"] * 4 + ["ATA"] * 3
+    suggestions = []
+
+    for s in range(n_suggestions):
+        player_ids = rng.choice(5000, size=len(formation), replace=False)
+        prices = np.round(rng.uniform(2, 15, size=len(formation)), 2)
+        points = np.round(rng.uniform(1, 12, size=len(formation)), 2)
+        captain, vice = np.argsort(-points)[:2]
+
+        suggestions.append({
+            "success": True,
+            "strategy": ["conservative", "balanced", "aggressive"][s % 3],
+            "formation": "3-4-3",
+            "players": [
+                {
+                    "id": f"p{player_ids[i]}",
+                    "position": position,
+                    "price": float(prices[i]),
+                    "expected_points": float(points[i]),
+                    "roi": round(float(points[i] / prices[i]), 4),
+                    "is_captain": i == captain,
+                    "is_vice_captain": i == vice
+                }
+                for i, position in enumerate(formation)
+            ],
+            "metrics": {
+                "total_cost": round(float(prices.sum()), 2),
+                "total_expected_points": round(float(points.sum()), 2),
+                "expected_roi": round(float(points.sum() / prices.sum()), 4)
+            },
+            "constraints_used": {"budget": 100.0, "formation": "3-4-3"}
+        })
+
+    return suggestions
+
+def scale_etl_recording(store: FixtureStore, source: str, factor: int, seed: int = 42) -> str:
+    """
+    Cria a gravação "<source>-x<factor>" com as listas de jogadores replicadas
+
+    Cada cópia recebe ids deslocados, nome com sufixo e preço/média com ruído,
+    então o merge trabalha com um mercado factor vezes maior. Payloads sem
+    listas de jogadores (status, clubes) são reaproveitados pelo mesmo blob.
+    """
+    rng = np.random.default_rng(seed)
+    original = store.recording(source, "replay")
+    with store.recording(f"{source}-x{factor}", "record") as scaled:
+        for key, entry in original.entries.items():
+            body = original.get(key)["body"]
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+
+            if isinstance(payload, dict):
+                for list_key in ETL_PLAYER_LISTS:
+                    items = payload.get(list_key)
+                    if isinstance(items, list) and items and isinstance(items[0], dict):
+                        payload[list_key] = [
+                            item if copy == 0 else _scaled_item(item, copy, rng)
+                            for copy in range(factor)
+                            for item in items
+                        ]
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+            scaled.put(key, body, entry["status"], entry["content_type"])
+
+    return scaled.name
+
+def _scaled_item(item: Dict[str, Any], copy: int, rng: np.random.Generator) -> Dict[str, Any]:
+    item = dict(item)
+    for field in ETL_ID_FIELDS:
+        if isinstance(item.get(field), int):
+            item[field] += copy * 1_000_000
+    for field in ETL_NAME_FIELDS:
+        if isinstance(item.get(field), str):
+            item[field] = f"{item[field]} {copy}"
+    for field in ("preco_num", "media_num"):
+        if isinstance(item.get(field), (int, float)):
+            item[field] = round(max(0.0, item[field] * float(rng.uniform(0.8, 1.2))), 2)
+    return item
@@ -0,0 +1,294 @@
+"""
+SuperMittos Benchmarks - Temporada sintética no PostgreSQL
+Recria o schema (database/schema.sql + database/migrations) e popula uma
+temporada completa: clubes, jogadores, rodadas de estatísticas por fonte,
+preços, prováveis, predições e sugestões, em SQL (generate_series) para que
+uma temporada inteira leve segundos
+
+Uso: python synthetic_season.py --database-url postgresql://localhost/supermittos_bench
+ATENÇÃO: apaga o schema supermittos do banco indicado.
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, text
+
+DATABASE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'database')
+SCHEMA_PATH = os.path.join(DATABASE_DIR, 'schema.sql')
+MIGRATIONS_GLOB = os.path.join(DATABASE_DIR, 'migrations', '*.sql')
+INCLUDED_MIGRATIONS = re.compile(r"^-- Migrations incorporadas: ([^(\n]+)", re.MULTILINE)
+
+# Fontes de estatisticas_rodada e de provaveis_escalacoes (com a confiabilidade)
+STATS_SOURCES = ("cartola", "footystats", "sofascore")
+PROVAVEIS_SOURCES = {"cartola": 80.0, "globo": 60.0}
+
+# Distribuição de posições em ciclos de 20 jogadores (posicao_id do Cartola)
+POSITION_CYCLE = [1] * 2 + [3] * 4 + [2] * 4 + [4] * 6 + [5] * 4
+
+@dataclass
+class SeasonSpec:
+    """Tamanho da temporada sintética"""
+    clubs: int = 20
+    players_per_club: int = 40
+    rounds: int = 38
+    suggestions_per_round: int = 30
+    # Rodadas com sugestões: as que a retenção de partições mantém (PARTITION_SUGGESTION_ROUNDS)
+    suggestion_rounds: int = 5
+    season: str = "2024"
+    seed: float = 0.42
+    stats_sources: Tuple[str, ...] = field(default=STATS_SOURCES)
+
+    @property
+    def players(self) -> int:
+        return self.clubs * self.players_per_club
+
+def season_engine(database_url: str, **kwargs):
+    """Engine com o search_path do schema (o mesmo que a API usa)"""
+    return create_engine(database_url, connect_args={"options": "-csearch_path=supermittos,public"}, **kwargs)
+
+def split_statements(script: str) -> List[str]:
+    """Comandos de um script SQL, respeitando corpos de função entre $$"""
+    statements, current, in_body = [], [], False
+    for line in script.splitlines():
+        stripped = line.strip()
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        in_body ^= line.count("$$") % 2 == 1
+        if not in_body and stripped.split("--")[0].rstrip().endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    if current and "".join(current).strip():
+        statements.append("\n".join(current))
+    return statements
+
+def pending_migrations() -> List[str]:
+    """Migrations ainda não incorporadas ao schema.sql (cabeçalho "Migrations incorporadas")"""
+    with open(SCHEMA_PATH, encoding="utf-8") as schema:
+        included = INCLUDED_MIGRATIONS.search(schema.read())
+    numbers = set(re.findall(r"\d+", included.group(1))) if included else set()
+    return [
+        path for path in sorted(glob.glob(MIGRATIONS_GLOB))
+        if os.path.basename(path).split("_")[0] not in numbers
+    ]
+
+def apply_schema(engine, migrations: bool = True) -> List[str]:
+    """Recria o schema supermittos do zero; retorna os arquivos aplicados"""
+    paths = [SCHEMA_PATH] + (pending_migrations() if migrations else [])
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS supermittos CASCADE"))
+        # Cursor do driver sem parâmetros: ':' e '%' (format() nas funções) vão literais
+        cursor = conn.connection.cursor()
+        for path in paths:
+            with open(path, encoding="utf-8") as script:
+                for statement in split_statements(script.read()):
+                    cursor.execute(statement)
+    return [os.path.basename(path) for path in paths]
+
+SEED_STATEMENTS = [
+    # Uma partição por rodada com dados, como o ETL cria: estatísticas e preços
+    # até a última rodada pontuada, predições também na do mercado aberto e
+    # sugestões só nas rodadas que a retenção mantém
+    ("particoes", """
+    SELECT criar_particao_rodada(t, :season, r)
+    FROM (VALUES ('estatisticas_rodada', 1, :rounds), ('historico_precos', 1, :rounds),
+                 ('predicoes', 1, :rounds + 1),
+                 ('sugestoes_times', :first_suggestion_round, :rounds + 1),
+                 ('sugestoes_jogadores', :first_suggestion_round, :rounds + 1)) AS p(t, desde, ate)
+    CROSS JOIN LATERAL generate_series(p.desde, p.ate) r
+    """),
+    ("clubes", """
+    INSERT INTO clubes (clube_id, nome, nome_normalizado, abreviacao)
+    SELECT c, 'Clube ' || c, 'clube ' || c, 'C' || lpad(c::text, 2, '0')
+    FROM generate_series(1, :clubs) c
+    """),
+    ("jogadores", """
+    INSERT INTO jogadores (jogador_id, nome, nome_normalizado, apelido, apelido_normalizado, clube_id, clube_nome,
+                           posicao_id, posicao_nome, status_ativo)
+    SELECT 100000 + g, 'Jogador ' || g, 'jogador ' || g, 'J' || g, 'j' || g,
+           (g % :clubs) + 1, 'Clube ' || ((g % :clubs) + 1),
+           p.posicao_id, p.nome, random() < 0.95
+    FROM generate_series(0, :players - 1) g
+    JOIN posicoes p ON p.posicao_id = (:position_cycle)[(g % 20) + 1]
+    """),
+    # Nível do jogador (0-10) fixo na temporada: pontos e preço giram em torno dele
+    ("nivel", """
+    CREATE TEMP TABLE nivel_jogador AS
+    SELECT id, clube_id, ((jogador_id * 37) % 100) / 10.0 AS nivel FROM jogadores
+    """),
+    ("estatisticas_rodada", """
+    INSERT INTO estatisticas_rodada (jogador_id, rodada, pontos_cartola, preco, jogou, casa,
+                                     minutos_jogados, gols, assistencias, xg, xa, rating, fonte)
+    SELECT n.id, n.r,
+           CASE WHEN jogou THEN round((n.nivel + (random() + random() + random() - 1.5) * 4)::numeric, 2) END,
+           round((2 + n.nivel * 1.5 + r * 0.02)::numeric, 2),
+           jogou,
+           (r + n.clube_id) % 2 = 0,
+           CASE WHEN jogou THEN 45 + (random() * 45)::int ELSE 0 END,
+           CASE WHEN jogou AND random() < n.nivel / 40 THEN 1 ELSE 0 END,
+           CASE WHEN jogou AND random() < n.nivel / 50 THEN 1 ELSE 0 END,
+           CASE WHEN f <> 'cartola' THEN round((random() * n.nivel / 10)::numeric, 2) END,
+           CASE WHEN f <> 'cartola' THEN round((random() * n.nivel / 15)::numeric, 2) END,
+           CASE WHEN f <> 'cartola' THEN round((5.5 + n.nivel / 4 + random())::numeric, 1) END,
+           f
+    FROM (
+        SELECT n.*, r, f, random() < 0.7 AS jogou
+        FROM nivel_jogador n
+        CROSS JOIN generate_series(1, :rounds) r
+        CROSS JOIN unnest(CAST(:stats_sources AS text[])) f
+    ) n
+    """),
+    ("estatisticas_historicas", """
+    INSERT INTO estatisticas_historicas (jogador_id, periodo, temporada, jogos, media_pontos, media_preco,
+                                         gols_total, assistencias_total, consistencia, forma_recente,
+                                         tendencia, ultima_rodada)
+    SELECT er.jogador_id, w.periodo, :season, COUNT(*), AVG(er.pontos_cartola), AVG(er.preco),
+           SUM(er.gols), SUM(er.assistencias), COALESCE(STDDEV_SAMP(er.pontos_cartola), 0),
+           AVG(er.pontos_cartola) FILTER (WHERE er.rodada > :rounds - 5), 'estavel', :rounds
+    FROM estatisticas_rodada er
+    JOIN (VALUES ('temporada', 1, NULL), ('ultimos_10', :rounds - 9, NULL), ('ultimos_5', :rounds - 4, NULL),
+                 ('casa', 1, true), ('fora', 1, false)) AS w(periodo, desde, casa)
+      ON er.rodada >= w.desde AND (w.casa IS NULL OR er.casa = w.casa)
+    WHERE er.fonte = 'cartola' AND er.jogou
+    GROUP BY er.jogador_id, w.periodo
+    """),
+    ("historico_precos", """
+    INSERT INTO historico_precos (jogador_id, rodada, preco, variacao, variacao_percentual)
+    SELECT jogador_id, rodada, preco,
+           preco - LAG(preco, 1, preco) OVER w,
+           round(((preco / NULLIF(LAG(preco, 1, preco) OVER w, 0) - 1) * 100)::numeric, 2)
+    FROM estatisticas_rodada
+    WHERE fonte = 'cartola'
+    WINDOW w AS (PARTITION BY jogador_id ORDER BY rodada)
+    """),
+    ("provaveis_escalacoes", """
+    INSERT INTO provaveis_escalacoes (jogador_id, rodada, probabilidade_titular, lesionado, suspenso,
+                                      fonte, confiabilidade)
+    SELECT n.id, r, round((random() * 100)::numeric, 1), random() < 0.03, random() < 0.02, f.fonte, f.confiabilidade
+    FROM nivel_jogador n
+    CROSS JOIN generate_series(1, :rounds + 1) r
+    CROSS JOIN unnest(CAST(:provaveis_sources AS text[]), CAST(:provaveis_reliability AS real[])) f(fonte, confiabilidade)
+    """),
+    ("mercado_status", """
+    INSERT INTO mercado_status (rodada_atual, mercado_aberto, temporada, created_at)
+    SELECT r, r = :rounds + 1, :season, TIMESTAMP '2024-04-13' + (r - 1) * INTERVAL '7 days'
+    FROM generate_series(1, :rounds + 1) r
+    ON CONFLICT (temporada, rodada_atual) DO UPDATE SET created_at = EXCLUDED.created_at
+    """),
+    ("modelos_predicao", """
+    INSERT INTO modelos_predicao (nome, versao, tipo, algoritmo, ativo, created_at)
+    VALUES ('ridge_pontuacao', 'sintetico', 'pontuacao', 'ridge', true, CURRENT_TIMESTAMP)
+    """),
+    ("predicoes", """
+    INSERT INTO predicoes (modelo_id, jogador_id, rodada, valor_predito, confianca, intervalo_min, intervalo_max,
+                           valor_real, erro_absoluto)
+    SELECT m.id, n.id, r, round(n.nivel::numeric, 2), 0.6, n.nivel - 3, n.nivel + 3,
+           er.pontos_cartola, ABS(er.pontos_cartola - n.nivel)
+    FROM nivel_jogador n
+    CROSS JOIN generate_series(1, :rounds + 1) r
+    CROSS JOIN (SELECT id FROM modelos_predicao WHERE ativo LIMIT 1) m
+    LEFT JOIN estatisticas_rodada er ON er.jogador_id = n.id AND er.rodada = r AND er.fonte = 'cartola'
+    """),
+    ("sugestoes_times", """
+    INSERT INTO sugestoes_times (rodada, orcamento_maximo, estrategia, esquema_tatico,
+                                 pontuacao_esperada, custo_total, roi_esperado, created_at)
+    SELECT r, 100.0, (ARRAY['conservative', 'balanced', 'aggressive'])[(s % 3) + 1],
+           (ARRAY['3-4-3', '4-3-3', '4-4-2'])[(s % 3) + 1],
+           round((40 + random() * 40)::numeric, 2), round((80 + random() * 20)::numeric, 2),
+           round((0.4 + random() * 0.4)::numeric, 4),
+           TIMESTAMP '2024-04-13' + (r - 1) * INTERVAL '7 days' + s * INTERVAL '1 minute'
+    FROM generate_series(:first_suggestion_round, :rounds + 1) r
+    CROSS JOIN generate_series(0, :suggestions_per_round - 1) s
+    """),
+    # 12 jogadores distintos por sugestão: deslocamentos k * (N / 12) a partir de um início por sugestão
+    ("sugestoes_jogadores", """
+    INSERT INTO sugestoes_jogadores (sugestao_id, rodada, jogador_id, posicao_time, capitao, vice_capitao,
+                                     pontos_esperados, preco, roi_individual)
+    SELECT st.id, st.rodada, j.id, p.abreviacao, k = 0, k = 1,
+           round((2 + random() * 10)::numeric, 2), round((2 + random() * 15)::numeric, 2),
+           round(random()::numeric, 4)
+    FROM (SELECT id, rodada, row_number() OVER (ORDER BY id) AS n FROM sugestoes_times) st
+    CROSS JOIN generate_series(0, 11) k
+    JOIN jogadores j ON j.jogador_id = 100000 + (st.n * 7919 + k * (:players / 12)) % :players
+    JOIN posicoes p ON p.posicao_id = j.posicao_id
+    """)
+]
+
+# Passos do seed que não são tabelas
+SETUP_STEPS = ("particoes", "nivel")
+
+def seed_season(engine, spec: SeasonSpec) -> Dict[str, float]:
+    """Popula a temporada (schema já aplicado); retorna segundos por tabela"""
+    params = {
+        **asdict(spec),
+        "players": spec.players,
+        "first_suggestion_round": max(1, spec.rounds + 2 - spec.suggestion_rounds),
+        "stats_sources": list(spec.stats_sources),
+        "provaveis_sources": list(PROVAVEIS_SOURCES),
+        "provaveis_reliability": list(PROVAVEIS_SOURCES.values()),
+        "position_cycle": POSITION_CYCLE
+    }
+    timings = {}
+    with engine.begin() as conn:
+        conn.execute(text("SELECT setseed(:seed)"), {"seed": spec.seed})
+        for name, statement in SEED_STATEMENTS:
+            start = time.perf_counter()
+            conn.execute(text(statement), params)
+            timings[name] = time.perf_counter() - start
+
+    # VACUUM marca o visibility map: index-only scans como em produção
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE"))
+    return timings
+
+def table_counts(engine) -> Dict[str, int]:
+    tables = [name for name, _ in SEED_STATEMENTS if name not in SETUP_STEPS]
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in tables}
+
+def build_season(database_url: str, spec: SeasonSpec, migrations: bool = True):
+    """Schema do zero + temporada sintética; retorna a engine pronta"""
+    engine = season_engine(database_url)
+    applied = apply_schema(engine, migrations)
+    print(f"🗄️  Schema aplicado: {', '.join(applied)}")
+
+    timings = seed_season(engine, spec)
+    counts = table_counts(engine)
+    for table, count in counts.items():
+        print(f"  {table:<24} {count:>9} linhas  {timings.get(table, 0) * 1000:8.1f} ms")
+    return engine
+
+def add_season_arguments(parser: argparse.ArgumentParser):
+    defaults = SeasonSpec()
+    parser.add_argument("--clubs", type=int, default=defaults.clubs)
+    parser.add_argument("--players-per-club", type=int, default=defaults.players_per_club)
+    parser.add_argument("--rounds", type=int, default=defaults.rounds)
+    parser.add_argument("--suggestions-per-round", type=int, default=defaults.suggestions_per_round)
+    parser.add_argument("--suggestion-rounds", type=int, default=defaults.suggestion_rounds)
+
+def spec_from_args(args) -> SeasonSpec:
+    return SeasonSpec(
+        clubs=args.clubs,
+        players_per_club=args.players_per_club,
+        rounds=args.rounds,
+        suggestions_per_round=args.suggestions_per_round,
+        suggestion_rounds=args.suggestion_rounds
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="PostgreSQL descartável (o schema é recriado)")
+    parser.add_argument("--no-migrations", action="store_true", help="Só database/schema.sql")
+    add_season_arguments(parser)
+    args = parser.parse_args()
+
+    build_season(args.database_url, spec_from_args(args), migrations=not args.no_migrations)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ Servidor Python para análise de futebol integrado com banco PostgreSQL
 
 import os
 import json
+import gzip
+import hashlib
 import logging
 from datetime import datetime
 from http.server import HTTPServer, BaseHTTPRequestHandler
@@ -31,6 +33,30 @@ except ImportError:
     print("⚠️  python-dotenv não instalado. Instale com: pip install python-dotenv")
     ENV_AVAILABLE = False
 
+# Serialização rápida (opcional): orjson para JSON, msgpack sob Accept
+try:
+    import orjson
+    # Datas continuam passando por default=str, no mesmo formato do json.dumps
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Compressão das respostas (opcional: brotli; sem ele, só gzip)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSION_MIN_BYTES = int(os.getenv('HTTP_COMPRESSION_MIN_BYTES', 1024))
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -142,16 +168,90 @@ class SuperMittosHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.send_header('Access-Control-Allow-Credentials', 'true')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+    
+    def wants_msgpack(self) -> bool:
+        """Cliente pediu MessagePack no Accept"""
+        if msgpack is None:
+            return False
+        accepted = [part.split(';')[0].strip().lower() for part in (self.headers.get('Accept') or '').split(',')]
+        return any(media_type in accepted for media_type in MSGPACK_MEDIA_TYPES)
+    
+    def etag_matches(self, etag: str) -> bool:
+        """If-None-Match com a ETag da resposta (ignora W/ e o sufixo da codificação)"""
+        for candidate in (self.headers.get('If-None-Match') or '').split(','):
+            candidate = candidate.strip()
+            candidate = candidate[2:] if candidate.startswith('W/') else candidate
+            for encoding in ('br', 'gzip'):
+                candidate = candidate.replace(f'-{encoding}"', '"')
+            if candidate == '*' or candidate == etag:
+                return True
+        return False
+    
+    def choose_encoding(self) -> Optional[str]:
+        """Codificação preferida entre as aceitas (q > 0) no Accept-Encoding"""
+        accepted = {}
+        for part in (self.headers.get('Accept-Encoding') or '').split(','):
+            name, _, params = part.strip().partition(';')
+            try:
+                quality = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+            except ValueError:
+                quality = 0.0
+            if name:
+                accepted[name.lower()] = quality
+        for encoding in ENCODINGS:
+            if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+                return encoding
+        return None
     
     def send_json_response(self, data: Any, status_code: int = 200):
-        """Envia resposta JSON"""
+        """
+        Envia resposta JSON (ou MessagePack, se o cliente pedir)
+        
+        GET 200 leva ETag forte (hash do corpo) e responde 304 ao If-None-Match
+        igual; corpos a partir de COMPRESSION_MIN_BYTES vão com gzip/brotli
+        """
+        if self.wants_msgpack():
+            body = msgpack.packb(data, default=str, use_bin_type=True)
+            content_type = MSGPACK_MEDIA_TYPES[0]
+        elif orjson is not None:
+            body = orjson.dumps(data, default=str, option=ORJSON_OPTIONS)
+            content_type = 'application/json; charset=utf-8'
+        else:
+            body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        
+        etag = None
+        if status_code == 200 and self.command == 'GET':
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            if self.etag_matches(etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Vary', 'Accept, Accept-Encoding')
+                self.send_cors_headers()
+                self.end_headers()
+                return
+        
+        encoding = self.choose_encoding() if len(body) >= COMPRESSION_MIN_BYTES else None
+        if encoding == 'br':
+            body = brotli.compress(body, quality=5)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+        
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept, Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if etag:
+            self.send_header('ETag', etag[:-1] + f'-{encoding}"' if encoding else etag)
+            self.send_header('Cache-Control', 'no-cache')
         self.send_cors_headers()
         self.end_headers()
         
-        json_data = json.dumps(data, ensure_ascii=False, default=str)
-        self.wfile.write(json_data.encode('utf-8'))
+        self.wfile.write(body)
     
     def do_GET(self):
         """Handle GET requests"""
@@ -230,7 +330,7 @@ class SuperMittosHandler(BaseHTTPRequestHandler):
                 posicao_nome as position,
                 clube_nome as team,
                 COALESCE(valor_mercado, 1000000) as price,
-                85 + (RANDOM() * 15)::int as rating
+                85 + (jogador_id % 15)::int as rating
             FROM supermittos.jogadores 
             WHERE status_ativo = true
             ORDER BY nome
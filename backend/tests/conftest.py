@@ -0,0 +1,10 @@
+"""
+SuperMittos Tests
+Rodar em backend/: python -m pytest tests
+"""
+
+import os
+import sys
+
+# Permite importar os módulos da aplicação (mesmo layout usado pela API)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
@@ -0,0 +1,28 @@
+"""
+Gravações de fixtures do ETL: manifesto escrito no fechamento
+"""
+
+from etl.fixture_store import FixtureStore, request_key
+
+def test_manifest_written_once_on_close(tmp_path, monkeypatch):
+    store = FixtureStore(str(tmp_path))
+    writes = []
+    save_manifest = store.save_manifest
+    monkeypatch.setattr(store, "save_manifest", lambda name, manifest: writes.append(name) or save_manifest(name, manifest))
+
+    with store.recording("rodada-1", "record") as recording:
+        for page in range(5):
+            recording.put(request_key("GET", "https://api.example/atletas", {"page": page}), b'{"ok": true}')
+        assert writes == [] and store.list_recordings() == []
+
+    assert writes == ["rodada-1"]
+    replay = store.recording("rodada-1", "replay")
+    assert len(replay.entries) == 5
+    assert replay.get(request_key("GET", "https://api.example/atletas", {"page": 3}))["body"] == b'{"ok": true}'
+
+def test_close_without_new_entries_keeps_manifest(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    recording = store.recording("vazia", "record")
+    recording.close()
+
+    assert store.list_recordings() == []
@@ -0,0 +1,50 @@
+"""
+Otimizador heurístico: orçamento de tempo de ponta a ponta
+"""
+
+import statistics
+import time
+
+import numpy as np
+
+from services.team_optimizer import (
+    OptimizationConstraints, OptimizationMode, OptimizationStrategy, PlayerData, TeamOptimizer
+)
+
+POSITIONS = ("GOL", "LAT", "ZAG", "MEI", "ATA")
+
+# Folga para montar o resultado depois do prazo e para o ruído do agendador
+TOLERANCE_MS = 3.0
+
+def _pool(size: int, seed: int = 0):
+    """Preço correlacionado à pontuação (busca local não converge de imediato)"""
+    rng = np.random.default_rng(seed)
+    prices = rng.gamma(2.0, 3.5, size=size) + 1.0
+    quality = prices * 0.45 + rng.normal(0, 1.5, size=size)
+    return [
+        PlayerData(
+            id=str(i), cartola_id=i, name=f"Jogador {i}", position=POSITIONS[i % len(POSITIONS)],
+            club_id=int(rng.integers(20)), price=float(prices[i]), expected_points=0.0,
+            variance=float(rng.uniform(1, 6)), prob_starter=float(rng.uniform(0.6, 1)),
+            recent_form=float(max(quality[i] + rng.normal(0, 2.5), 0)), consistency=float(rng.uniform(1, 8)),
+            roi=0.0, avg_score=float(max(quality[i], 0))
+        )
+        for i in range(size)
+    ]
+
+def test_heuristic_respects_time_budget():
+    players = _pool(800)
+    budget_ms = 20.0
+    optimizer = TeamOptimizer(OptimizationStrategy.BALANCED, mode=OptimizationMode.HEURISTIC,
+                              time_budget_ms=budget_ms)
+
+    elapsed, solver = [], []
+    for _ in range(5):
+        start = time.perf_counter()
+        result = optimizer.optimize_team(players, OptimizationConstraints())
+        elapsed.append((time.perf_counter() - start) * 1000)
+        solver.append(result["solver"]["elapsed_ms"])
+
+    assert len(result["players"]) == 11
+    assert statistics.median(elapsed) <= budget_ms + TOLERANCE_MS
+    assert max(solver) <= budget_ms + TOLERANCE_MS
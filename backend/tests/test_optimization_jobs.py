@@ -0,0 +1,67 @@
+"""
+Jobs de otimização: stream assíncrono dos resultados
+"""
+
+import asyncio
+import threading
+
+from services.optimization_jobs import OptimizationJobManager
+from services.team_optimizer import OptimizationConstraints, OptimizationStrategy
+
+class SlowEngine:
+    """Motor de teste: cada otimização espera a liberação do teste"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def load_players(self, round_number):
+        return []
+
+    def create_optimizer(self, strategy, round_number):
+        engine = self
+
+        class Optimizer:
+            def optimize_team(self, players, constraints):
+                engine.release.wait(5)
+                return {"strategy": strategy.value}
+
+        return Optimizer()
+
+SPECS = [(OptimizationStrategy.BALANCED, OptimizationConstraints()),
+         (OptimizationStrategy.AGGRESSIVE, OptimizationConstraints())]
+
+def test_stream_results_until_job_finishes():
+    engine = SlowEngine()
+    manager = OptimizationJobManager(engine, max_workers=2)
+
+    async def consume():
+        job = manager.submit(SPECS, round_number=1, persist=False)
+        lines = []
+        async for line in manager.stream_results(job.id, heartbeat=0.05):
+            lines.append(line)
+            if "status" in line:
+                engine.release.set()  # Heartbeat recebido: libera os solves
+        return job, lines
+
+    job, lines = asyncio.run(consume())
+
+    assert job.done
+    assert "status" in lines[0]
+    assert sorted(line["index"] for line in lines if "index" in line) == [0, 1]
+    assert manager._watchers == set()
+
+def test_stream_closed_by_client_unregisters():
+    engine = SlowEngine()
+    manager = OptimizationJobManager(engine, max_workers=2)
+
+    async def disconnect():
+        job = manager.submit(SPECS, round_number=1, persist=False)
+        stream = manager.stream_results(job.id, heartbeat=0.05)
+        assert "status" in await stream.__anext__()
+        assert len(manager._watchers) == 1
+        await stream.aclose()
+
+    asyncio.run(disconnect())
+    engine.release.set()
+
+    assert manager._watchers == set()
@@ -0,0 +1,38 @@
+"""Status das prováveis: palavras inteiras, negações e frases específicas primeiro"""
+
+import pytest
+
+from etl.provaveis_parser import _record
+
+def status_values(status):
+    record = _record("ge_cartola", "Jogador", "Clube", status, None)
+    if record is None:
+        return None
+    return (record["probabilidade_titular"], record["probabilidade_banco"],
+            record["confirmado"], record["lesionado"], record["suspenso"])
+
+OUT = (0.0, 0.0, False, False, False)
+PROBABLE = (80.0, 15.0, False, False, False)
+
+@pytest.mark.parametrize("status", ["Não escalado", "Improvável", "Não é titular", "Não relacionado",
+                                    "Fora", "Nulo", "não vai jogar"])
+def test_negated_status_is_out(status):
+    assert status_values(status) == OUT
+
+@pytest.mark.parametrize("status", ["Provável", "Titular", "fora de casa: provável"])
+def test_probable_status(status):
+    assert status_values(status) == PROBABLE
+
+def test_specific_statuses():
+    assert status_values("Confirmado") == (100.0, 0.0, True, False, False)
+    assert status_values("Escalado") == (100.0, 0.0, True, False, False)
+    assert status_values("Dúvida") == (50.0, 30.0, False, False, False)
+    assert status_values("Reserva") == (10.0, 80.0, False, False, False)
+    assert status_values("Lesionado, era titular")[3] is True
+    assert status_values("Suspenso") == (0.0, 0.0, False, False, True)
+
+def test_keywords_match_whole_words_only():
+    assert status_values("titularíssimo") is None
+
+def test_explicit_percentage_wins():
+    assert status_values("Provável (75%)")[0] == 75.0
@@ -0,0 +1,71 @@
+"""
+Estratégia robusta (CVaR): redução de cenários e restrição com a razão padrão
+"""
+
+import numpy as np
+import pandas as pd
+
+from services.scenarios import generate_scenarios, reduce_scenarios
+from services.team_optimizer import (
+    OptimizationConstraints, OptimizationStrategy, PlayerData, TeamOptimizer
+)
+
+POSITIONS = {"GOL": 4, "ZAG": 8, "LAT": 6, "MEI": 10, "ATA": 8}
+
+def _cvar(totals: np.ndarray, probabilities: np.ndarray, beta: float) -> float:
+    order = np.argsort(totals)
+    cumulative = np.cumsum(probabilities[order])
+    weights = np.minimum(np.clip(beta - (cumulative - probabilities[order]), 0, None), probabilities[order])
+    return float((weights * totals[order]).sum() / beta)
+
+def _pool():
+    """Metade dos jogadores regulares, metade voláteis com um pouco mais de média"""
+    rng = np.random.default_rng(7)
+    players, rows = [], []
+    for position, count in POSITIONS.items():
+        for i in range(count):
+            volatile = i % 2 == 0
+            player_id = f"{position}-{i}"
+            mean = (6.0 if volatile else 5.0) + i * 0.01
+            players.append(PlayerData(
+                id=player_id, cartola_id=len(players), name=player_id, position=position,
+                club_id=len(players), price=5.0, expected_points=0.0, variance=0.0,
+                prob_starter=1.0, recent_form=0.0, consistency=0.0, roi=0.0,
+                predicted_points=mean
+            ))
+            scores = mean + rng.normal(0, 8.0 if volatile else 1.0, size=20)
+            rows += [(player_id, rodada, len(players), score) for rodada, score in enumerate(scores, 1)]
+    history = pd.DataFrame(rows, columns=["jogador_id", "rodada", "clube_id", "pontos"])
+    return players, generate_scenarios(history, round_number=21)
+
+def test_reduced_scenarios_keep_the_tail():
+    rng = np.random.default_rng(1)
+    samples = rng.standard_t(3, size=(2000, 11)) * 4
+    totals = samples.sum(axis=1)
+    full = _cvar(totals, np.full(len(totals), 1 / len(totals)), 0.2)
+
+    scenarios, probabilities = reduce_scenarios(samples, 50, rng)
+
+    assert np.isclose(probabilities.sum(), 1.0)
+    assert np.allclose(probabilities @ scenarios, 0.0)
+    # Centroides do k-means encolhiam a cauda (CVaR reduzido bem acima do real)
+    assert abs(_cvar(scenarios.sum(axis=1), probabilities, 0.2) - full) < 0.15 * abs(full)
+
+def test_robust_differs_from_balanced_with_default_ratio():
+    players, scenarios = _pool()
+    constraints = OptimizationConstraints()
+    robust_optimizer = TeamOptimizer(OptimizationStrategy.ROBUST, scenarios=scenarios)
+
+    balanced = TeamOptimizer(OptimizationStrategy.BALANCED).optimize_team(players, constraints)
+    unconstrained = robust_optimizer.optimize_team(players, OptimizationConstraints(cvar_ratio=0.0))
+    robust = robust_optimizer.optimize_team(players, constraints)
+
+    balanced_ids = {p["id"] for p in balanced["players"]}
+    # Sem a restrição as duas estratégias coincidem; com a razão padrão ela é ativa
+    assert {p["id"] for p in unconstrained["players"]} == balanced_ids
+    assert {p["id"] for p in robust["players"]} != balanced_ids
+    assert unconstrained["risk"]["cvar"] < constraints.cvar_ratio * unconstrained["risk"]["scenario_mean"]
+
+    risk = robust["risk"]
+    assert risk["cvar"] >= constraints.cvar_ratio * risk["scenario_mean"] - 1e-6
+    assert risk["cvar"] < risk["scenario_mean"]
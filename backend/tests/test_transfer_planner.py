@@ -0,0 +1,48 @@
+"""
+Planejamento de transferências: elenco atual, exclusões e predições
+"""
+
+from services.team_optimizer import OptimizationConstraints, PlayerData
+from services.transfer_planner import TransferPlanner
+
+POSITIONS = {"GOL": 3, "ZAG": 6, "LAT": 4, "MEI": 8, "ATA": 6}
+SQUAD = ["GOL-0", "ZAG-0", "ZAG-1", "ZAG-2", "MEI-0", "MEI-1", "MEI-2", "MEI-3", "ATA-0", "ATA-1", "ATA-2"]
+
+def _pool(**overrides):
+    players = []
+    for position, count in POSITIONS.items():
+        for i in range(count):
+            player_id = f"{position}-{i}"
+            fields = dict(
+                id=player_id, cartola_id=len(players), name=player_id, position=position,
+                club_id=len(players), price=5.0, expected_points=0.0, variance=0.0,
+                prob_starter=1.0, recent_form=5.0, consistency=2.0, roi=0.0, avg_score=5.0
+            )
+            players.append(PlayerData(**{**fields, **overrides.get(player_id, {})}))
+    return players
+
+def _first_round(players, constraints, **kwargs):
+    plan = TransferPlanner().plan(players, constraints, current_squad=SQUAD, horizon=1, **kwargs)
+    return plan["rounds"][0]
+
+def test_excluded_squad_player_is_sold():
+    constraints = OptimizationConstraints(budget=60.0, excluded_players=["MEI-0"])
+    round_plan = _first_round(_pool(), constraints)
+
+    assert [p["id"] for p in round_plan["transfers_out"]] == ["MEI-0"]
+    assert "MEI-0" not in {p["id"] for p in round_plan["players"]}
+
+def test_excluded_club_applies_to_squad():
+    players = _pool()
+    club = next(p.club_id for p in players if p.id == "ATA-1")
+    round_plan = _first_round(players, OptimizationConstraints(budget=60.0, excluded_clubs=[club]))
+
+    assert "ATA-1" in {p["id"] for p in round_plan["transfers_out"]}
+
+def test_ineligible_squad_player_uses_prediction():
+    # Fora do corte de titular, mas com predição alta: deve ser mantido
+    players = _pool(**{"MEI-0": {"prob_starter": 0.1, "avg_score": 0.0, "recent_form": 0.0,
+                                 "predicted_points": 30.0}})
+    round_plan = _first_round(players, OptimizationConstraints(budget=60.0))
+
+    assert "MEI-0" in {p["id"] for p in round_plan["players"]}
@@ -0,0 +1,16 @@
+-- SuperMittos Migration 000
+-- Colunas do feature builder incremental (backend/app/etl/feature_builder.py)
+--
+-- estatisticas_rodada.casa: mandante na partida, gravada pelo NormalizedLoader
+-- e lida pelas janelas casa/fora. estatisticas_historicas.ultima_rodada: última
+-- rodada incorporada; sem ela o FeatureBuilder não atualiza nada.
+--
+-- Rodar antes da 002: a conversão para tabelas particionadas copia as colunas
+-- do schema atual a partir das tabelas antigas.
+--   psql "$DATABASE_URL" -f database/migrations/000_features_incrementais.sql
+-- Idempotente: pode ser reaplicada.
+
+SET search_path TO supermittos, public;
+
+ALTER TABLE estatisticas_rodada ADD COLUMN IF NOT EXISTS casa BOOLEAN;
+ALTER TABLE estatisticas_historicas ADD COLUMN IF NOT EXISTS ultima_rodada INTEGER;
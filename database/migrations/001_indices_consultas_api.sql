@@ -0,0 +1,134 @@
+-- SuperMittos Migration 001
+-- Índices compostos e de cobertura para as consultas da API (main.py) e do
+-- otimizador (team_optimizer.py)
+--
+-- Rodar com psql fora de uma transação (CONCURRENTLY não bloqueia escrita,
+-- mas não pode rodar dentro de BEGIN/COMMIT):
+--   psql "$DATABASE_URL" -f database/migrations/001_indices_consultas_api.sql
+-- Idempotente: pode ser reaplicada. O plano esperado de cada consulta é
+-- conferido por backend/benchmarks/query_plans.py.
+
+SET search_path TO supermittos, public;
+
+-- ================================
+-- SUGESTÕES
+-- ================================
+
+-- get_team_suggestions: ORDER BY pontuacao_esperada DESC NULLS LAST LIMIT,
+-- sem filtro, por rodada (+ estratégia) ou só por estratégia.
+-- O índice por rodada também atende as parciais ao vivo (st.rodada = :rodada)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sugestoes_pontuacao
+    ON sugestoes_times (pontuacao_esperada DESC NULLS LAST);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sugestoes_rodada_estrategia_pontuacao
+    ON sugestoes_times (rodada, estrategia, pontuacao_esperada DESC NULLS LAST);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sugestoes_estrategia_pontuacao
+    ON sugestoes_times (estrategia, pontuacao_esperada DESC NULLS LAST);
+
+-- Prefixo do índice acima
+DROP INDEX CONCURRENTLY IF EXISTS idx_sugestoes_rodada;
+
+-- get_suggestion_detail / simulação: jogadores de uma sugestão sem ir ao heap
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sugestoes_jogadores_sugestao
+    ON sugestoes_jogadores (sugestao_id)
+    INCLUDE (jogador_id, posicao_time, pontos_esperados, preco, capitao, vice_capitao);
+
+-- ================================
+-- PREÇOS E PROVÁVEIS (vw_jogadores_completo)
+-- ================================
+
+-- preco_atual: ORDER BY rodada DESC LIMIT 1 por jogador, só no índice
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_historico_precos_jogador_rodada
+    ON historico_precos (jogador_id, rodada DESC) INCLUDE (preco);
+
+-- load_price_trends: janela de rodadas agregada por jogador
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_historico_precos_rodada
+    ON historico_precos (rodada) INCLUDE (jogador_id, variacao);
+
+-- Coberto por UNIQUE (jogador_id, rodada) e pelos índices acima
+DROP INDEX CONCURRENTLY IF EXISTS idx_historico_precos_jogador;
+
+-- prob_titular: MAX(rodada) e média ponderada da última rodada por jogador
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_provaveis_jogador_rodada
+    ON provaveis_escalacoes (jogador_id, rodada DESC) INCLUDE (probabilidade_titular, confiabilidade);
+
+-- load_player_columns_from_db: lesão/suspensão da rodada agrupadas por jogador
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_provaveis_rodada_jogador
+    ON provaveis_escalacoes (rodada, jogador_id) INCLUDE (lesionado, suspenso);
+
+-- Prefixo do índice acima
+DROP INDEX CONCURRENTLY IF EXISTS idx_provaveis_rodada;
+
+-- ================================
+-- ESTATÍSTICAS E PREDIÇÕES
+-- ================================
+
+-- vw_jogadores_completo: MAX(temporada) e junção da janela 'temporada'
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estatisticas_historicas_temporada_periodo
+    ON estatisticas_historicas (temporada, periodo) INCLUDE (jogador_id, media_pontos, gols_total, assistencias_total, forma_recente, consistencia);
+
+-- load_player_columns_from_db: predições do modelo ativo para a rodada
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_predicoes_modelo_rodada
+    ON predicoes (modelo_id, rodada) INCLUDE (jogador_id, valor_predito, intervalo_min, intervalo_max);
+
+-- ================================
+-- MERCADO
+-- ================================
+
+-- get_market_status (último status) e get_current_round (MAX(rodada_atual))
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mercado_status_created_at
+    ON mercado_status (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mercado_status_rodada
+    ON mercado_status (rodada_atual);
+
+-- ================================
+-- VIEWS
+-- ================================
+
+-- vw_jogadores_completo passa a expor clube_id (filtro de get_players e coluna
+-- lida por load_player_columns_from_db); coluna nova só pode entrar no fim
+CREATE OR REPLACE VIEW vw_jogadores_completo AS
+SELECT 
+    j.id,
+    j.jogador_id,
+    j.nome,
+    j.apelido,
+    c.nome as clube_nome,
+    p.nome as posicao_nome,
+    p.abreviacao as posicao_abrev,
+    
+    -- Estatísticas atuais
+    eh.media_pontos,
+    eh.gols_total,
+    eh.assistencias_total,
+    eh.forma_recente,
+    eh.consistencia,
+    
+    -- Preço atual (última rodada)
+    (SELECT preco FROM historico_precos hp 
+     WHERE hp.jogador_id = j.id 
+     ORDER BY rodada DESC LIMIT 1) as preco_atual,
+    
+    -- Probabilidade de escalar (última rodada, média ponderada pela confiabilidade das fontes)
+    (SELECT SUM(pe.probabilidade_titular * pe.confiabilidade) / NULLIF(SUM(pe.confiabilidade), 0)
+     FROM provaveis_escalacoes pe 
+     WHERE pe.jogador_id = j.id 
+       AND pe.rodada = (SELECT MAX(rodada) FROM provaveis_escalacoes pr WHERE pr.jogador_id = j.id)) as prob_titular,
+    
+    j.status_ativo,
+    j.updated_at,
+    j.clube_id
+    
+FROM jogadores j
+LEFT JOIN clubes c ON j.clube_id = c.clube_id
+LEFT JOIN posicoes p ON j.posicao_id = p.posicao_id
+LEFT JOIN estatisticas_historicas eh ON j.id = eh.jogador_id 
+    AND eh.periodo = 'temporada' AND eh.temporada = (SELECT MAX(temporada) FROM estatisticas_historicas)
+WHERE j.status_ativo = true;
+
+ANALYZE sugestoes_times;
+ANALYZE sugestoes_jogadores;
+ANALYZE historico_precos;
+ANALYZE provaveis_escalacoes;
+ANALYZE estatisticas_historicas;
+ANALYZE predicoes;
+ANALYZE mercado_status;
@@ -0,0 +1,330 @@
+-- SuperMittos Migration 002
+-- Particionamento por rodada das tabelas que crescem a cada rodada, BRIN nas
+-- colunas de tempo e retenção por partição em vez de DELETE
+--
+-- estatisticas_rodada, historico_precos, predicoes, sugestoes_times e
+-- sugestoes_jogadores passam a ser particionadas por RANGE (rodada), uma
+-- partição por rodada da temporada corrente (<tabela>_<temporada>_rNN). As
+-- partições novas são criadas sob demanda e as expiradas desanexadas pelo
+-- backend/app/etl/partition_manager.py (DETACH PARTITION CONCURRENTLY exige
+-- PostgreSQL 14+).
+--
+-- A conversão copia os dados numa única transação, com as tabelas bloqueadas:
+-- rodar com o agendador do ETL desligado, numa janela sem tráfego de escrita:
+--   psql "$DATABASE_URL" -f database/migrations/002_particionamento_retencao.sql
+-- Idempotente: se as tabelas já são particionadas, nada é reescrito.
+
+SET search_path TO supermittos, public;
+
+CREATE OR REPLACE FUNCTION criar_particao_rodada(p_tabela TEXT, p_temporada TEXT, p_rodada INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    v_particao TEXT := format('%s_%s_r%s', p_tabela, p_temporada, lpad(p_rodada::text, 2, '0'));
+BEGIN
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                   v_particao, p_tabela, p_rodada, p_rodada + 1);
+    RETURN v_particao;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_tabela TEXT;
+    v_temporada TEXT;
+    v_objeto TEXT;
+    v_rodada INTEGER;
+    v_colunas TEXT;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sugestoes_times'::regclass) = 'p' THEN
+        RAISE NOTICE 'Tabelas já particionadas: nada a converter';
+        RETURN;
+    END IF;
+
+    -- Partições das rodadas existentes ficam com a temporada do último status
+    SELECT temporada INTO v_temporada FROM mercado_status ORDER BY created_at DESC LIMIT 1;
+    v_temporada := COALESCE(v_temporada, extract(year FROM now())::text);
+
+    -- As views são recriadas no fim, sobre as tabelas novas
+    DROP VIEW IF EXISTS vw_jogadores_completo;
+    DROP VIEW IF EXISTS vw_performance_dashboard;
+
+    -- Tabelas antigas viram *_legado; sem PK/UNIQUE nem índices, os nomes
+    -- ficam livres para as tabelas particionadas
+    FOREACH v_tabela IN ARRAY ARRAY['sugestoes_jogadores', 'sugestoes_times', 'predicoes', 'historico_precos', 'estatisticas_rodada'] LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_tabela, v_tabela || '_legado');
+        FOR v_objeto IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = (v_tabela || '_legado')::regclass AND contype IN ('p', 'u')
+        LOOP
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I CASCADE', v_tabela || '_legado', v_objeto);
+        END LOOP;
+        FOR v_objeto IN
+            SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = (v_tabela || '_legado')::regclass
+        LOOP
+            EXECUTE format('DROP INDEX %s', v_objeto);
+        END LOOP;
+    END LOOP;
+
+    CREATE TABLE estatisticas_rodada (
+        id UUID DEFAULT uuid_generate_v4(),
+        jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
+        rodada INTEGER NOT NULL,
+        campeonato TEXT DEFAULT 'brasileirao',
+        data_rodada DATE,
+    
+        -- Cartola FC stats
+        pontos_cartola REAL,
+        preco REAL,
+        variacao_preco REAL,
+        media_ultimas_5 REAL,
+    
+        -- Match stats
+        jogou BOOLEAN DEFAULT false,
+        casa BOOLEAN, -- Mandante na partida (NULL se desconhecido)
+        minutos_jogados INTEGER DEFAULT 0,
+        gols INTEGER DEFAULT 0,
+        assistencias INTEGER DEFAULT 0,
+        finalizacoes INTEGER DEFAULT 0,
+        finalizacoes_certas INTEGER DEFAULT 0,
+        passes_certos INTEGER DEFAULT 0,
+        passes_errados INTEGER DEFAULT 0,
+        cartoes_amarelos INTEGER DEFAULT 0,
+        cartoes_vermelhos INTEGER DEFAULT 0,
+    
+        -- Advanced stats (FootyStats/SofaScore)
+        xg REAL, -- Expected Goals
+        xa REAL, -- Expected Assists
+        rating REAL,
+        touches INTEGER,
+        duelos_vencidos INTEGER,
+        duelos_perdidos INTEGER,
+    
+        fonte TEXT NOT NULL,
+        metadados JSONB, -- Outros dados específicos
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+        PRIMARY KEY (id, rodada),
+        UNIQUE (jogador_id, rodada, fonte)
+    ) PARTITION BY RANGE (rodada);
+
+    CREATE TABLE historico_precos (
+        id UUID DEFAULT uuid_generate_v4(),
+        jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
+        rodada INTEGER NOT NULL,
+        preco REAL NOT NULL,
+        variacao REAL,
+        variacao_percentual REAL,
+        volume_transferencias INTEGER DEFAULT 0,
+    
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+        PRIMARY KEY (id, rodada),
+        UNIQUE (jogador_id, rodada)
+    ) PARTITION BY RANGE (rodada);
+
+    CREATE TABLE predicoes (
+        id UUID DEFAULT uuid_generate_v4(),
+        modelo_id UUID REFERENCES modelos_predicao(id) ON DELETE CASCADE,
+        jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
+        rodada INTEGER NOT NULL,
+    
+        valor_predito REAL NOT NULL,
+        confianca REAL DEFAULT 0.0,
+        intervalo_min REAL,
+        intervalo_max REAL,
+    
+        -- Para comparação posterior
+        valor_real REAL,
+        erro_absoluto REAL,
+    
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+        PRIMARY KEY (id, rodada),
+        UNIQUE (modelo_id, jogador_id, rodada)
+    ) PARTITION BY RANGE (rodada);
+
+    CREATE TABLE sugestoes_times (
+        id UUID DEFAULT uuid_generate_v4(),
+        usuario_id UUID, -- Se implementar autenticação
+        rodada INTEGER NOT NULL,
+    
+        -- Configurações da sugestão
+        orcamento_maximo REAL DEFAULT 100.0,
+        estrategia TEXT DEFAULT 'balanced', -- 'conservative', 'aggressive', 'balanced'
+        esquema_tatico TEXT DEFAULT '3-4-3',
+    
+        -- Métricas calculadas
+        pontuacao_esperada REAL,
+        custo_total REAL,
+        roi_esperado REAL, -- Return on Investment
+        risco_calculado REAL,
+    
+        -- Metadados
+        algoritmo_versao TEXT DEFAULT '1.0',
+        parametros JSONB,
+    
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+        PRIMARY KEY (id, rodada)
+    ) PARTITION BY RANGE (rodada);
+
+    CREATE TABLE sugestoes_jogadores (
+        id UUID DEFAULT uuid_generate_v4(),
+        sugestao_id UUID,
+        rodada INTEGER NOT NULL,
+        jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
+    
+        posicao_time TEXT NOT NULL, -- 'GOL', 'DEF', 'MID', 'ATA'
+        capitao BOOLEAN DEFAULT false,
+        vice_capitao BOOLEAN DEFAULT false,
+    
+        -- Métricas individuais para essa sugestão
+        pontos_esperados REAL,
+        preco REAL,
+        roi_individual REAL,
+        probabilidade_escalar REAL,
+    
+        PRIMARY KEY (id, rodada),
+        FOREIGN KEY (sugestao_id, rodada) REFERENCES sugestoes_times(id, rodada) ON DELETE CASCADE,
+        UNIQUE (sugestao_id, jogador_id, rodada)
+    ) PARTITION BY RANGE (rodada);
+
+    -- Uma partição por rodada presente nos dados; a cópia usa as colunas da
+    -- tabela nova que existem na antiga (a ordem física nas antigas muda com
+    -- ALTER TABLE ADD COLUMN; colunas que o banco ainda não tinha, como
+    -- estatisticas_rodada.casa sem a migration 000, ficam com o default)
+    FOREACH v_tabela IN ARRAY ARRAY['estatisticas_rodada', 'historico_precos', 'predicoes', 'sugestoes_times'] LOOP
+        FOR v_rodada IN EXECUTE format('SELECT DISTINCT rodada FROM %I', v_tabela || '_legado') LOOP
+            PERFORM criar_particao_rodada(v_tabela, v_temporada, v_rodada);
+        END LOOP;
+        SELECT string_agg(quote_ident(nova.attname), ', ' ORDER BY nova.attnum) INTO v_colunas
+        FROM pg_attribute nova
+        JOIN pg_attribute antiga ON antiga.attrelid = (v_tabela || '_legado')::regclass
+            AND antiga.attname = nova.attname AND antiga.attnum > 0 AND NOT antiga.attisdropped
+        WHERE nova.attrelid = v_tabela::regclass AND nova.attnum > 0 AND NOT nova.attisdropped;
+        EXECUTE format('INSERT INTO %I (%s) SELECT %s FROM %I', v_tabela, v_colunas, v_colunas, v_tabela || '_legado');
+    END LOOP;
+
+    -- sugestoes_jogadores recebe a rodada da sugestão (sem sugestão, sem partição)
+    FOR v_rodada IN SELECT DISTINCT rodada FROM sugestoes_times LOOP
+        PERFORM criar_particao_rodada('sugestoes_jogadores', v_temporada, v_rodada);
+    END LOOP;
+    INSERT INTO sugestoes_jogadores
+        (id, sugestao_id, rodada, jogador_id, posicao_time, capitao, vice_capitao,
+         pontos_esperados, preco, roi_individual, probabilidade_escalar)
+    SELECT sj.id, sj.sugestao_id, st.rodada, sj.jogador_id, sj.posicao_time, sj.capitao, sj.vice_capitao,
+           sj.pontos_esperados, sj.preco, sj.roi_individual, sj.probabilidade_escalar
+    FROM sugestoes_jogadores_legado sj
+    JOIN sugestoes_times_legado st ON st.id = sj.sugestao_id;
+
+    DROP TABLE sugestoes_jogadores_legado, sugestoes_times_legado, predicoes_legado,
+               historico_precos_legado, estatisticas_rodada_legado;
+
+    -- Índices (001 e BRIN) criados na tabela-mãe valem para todas as partições
+    CREATE INDEX idx_estatisticas_jogador_rodada ON estatisticas_rodada(jogador_id, rodada);
+    CREATE INDEX idx_estatisticas_rodada_campeonato ON estatisticas_rodada(rodada, campeonato);
+    CREATE INDEX idx_estatisticas_pontos ON estatisticas_rodada(pontos_cartola DESC) WHERE pontos_cartola IS NOT NULL;
+    CREATE INDEX idx_sugestoes_pontuacao ON sugestoes_times(pontuacao_esperada DESC NULLS LAST);
+    CREATE INDEX idx_sugestoes_rodada_estrategia_pontuacao ON sugestoes_times(rodada, estrategia, pontuacao_esperada DESC NULLS LAST);
+    CREATE INDEX idx_sugestoes_estrategia_pontuacao ON sugestoes_times(estrategia, pontuacao_esperada DESC NULLS LAST);
+    CREATE INDEX idx_sugestoes_jogadores_sugestao ON sugestoes_jogadores(sugestao_id)
+        INCLUDE (jogador_id, posicao_time, pontos_esperados, preco, capitao, vice_capitao);
+    CREATE INDEX idx_historico_precos_jogador_rodada ON historico_precos(jogador_id, rodada DESC) INCLUDE (preco);
+    CREATE INDEX idx_historico_precos_rodada ON historico_precos(rodada) INCLUDE (jogador_id, variacao);
+    CREATE INDEX idx_predicoes_modelo_rodada ON predicoes(modelo_id, rodada)
+        INCLUDE (jogador_id, valor_predito, intervalo_min, intervalo_max);
+    CREATE INDEX idx_estatisticas_created_at_brin ON estatisticas_rodada USING BRIN (created_at);
+    CREATE INDEX idx_historico_precos_created_at_brin ON historico_precos USING BRIN (created_at);
+    CREATE INDEX idx_predicoes_created_at_brin ON predicoes USING BRIN (created_at);
+    CREATE INDEX idx_sugestoes_created_at_brin ON sugestoes_times USING BRIN (created_at);
+
+    CREATE OR REPLACE VIEW vw_jogadores_completo AS
+    SELECT 
+        j.id,
+        j.jogador_id,
+        j.nome,
+        j.apelido,
+        c.nome as clube_nome,
+        p.nome as posicao_nome,
+        p.abreviacao as posicao_abrev,
+    
+        -- Estatísticas atuais
+        eh.media_pontos,
+        eh.gols_total,
+        eh.assistencias_total,
+        eh.forma_recente,
+        eh.consistencia,
+    
+        -- Preço atual (última rodada)
+        (SELECT preco FROM historico_precos hp 
+         WHERE hp.jogador_id = j.id 
+         ORDER BY rodada DESC LIMIT 1) as preco_atual,
+    
+        -- Probabilidade de escalar (última rodada, média ponderada pela confiabilidade das fontes)
+        (SELECT SUM(pe.probabilidade_titular * pe.confiabilidade) / NULLIF(SUM(pe.confiabilidade), 0)
+         FROM provaveis_escalacoes pe 
+         WHERE pe.jogador_id = j.id 
+           AND pe.rodada = (SELECT MAX(rodada) FROM provaveis_escalacoes pr WHERE pr.jogador_id = j.id)) as prob_titular,
+    
+        j.status_ativo,
+        j.updated_at,
+        j.clube_id
+    
+    FROM jogadores j
+    LEFT JOIN clubes c ON j.clube_id = c.clube_id
+    LEFT JOIN posicoes p ON j.posicao_id = p.posicao_id
+    LEFT JOIN estatisticas_historicas eh ON j.id = eh.jogador_id 
+        AND eh.periodo = 'temporada' AND eh.temporada = (SELECT MAX(temporada) FROM estatisticas_historicas)
+    WHERE j.status_ativo = true;
+
+    -- View para dashboard de performance
+    CREATE OR REPLACE VIEW vw_performance_dashboard AS
+    SELECT 
+        j.nome,
+        j.apelido,
+        c.nome as clube,
+        p.abreviacao as posicao,
+    
+        -- Métricas de performance
+        ROUND(AVG(er.pontos_cartola)::numeric, 2) as media_pontos,
+        ROUND(AVG(er.preco)::numeric, 2) as preco_medio,
+        COUNT(er.id) as jogos,
+    
+        -- ROI aproximado
+        ROUND((AVG(er.pontos_cartola) / NULLIF(AVG(er.preco), 0))::numeric, 4) as roi,
+    
+        -- Forma recente (últimos 5 jogos)
+        ROUND(AVG(
+            CASE WHEN er.rodada > (SELECT MAX(rodada) - 5 FROM estatisticas_rodada) 
+                 THEN er.pontos_cartola 
+                 ELSE NULL END
+        )::numeric, 2) as forma_recente
+    
+    FROM jogadores j
+    JOIN estatisticas_rodada er ON j.id = er.jogador_id
+    JOIN clubes c ON j.clube_id = c.clube_id
+    JOIN posicoes p ON j.posicao_id = p.posicao_id
+    WHERE er.pontos_cartola IS NOT NULL
+    GROUP BY j.id, j.nome, j.apelido, c.nome, p.abreviacao
+    HAVING COUNT(er.id) >= 3; -- Mínimo 3 jogos
+
+    COMMENT ON TABLE estatisticas_rodada IS 'Estatísticas detalhadas por rodada e fonte';
+    COMMENT ON TABLE sugestoes_times IS 'Times sugeridos pelo algoritmo de otimização';
+END;
+$$;
+
+-- Snapshots do merge (players_merged) são descartáveis: a tabela antiga, sem
+-- partições, sai e o ETL a recria particionada por dia
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('players_merged')) = 'r' THEN
+        DROP TABLE players_merged;
+    END IF;
+END;
+$$;
+
+ANALYZE estatisticas_rodada;
+ANALYZE historico_precos;
+ANALYZE predicoes;
+ANALYZE sugestoes_times;
+ANALYZE sugestoes_jogadores;
@@ -0,0 +1,29 @@
+-- SuperMittos Migration 003
+-- Busca de jogadores por nome e apelido (/api/v1/players/search)
+--
+-- O autocomplete por prefixo é servido em memória (backend/app/services/
+-- player_search.py); a busca aproximada, quando o prefixo não basta, usa o
+-- operador % do pg_trgm sobre os nomes normalizados pelo
+-- DataNormalizer.normalize_name do ETL.
+--
+-- apelido_normalizado é preenchida pelo próximo ETL (a normalização é a do
+-- Python, não há equivalente em SQL no schema); até lá a busca encontra os
+-- jogadores pelo nome_normalizado.
+--
+-- Rodar com psql fora de uma transação (CONCURRENTLY não pode rodar dentro de
+-- BEGIN/COMMIT):
+--   psql "$DATABASE_URL" -f database/migrations/003_busca_jogadores.sql
+-- Idempotente: pode ser reaplicada.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+SET search_path TO supermittos, public;
+
+ALTER TABLE jogadores ADD COLUMN IF NOT EXISTS apelido_normalizado TEXT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jogadores_nome_trgm
+    ON jogadores USING GIN (nome_normalizado gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jogadores_apelido_trgm
+    ON jogadores USING GIN (apelido_normalizado gin_trgm_ops);
+
+ANALYZE jogadores;
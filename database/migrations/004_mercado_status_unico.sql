@@ -0,0 +1,40 @@
+-- SuperMittos Migration 004
+-- UNIQUE (temporada, rodada_atual) em mercado_status, alvo do upsert do
+-- NormalizedLoader (backend/app/etl/normalized_loader.py)
+--
+-- Bancos antigos gravavam uma linha por leitura do status do mercado: antes da
+-- constraint, fica só a mais recente (created_at) de cada temporada/rodada. O
+-- /market/status lê a mais recente, então a resposta não muda.
+--
+--   psql "$DATABASE_URL" -f database/migrations/004_mercado_status_unico.sql
+-- Idempotente: pode ser reaplicada.
+
+SET search_path TO supermittos, public;
+
+BEGIN;
+
+LOCK TABLE mercado_status IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM mercado_status m
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY temporada, rodada_atual ORDER BY created_at DESC NULLS LAST, id
+    ) as ordem
+    FROM mercado_status
+    WHERE temporada IS NOT NULL AND rodada_atual IS NOT NULL
+) duplicadas
+WHERE m.id = duplicadas.id AND duplicadas.ordem > 1;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'mercado_status'::regclass AND contype = 'u'
+          AND conname = 'mercado_status_temporada_rodada_atual_key'
+    ) THEN
+        ALTER TABLE mercado_status
+            ADD CONSTRAINT mercado_status_temporada_rodada_atual_key UNIQUE (temporada, rodada_atual);
+    END IF;
+END $$;
+
+COMMIT;
@@ -1,9 +1,13 @@
 -- SuperMittos Database Schema
 -- PostgreSQL schema for football analytics and team suggestions
+-- Migrations incorporadas: 000, 001, 002, 003, 004 (database/migrations atualiza bancos antigos)
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Trigramas para a busca aproximada de jogadores por nome
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Create schemas
 CREATE SCHEMA IF NOT EXISTS supermittos;
 SET search_path TO supermittos, public;
@@ -19,6 +23,7 @@ CREATE TABLE jogadores (
     nome TEXT NOT NULL,
     nome_normalizado TEXT NOT NULL, -- Nome normalizado para matching
     apelido TEXT,
+    apelido_normalizado TEXT, -- Apelido normalizado para a busca
     clube_id INTEGER,
     clube_nome TEXT,
     posicao_id INTEGER NOT NULL,
@@ -75,9 +80,9 @@ CREATE TABLE posicoes (
 -- STATISTICS & PERFORMANCE
 -- ================================
 
--- Estatísticas dos jogadores por rodada
+-- Estatísticas dos jogadores por rodada (particionada por rodada, ver PARTITIONS)
 CREATE TABLE estatisticas_rodada (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID DEFAULT uuid_generate_v4(),
     jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
     rodada INTEGER NOT NULL,
     campeonato TEXT DEFAULT 'brasileirao',
@@ -91,6 +96,7 @@ CREATE TABLE estatisticas_rodada (
     
     -- Match stats
     jogou BOOLEAN DEFAULT false,
+    casa BOOLEAN, -- Mandante na partida (NULL se desconhecido)
     minutos_jogados INTEGER DEFAULT 0,
     gols INTEGER DEFAULT 0,
     assistencias INTEGER DEFAULT 0,
@@ -113,8 +119,9 @@ CREATE TABLE estatisticas_rodada (
     metadados JSONB, -- Outros dados específicos
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, rodada),
     UNIQUE (jogador_id, rodada, fonte)
-);
+) PARTITION BY RANGE (rodada);
 
 -- Estatísticas históricas agregadas
 CREATE TABLE estatisticas_historicas (
@@ -145,6 +152,7 @@ CREATE TABLE estatisticas_historicas (
     consistencia REAL, -- Desvio padrão das pontuações
     forma_recente REAL, -- Média últimos 5 jogos
     tendencia TEXT, -- 'crescente', 'estavel', 'decrescente'
+    ultima_rodada INTEGER, -- Última rodada incorporada (feature builder incremental)
     
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
@@ -204,9 +212,9 @@ CREATE TABLE escalacoes_confirmadas (
 -- TEAM SUGGESTIONS
 -- ================================
 
--- Sugestões de times
+-- Sugestões de times (particionada por rodada)
 CREATE TABLE sugestoes_times (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID DEFAULT uuid_generate_v4(),
     usuario_id UUID, -- Se implementar autenticação
     rodada INTEGER NOT NULL,
     
@@ -225,13 +233,16 @@ CREATE TABLE sugestoes_times (
     algoritmo_versao TEXT DEFAULT '1.0',
     parametros JSONB,
     
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (id, rodada)
+) PARTITION BY RANGE (rodada);
 
--- Jogadores nas sugestões
+-- Jogadores nas sugestões (mesma rodada da sugestão: as partições saem juntas)
 CREATE TABLE sugestoes_jogadores (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    sugestao_id UUID REFERENCES sugestoes_times(id) ON DELETE CASCADE,
+    id UUID DEFAULT uuid_generate_v4(),
+    sugestao_id UUID,
+    rodada INTEGER NOT NULL,
     jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
     
     posicao_time TEXT NOT NULL, -- 'GOL', 'DEF', 'MID', 'ATA'
@@ -244,8 +255,10 @@ CREATE TABLE sugestoes_jogadores (
     roi_individual REAL,
     probabilidade_escalar REAL,
     
-    UNIQUE (sugestao_id, jogador_id)
-);
+    PRIMARY KEY (id, rodada),
+    FOREIGN KEY (sugestao_id, rodada) REFERENCES sugestoes_times(id, rodada) ON DELETE CASCADE,
+    UNIQUE (sugestao_id, jogador_id, rodada)
+) PARTITION BY RANGE (rodada);
 
 -- ================================
 -- MARKET DATA
@@ -264,12 +277,14 @@ CREATE TABLE mercado_status (
     mes_atual INTEGER,
     tipo_periodo TEXT, -- 'pre_season', 'regular', 'playoffs'
     
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    UNIQUE (temporada, rodada_atual) -- Upsert do ETL (migration 004)
 );
 
--- Histórico de preços
+-- Histórico de preços (particionada por rodada)
 CREATE TABLE historico_precos (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID DEFAULT uuid_generate_v4(),
     jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
     rodada INTEGER NOT NULL,
     preco REAL NOT NULL,
@@ -279,8 +294,9 @@ CREATE TABLE historico_precos (
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, rodada),
     UNIQUE (jogador_id, rodada)
-);
+) PARTITION BY RANGE (rodada);
 
 -- ================================
 -- OPTIMIZATION & ML
@@ -314,9 +330,9 @@ CREATE TABLE modelos_predicao (
     UNIQUE (nome, versao)
 );
 
--- Predições dos modelos
+-- Predições dos modelos (particionada por rodada)
 CREATE TABLE predicoes (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID DEFAULT uuid_generate_v4(),
     modelo_id UUID REFERENCES modelos_predicao(id) ON DELETE CASCADE,
     jogador_id UUID REFERENCES jogadores(id) ON DELETE CASCADE,
     rodada INTEGER NOT NULL,
@@ -332,8 +348,9 @@ CREATE TABLE predicoes (
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    PRIMARY KEY (id, rodada),
     UNIQUE (modelo_id, jogador_id, rodada)
-);
+) PARTITION BY RANGE (rodada);
 
 -- ================================
 -- LOGS & MONITORING
@@ -368,6 +385,9 @@ CREATE TABLE etl_execucoes (
 -- Jogadores
 CREATE INDEX idx_jogadores_nome_normalizado ON jogadores(nome_normalizado);
 CREATE INDEX idx_jogadores_clube_posicao ON jogadores(clube_id, posicao_id);
+-- Busca aproximada (/api/v1/players/search): operador % do pg_trgm
+CREATE INDEX idx_jogadores_nome_trgm ON jogadores USING GIN (nome_normalizado gin_trgm_ops);
+CREATE INDEX idx_jogadores_apelido_trgm ON jogadores USING GIN (apelido_normalizado gin_trgm_ops);
 
 -- Estatísticas
 CREATE INDEX idx_estatisticas_jogador_rodada ON estatisticas_rodada(jogador_id, rodada);
@@ -375,12 +395,33 @@ CREATE INDEX idx_estatisticas_rodada_campeonato ON estatisticas_rodada(rodada, c
 CREATE INDEX idx_estatisticas_pontos ON estatisticas_rodada(pontos_cartola DESC) WHERE pontos_cartola IS NOT NULL;
 
 -- Prováveis
-CREATE INDEX idx_provaveis_rodada ON provaveis_escalacoes(rodada);
 CREATE INDEX idx_provaveis_probabilidade ON provaveis_escalacoes(probabilidade_titular DESC);
 
--- Performance indexes
-CREATE INDEX idx_sugestoes_rodada ON sugestoes_times(rodada);
-CREATE INDEX idx_historico_precos_jogador ON historico_precos(jogador_id);
+-- Índices das consultas da API e do otimizador (database/migrations/001_indices_consultas_api.sql)
+CREATE INDEX idx_sugestoes_pontuacao ON sugestoes_times(pontuacao_esperada DESC NULLS LAST);
+CREATE INDEX idx_sugestoes_rodada_estrategia_pontuacao ON sugestoes_times(rodada, estrategia, pontuacao_esperada DESC NULLS LAST);
+CREATE INDEX idx_sugestoes_estrategia_pontuacao ON sugestoes_times(estrategia, pontuacao_esperada DESC NULLS LAST);
+CREATE INDEX idx_sugestoes_jogadores_sugestao ON sugestoes_jogadores(sugestao_id)
+    INCLUDE (jogador_id, posicao_time, pontos_esperados, preco, capitao, vice_capitao);
+CREATE INDEX idx_historico_precos_jogador_rodada ON historico_precos(jogador_id, rodada DESC) INCLUDE (preco);
+CREATE INDEX idx_historico_precos_rodada ON historico_precos(rodada) INCLUDE (jogador_id, variacao);
+CREATE INDEX idx_provaveis_jogador_rodada ON provaveis_escalacoes(jogador_id, rodada DESC)
+    INCLUDE (probabilidade_titular, confiabilidade);
+CREATE INDEX idx_provaveis_rodada_jogador ON provaveis_escalacoes(rodada, jogador_id) INCLUDE (lesionado, suspenso);
+CREATE INDEX idx_estatisticas_historicas_temporada_periodo ON estatisticas_historicas(temporada, periodo)
+    INCLUDE (jogador_id, media_pontos, gols_total, assistencias_total, forma_recente, consistencia);
+CREATE INDEX idx_predicoes_modelo_rodada ON predicoes(modelo_id, rodada)
+    INCLUDE (jogador_id, valor_predito, intervalo_min, intervalo_max);
+CREATE INDEX idx_mercado_status_created_at ON mercado_status(created_at DESC);
+CREATE INDEX idx_mercado_status_rodada ON mercado_status(rodada_atual);
+
+-- BRIN nas colunas de tempo das tabelas particionadas: inserção em ordem de
+-- created_at, poucas páginas de índice por partição
+-- (database/migrations/002_particionamento_retencao.sql)
+CREATE INDEX idx_estatisticas_created_at_brin ON estatisticas_rodada USING BRIN (created_at);
+CREATE INDEX idx_historico_precos_created_at_brin ON historico_precos USING BRIN (created_at);
+CREATE INDEX idx_predicoes_created_at_brin ON predicoes USING BRIN (created_at);
+CREATE INDEX idx_sugestoes_created_at_brin ON sugestoes_times USING BRIN (created_at);
 
 -- ================================
 -- FUNCTIONS & TRIGGERS
@@ -415,6 +456,25 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- ================================
+-- PARTITIONS
+-- ================================
+
+-- estatisticas_rodada, historico_precos, predicoes, sugestoes_times e
+-- sugestoes_jogadores têm uma partição por rodada da temporada corrente,
+-- criada sob demanda antes da escrita (backend/app/etl/partition_manager.py,
+-- que também desanexa as partições expiradas). Nome: <tabela>_<temporada>_rNN
+CREATE OR REPLACE FUNCTION criar_particao_rodada(p_tabela TEXT, p_temporada TEXT, p_rodada INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    v_particao TEXT := format('%s_%s_r%s', p_tabela, p_temporada, lpad(p_rodada::text, 2, '0'));
+BEGIN
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                   v_particao, p_tabela, p_rodada, p_rodada + 1);
+    RETURN v_particao;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ================================
 -- INITIAL DATA
 -- ================================
@@ -461,19 +521,21 @@ SELECT
      WHERE hp.jogador_id = j.id 
      ORDER BY rodada DESC LIMIT 1) as preco_atual,
     
-    -- Probabilidade de escalar
-    (SELECT probabilidade_titular FROM provaveis_escalacoes pe 
+    -- Probabilidade de escalar (última rodada, média ponderada pela confiabilidade das fontes)
+    (SELECT SUM(pe.probabilidade_titular * pe.confiabilidade) / NULLIF(SUM(pe.confiabilidade), 0)
+     FROM provaveis_escalacoes pe 
      WHERE pe.jogador_id = j.id 
-     ORDER BY rodada DESC LIMIT 1) as prob_titular,
+       AND pe.rodada = (SELECT MAX(rodada) FROM provaveis_escalacoes pr WHERE pr.jogador_id = j.id)) as prob_titular,
     
     j.status_ativo,
-    j.updated_at
+    j.updated_at,
+    j.clube_id
     
 FROM jogadores j
 LEFT JOIN clubes c ON j.clube_id = c.clube_id
 LEFT JOIN posicoes p ON j.posicao_id = p.posicao_id
 LEFT JOIN estatisticas_historicas eh ON j.id = eh.jogador_id 
-    AND eh.periodo = 'temporada' AND eh.temporada = '2024'
+    AND eh.periodo = 'temporada' AND eh.temporada = (SELECT MAX(temporada) FROM estatisticas_historicas)
 WHERE j.status_ativo = true;
 
 -- View para dashboard de performance
@@ -485,19 +547,19 @@ SELECT
     p.abreviacao as posicao,
     
     -- Métricas de performance
-    ROUND(AVG(er.pontos_cartola), 2) as media_pontos,
-    ROUND(AVG(er.preco), 2) as preco_medio,
+    ROUND(AVG(er.pontos_cartola)::numeric, 2) as media_pontos,
+    ROUND(AVG(er.preco)::numeric, 2) as preco_medio,
     COUNT(er.id) as jogos,
     
     -- ROI aproximado
-    ROUND(AVG(er.pontos_cartola) / NULLIF(AVG(er.preco), 0), 4) as roi,
+    ROUND((AVG(er.pontos_cartola) / NULLIF(AVG(er.preco), 0))::numeric, 4) as roi,
     
     -- Forma recente (últimos 5 jogos)
     ROUND(AVG(
         CASE WHEN er.rodada > (SELECT MAX(rodada) - 5 FROM estatisticas_rodada) 
              THEN er.pontos_cartola 
              ELSE NULL END
-    ), 2) as forma_recente
+    )::numeric, 2) as forma_recente
     
 FROM jogadores j
 JOIN estatisticas_rodada er ON j.id = er.jogador_id